@@ -1,5 +1,6 @@
-from flask import Flask, render_template, jsonify, request, send_file
+from flask import Flask, render_template, jsonify, request, send_file, Response, redirect
 import requests
+from requests.adapters import HTTPAdapter
 import json
 from datetime import datetime, timedelta, timezone
 import os
@@ -9,9 +10,36 @@ import logging
 from jinja2.exceptions import TemplateNotFound
 from dotenv import load_dotenv
 from docx import Document
-from collections import Counter
+from array import array
+from collections import Counter, OrderedDict
+import copy
+from html import unescape
+from urllib.parse import unquote
+from contextlib import contextmanager
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import functools
+import gzip
+import hashlib
+import inspect
 import io
-from bs4 import BeautifulSoup
+import math
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 load_dotenv()
 
@@ -25,52 +53,2187 @@ logger = logging.getLogger(__name__)
 YOUTUBE_API_KEY_1 = os.getenv("API_KEY_1")
 YOUTUBE_API_KEY_2 = os.getenv("API_KEY_2")
 CHANNEL_ID = "UCB-mfYAd3oJLEkoMxjRAxbg"
+YOUTUBE_API_BASE_URL = os.getenv("YOUTUBE_API_BASE_URL", "https://www.googleapis.com/youtube/v3")
 
-class YouTubeCommentsService:
+# Quota units charged per call type (https://developers.google.com/youtube/v3/determine_quota_cost)
+QUOTA_COSTS = {
+    'search': 100,
+    'commentThreads': 1,
+    'comments': 1,
+    'videos': 1,
+    'playlistItems': 1,
+    'channels': 1
+}
+YOUTUBE_DAILY_QUOTA = int(os.getenv("YOUTUBE_DAILY_QUOTA", 10000))
+QUOTA_RESERVE_FRACTION = float(os.getenv("QUOTA_RESERVE_FRACTION", 0.05))
+QUOTA_ERROR_REASONS = {'quotaExceeded', 'dailyLimitExceeded', 'rateLimitExceeded', 'userRateLimitExceeded'}
+
+# Monitored channels (comma-separated channel IDs; the first is the default for requests without ?channel=)
+CHANNEL_IDS = os.getenv("CHANNEL_IDS", CHANNEL_ID)
+API_CONCURRENCY = int(os.getenv("API_CONCURRENCY", 32))
+CHANNEL_CONCURRENCY = int(os.getenv("CHANNEL_CONCURRENCY", 8))
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", 4))
+COMPARE_WORKERS = 8
+
+# Shared cache configuration (one SQLite file shared by all gunicorn workers)
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", os.path.join(tempfile.gettempdir(), "car_sense_cache.sqlite3"))
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", 300))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 200))
+
+# Upstream fetch configuration
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", 8))
+HTTP_TIMEOUT = int(os.getenv("HTTP_TIMEOUT", 30))
+MAX_COMMENTS_PER_VIDEO = int(os.getenv("MAX_COMMENTS_PER_VIDEO", 2000))
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", 16))
+VIDEO_METADATA_TTL = int(os.getenv("VIDEO_METADATA_TTL", 900))
+VIDEOS_PER_REQUEST = 50
+VIDEO_URL_TTL = int(os.getenv("VIDEO_URL_TTL", 86400))
+SEARCH_MAX_TERMS = 8
+SEARCH_MAX_PER_PAGE = 100
+BING_SCAN_MAX_CHARS = int(os.getenv("BING_SCAN_MAX_CHARS", 2000000))
+
+# Reply expansion configuration (REPLY_EXPANSION=on also pulls replies into the store)
+REPLY_EXPANSION = os.getenv("REPLY_EXPANSION", "off").lower()
+REPLY_QUOTA_BUDGET = int(os.getenv("REPLY_QUOTA_BUDGET", 50))
+REPLY_TIME_BUDGET = float(os.getenv("REPLY_TIME_BUDGET", 5))
+MAX_REPLIES_PER_THREAD = int(os.getenv("MAX_REPLIES_PER_THREAD", 100))
+
+# Snapshot refresh configuration (stale-while-revalidate)
+SNAPSHOT_STALE_SECONDS = int(os.getenv("SNAPSHOT_STALE_SECONDS", CACHE_TTL_SECONDS))
+SNAPSHOT_MAX_AGE = int(os.getenv("SNAPSHOT_MAX_AGE", 86400))
+REFRESH_INTERVAL = int(os.getenv("REFRESH_INTERVAL", 240))
+REFRESH_WORKERS = int(os.getenv("REFRESH_WORKERS", 2))
+REFRESH_COMBINATIONS = os.getenv("REFRESH_COMBINATIONS", "chart:10:50,all:5:20,all:10:30")
+BACKGROUND_REFRESH = os.getenv("BACKGROUND_REFRESH", "off").lower()
+
+# Persistent comment store configuration
+COMMENT_STORE_PATH = os.getenv("COMMENT_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'car_sense.sqlite3'))
+STORE_SYNC_INTERVAL = int(os.getenv("STORE_SYNC_INTERVAL", 300))
+VIDEO_WINDOW_DAYS = 30
+CHANNEL_INDEX_VERSION = 1
+
+# Historical backfill (walks each channel's uploads playlist into the store) and windowed charts
+BACKFILL_COMMENTS_PER_VIDEO = int(os.getenv("BACKFILL_COMMENTS_PER_VIDEO", 100))
+BACKFILL_PAGE_INTERVAL = float(os.getenv("BACKFILL_PAGE_INTERVAL", 2))
+BACKFILL_PAGES_PER_RUN = int(os.getenv("BACKFILL_PAGES_PER_RUN", 20))
+BACKFILL_QUOTA_FLOOR = float(os.getenv("BACKFILL_QUOTA_FLOOR", 0.25))
+BACKFILL_LEASE_SECONDS = 600
+MAX_WINDOW_DAYS = 1830
+WINDOW_PATTERN = re.compile(r'(\d+)([dwmy])')
+WINDOW_UNIT_DAYS = {'d': 1, 'w': 7, 'm': 30, 'y': 365}
+BACKFILL_RESUMABLE = ('pending', 'running', 'paused')
+
+# Report job configuration
+REPORT_DIR = os.getenv("REPORT_DIR", os.path.join(tempfile.gettempdir(), "car_sense_reports"))
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", 2))
+REPORT_TTL_SECONDS = int(os.getenv("REPORT_TTL_SECONDS", 3600))
+ANALYSIS_TTL_SECONDS = int(os.getenv("ANALYSIS_TTL_SECONDS", 900))
+REPORT_LEASE_SECONDS = int(os.getenv("REPORT_LEASE_SECONDS", 120))
+REPORT_POLL_INTERVAL = 0.5
+MAX_REPORT_VIDEOS = 20
+
+# Admission control configuration
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "on").lower()
+ADMISSION_LIMITS = os.getenv("ADMISSION_LIMITS", "chart-data:8,sentiment-data:8,ai-analysis:2,export-data:1")
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", 16))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", 2))
+CLIENT_RATE_LIMIT = float(os.getenv("CLIENT_RATE_LIMIT", 2))
+CLIENT_RATE_BURST = int(os.getenv("CLIENT_RATE_BURST", 20))
+TRUST_FORWARDED_FOR = os.getenv("TRUST_FORWARDED_FOR", "off").lower()
+MAX_TRACKED_CLIENTS = 10000
+
+# Sentiment engine configuration
+SENTIMENT_CACHE_SIZE = int(os.getenv("SENTIMENT_CACHE_SIZE", 50000))
+SENTIMENT_PROCESSES = int(os.getenv("SENTIMENT_PROCESSES", 0))
+SENTIMENT_POOL_MIN_BATCH = int(os.getenv("SENTIMENT_POOL_MIN_BATCH", 200))
+
+# Response encoding configuration
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 1024))
+COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", 6))
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/html', 'text/plain', 'text/css', 'application/javascript'}
+
+# Metrics configuration
+METRIC_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+METRIC_DESCRIPTIONS = {
+    'http_request_duration_seconds': ('histogram', 'Flask route latency'),
+    'http_request_errors_total': ('counter', 'Flask responses with a 5xx status'),
+    'youtube_api_request_duration_seconds': ('histogram', 'Upstream call latency by endpoint'),
+    'youtube_api_errors_total': ('counter', 'Failed upstream calls by endpoint'),
+    'youtube_api_key_switches_total': ('counter', 'API keys drained after a quota error'),
+    'youtube_api_quota_units_total': ('counter', 'Quota units charged by channel'),
+    'sentiment_batch_duration_seconds': ('histogram', 'SentimentEngine.analyze_batch latency'),
+    'sentiment_texts_scored_total': ('counter', 'Texts scored by TextBlob (memo misses)'),
+    'aggregation_duration_seconds': ('histogram', 'Comment aggregation latency by stage'),
+    'serialization_duration_seconds': ('histogram', 'JSON response serialization latency by route'),
+    'docx_build_duration_seconds': ('histogram', 'DOCX report build latency'),
+    'compression_duration_seconds': ('histogram', 'Response compression latency by encoding'),
+    'report_job_duration_seconds': ('histogram', 'Background export job latency by outcome'),
+    'admission_rejections_total': ('counter', 'Requests refused a slot by endpoint, reason and fallback'),
+    'admission_wait_seconds': ('histogram', 'Time admitted requests spent in the wait queue'),
+    'admission_in_flight': ('gauge', 'Requests holding an admission slot by endpoint'),
+    'admission_queue_depth': ('gauge', 'Requests waiting for an admission slot by endpoint')
+}
+
+class MetricsRegistry:
+    """Minimal thread-safe counters and histograms rendered in Prometheus text format
+    
+    Values are kept per process; each gunicorn worker serves its own.
+    """
+    
+    def __init__(self, buckets=METRIC_BUCKETS, descriptions=METRIC_DESCRIPTIONS):
+        self.buckets = buckets
+        self.descriptions = descriptions
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _label_key(labels):
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+    
+    def inc(self, name, amount=1, **labels):
+        """Increment a counter"""
+        key = self._label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+    
+    def set(self, name, value, **labels):
+        """Set a gauge"""
+        key = self._label_key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+    
+    def observe(self, name, value, **labels):
+        """Record a histogram observation"""
+        key = self._label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            entry = series.get(key)
+            if entry is None:
+                entry = series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+    
+    @staticmethod
+    def _format_labels(key, extra=()):
+        pairs = list(key) + list(extra)
+        if not pairs:
+            return ''
+        escaped = (
+            '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+            for name, value in pairs
+        )
+        return '{' + ','.join(escaped) + '}'
+    
+    def render(self):
+        """Render every series in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                _, help_text = self.descriptions.get(name, ('counter', name))
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{self._format_labels(key)} {value}")
+            for name, series in sorted(self._gauges.items()):
+                _, help_text = self.descriptions.get(name, ('gauge', name))
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} gauge")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{self._format_labels(key)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                _, help_text = self.descriptions.get(name, ('histogram', name))
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, (bucket_counts, total, count) in sorted(series.items()):
+                    for bound, bucket_count in zip(self.buckets, bucket_counts):
+                        lines.append(f"{name}_bucket{self._format_labels(key, [('le', bound)])} {bucket_count}")
+                    lines.append(f"{name}_bucket{self._format_labels(key, [('le', '+Inf')])} {count}")
+                    lines.append(f"{name}_sum{self._format_labels(key)} {round(total, 6)}")
+                    lines.append(f"{name}_count{self._format_labels(key)} {count}")
+        return '\n'.join(lines) + '\n'
+
+metrics = MetricsRegistry()
+
+class RequestTimings:
+    """Per-request stage durations, summed across the threads working for the request"""
+    
     def __init__(self):
-        self.api_keys = [YOUTUBE_API_KEY_1, YOUTUBE_API_KEY_2]
-        self.channel_id = CHANNEL_ID
-        self.current_api_key_index = 0
+        self.stages = {}
+        self._lock = threading.Lock()
     
-    def get_current_api_key(self):
-        """Get the current API key"""
-        return self.api_keys[self.current_api_key_index]
+    def add(self, stage, seconds):
+        with self._lock:
+            total, count = self.stages.get(stage, (0.0, 0))
+            self.stages[stage] = (total + seconds, count + 1)
     
-    def switch_api_key(self):
-        """Switch to the next API key if rate limit or error occurs"""
-        self.current_api_key_index = (self.current_api_key_index + 1) % len(self.api_keys)
-        logger.info(f"Switched to API key {self.current_api_key_index + 1}")
-        return self.get_current_api_key()
+    def server_timing(self):
+        """Format the stages as a Server-Timing header value"""
+        with self._lock:
+            return ', '.join(
+                f'{stage};dur={total * 1000:.1f};desc="{count} call(s)"'
+                for stage, (total, count) in self.stages.items()
+            )
+
+current_timings = contextvars.ContextVar('current_timings', default=None)
+
+@contextmanager
+def timed(metric, timing_name=None, **labels):
+    """Time a block into a histogram and, inside a request, its Server-Timing breakdown"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.observe(metric, elapsed, **labels)
+        timings = current_timings.get()
+        if timings is not None and timing_name:
+            timings.add(timing_name, elapsed)
+
+def with_request_timings(fn):
+    """Wrap fn so pool threads record into the submitting request's timing breakdown"""
+    timings = current_timings.get()
     
-    def analyze_sentiment(self, text):
-        """Analyze sentiment of text using TextBlob"""
+    def run(*args, **kwargs):
+        token = current_timings.set(timings)
         try:
-            cleaned_text = re.sub(r'<[^>]+>', '', text)
-            cleaned_text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', cleaned_text)
-            cleaned_text = re.sub(r'[^\w\s]', '', cleaned_text)
+            return fn(*args, **kwargs)
+        finally:
+            current_timings.reset(token)
+    return run
+
+HTML_TAG_PATTERN = re.compile(r'<[^>]+>')
+URL_PATTERN = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+PUNCTUATION_PATTERN = re.compile(r'[^\w\s]')
+TERM_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+THEME_STOPWORDS = frozenset("""
+    about above after again against also another anyone anything because been before being below between both
+    cant could couldnt didnt does doesnt doing dont down during each even ever every from further gonna have
+    having here hers herself himself into isnt just know like make many more most much must only other ours
+    over really same should some still such than thank thanks that thats their theirs them then there these
+    they thing things think this those through under until very video videos want wasnt watch watching were
+    what when where which while whom will with would your youre yours
+""".split())
+
+def extract_terms(text):
+    """Distinct theme terms in a comment: unigrams and adjacent-word bigrams, stopwords dropped"""
+    text = URL_PATTERN.sub(' ', HTML_TAG_PATTERN.sub(' ', unescape(text or '')).lower())
+    terms = set()
+    previous = None
+    for token in TERM_PATTERN.findall(text):
+        token = token.replace("'", '')
+        if len(token) <= 3 or token in THEME_STOPWORDS or token.isdigit():
+            previous = None
+            continue
+        terms.add(token)
+        if previous is not None:
+            terms.add(f"{previous} {token}")
+        previous = token
+    return terms
+
+def rank_themes(term_counts, scope_total, baseline_counts, baseline_total, limit=5):
+    """Rank terms by TF-IDF against a baseline: count x log((N + 1) / (n + 1))
+    
+    term_counts are comment counts per term in the scope being described;
+    baseline_counts and baseline_total are the same for the baseline corpus
+    (the channel across all sentiments). Words already covered by a chosen
+    bigram, and bigrams repeating a chosen word, are skipped. Returns
+    (term, count, score) tuples.
+    """
+    min_count = 2 if scope_total >= 20 else 1
+    scored = sorted(
+        (
+            (term, count, count * math.log((baseline_total + 1) / (baseline_counts.get(term, count) + 1)))
+            for term, count in term_counts.items() if count >= min_count
+        ),
+        key=lambda item: (item[2], item[1]),
+        reverse=True
+    )
+    
+    themes = []
+    covered = set()
+    chosen_words = set()
+    for term, count, score in scored:
+        words = term.split(' ')
+        if term in covered or (len(words) > 1 and any(word in chosen_words for word in words)):
+            continue
+        themes.append((term, count, round(score, 3)))
+        covered.update(words)
+        if len(words) == 1:
+            chosen_words.add(term)
+        if len(themes) >= limit:
+            break
+    return themes
+
+SEARCH_TOKEN_PATTERN = re.compile(r'\w+')
+
+def search_match_query(text):
+    """FTS5 MATCH expression requiring every word of a free-text query, each matched as a prefix"""
+    tokens = SEARCH_TOKEN_PATTERN.findall((text or '').lower())[:SEARCH_MAX_TERMS]
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+def sentiment_label(polarity):
+    """Map a TextBlob polarity to a sentiment label"""
+    if polarity > 0.1:
+        return 'positive'
+    elif polarity < -0.1:
+        return 'negative'
+    else:
+        return 'neutral'
+
+def score_text(text):
+    """Clean text and return its TextBlob polarity (module level so process pools can pickle it)"""
+    try:
+        cleaned_text = HTML_TAG_PATTERN.sub('', text)
+        cleaned_text = URL_PATTERN.sub('', cleaned_text)
+        cleaned_text = PUNCTUATION_PATTERN.sub('', cleaned_text)
+        
+        if not cleaned_text.strip():
+            return 0.0
+        
+        return TextBlob(cleaned_text).sentiment.polarity
+    except Exception as e:
+        logger.error(f"Error analyzing sentiment: {e}")
+        return 0.0
+
+class SentimentEngine:
+    """Batch sentiment scorer with a content-hash LRU memo and an optional process pool"""
+    
+    def __init__(self, cache_size=SENTIMENT_CACHE_SIZE, processes=SENTIMENT_PROCESSES, pool_min_batch=SENTIMENT_POOL_MIN_BATCH):
+        self.cache_size = cache_size
+        self.processes = processes
+        self.pool_min_batch = pool_min_batch
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = None
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _digest(text):
+        return hashlib.blake2b(text.encode('utf-8', 'replace'), digest_size=16).digest()
+    
+    def _get_pool(self):
+        """Create the process pool on first use so forked workers each get their own"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.processes)
+        return self._pool
+    
+    def _score_many(self, texts):
+        """Score uncached texts, on the process pool when the batch is large enough"""
+        if self.processes > 0 and len(texts) >= self.pool_min_batch:
+            try:
+                chunksize = max(1, len(texts) // (self.processes * 4))
+                return list(self._get_pool().map(score_text, texts, chunksize=chunksize))
+            except Exception as e:
+                logger.error(f"Sentiment process pool failed, scoring in-process: {e}")
+                self._pool = None
+        return [score_text(text) for text in texts]
+    
+    def analyze_batch(self, texts):
+        """Return a (label, polarity) tuple for each text, scoring each distinct text at most once"""
+        with timed('sentiment_batch_duration_seconds', 'sentiment'):
+            return self._analyze_batch(texts)
+    
+    def _analyze_batch(self, texts):
+        digests = [self._digest(text) for text in texts]
+        polarities = [None] * len(texts)
+        pending = {}
+        
+        with self._lock:
+            for i, digest in enumerate(digests):
+                if digest in self._memo:
+                    self._memo.move_to_end(digest)
+                    polarities[i] = self._memo[digest]
+                    self.hits += 1
+                elif digest not in pending:
+                    pending[digest] = texts[i]
+                    self.misses += 1
+                else:
+                    self.hits += 1
+        
+        if pending:
+            metrics.inc('sentiment_texts_scored_total', len(pending))
+            scored = dict(zip(pending.keys(), self._score_many(list(pending.values()))))
+            with self._lock:
+                for digest, polarity in scored.items():
+                    self._memo[digest] = polarity
+                    self._memo.move_to_end(digest)
+                while len(self._memo) > self.cache_size:
+                    self._memo.popitem(last=False)
+            for i, digest in enumerate(digests):
+                if polarities[i] is None:
+                    polarities[i] = scored[digest]
+        
+        return [(sentiment_label(polarity), polarity) for polarity in polarities]
+    
+    def analyze(self, text):
+        """Return the (label, polarity) tuple for a single text"""
+        return self.analyze_batch([text])[0]
+    
+    def stats(self):
+        """Return memo cache counters"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._memo), 'max_entries': self.cache_size}
+
+sentiment_engine = SentimentEngine()
+
+# Sentiment codes stored by CommentBatch, indexed by label position
+SENTIMENTS = ('positive', 'negative', 'neutral')
+SENTIMENT_CODES = {label: code for code, label in enumerate(SENTIMENTS)}
+
+class CommentBatch:
+    """Columnar comments: one list or array per field instead of a dict per comment
+    
+    Video IDs and avatar URLs are interned into per-batch tables, likes live
+    in an int array and sentiments are one-byte codes. Dicts are only built
+    by to_dicts() when a response is serialized. Replies carry the id of
+    their top-level comment in parent_ids (None for top-level comments).
+    """
+    
+    __slots__ = ('authors', 'texts', 'dates', 'comment_ids', 'likes', 'sentiments', 'parent_ids',
+                 'video_index', 'video_ids', 'avatar_index', 'avatars', '_video_lookup', '_avatar_lookup')
+    
+    def __init__(self):
+        self.authors = []
+        self.texts = []
+        self.dates = []
+        self.comment_ids = []
+        self.likes = array('q')
+        self.sentiments = bytearray()
+        self.parent_ids = []
+        self.video_index = array('I')
+        self.video_ids = []
+        self.avatar_index = array('I')
+        self.avatars = []
+        self._video_lookup = {}
+        self._avatar_lookup = {}
+    
+    def __len__(self):
+        return len(self.texts)
+    
+    def __iter__(self):
+        return (self.comment(i) for i in range(len(self)))
+    
+    @staticmethod
+    def _intern(table, lookup, value):
+        index = lookup.get(value)
+        if index is None:
+            index = lookup[value] = len(table)
+            table.append(value)
+        return index
+    
+    def append(self, author, comment, date, like_count, sentiment, avatar_url, video_id, comment_id, parent_id=None):
+        """Add one comment"""
+        self.authors.append(author)
+        self.texts.append(comment)
+        self.dates.append(date)
+        self.comment_ids.append(comment_id)
+        self.likes.append(like_count or 0)
+        self.sentiments.append(SENTIMENT_CODES[sentiment])
+        self.parent_ids.append(parent_id)
+        self.video_index.append(self._intern(self.video_ids, self._video_lookup, video_id))
+        self.avatar_index.append(self._intern(self.avatars, self._avatar_lookup, avatar_url or ''))
+    
+    def extend(self, comments):
+        """Add comments from another CommentBatch or from comment dicts"""
+        if isinstance(comments, CommentBatch):
+            video_map = [self._intern(self.video_ids, self._video_lookup, video_id) for video_id in comments.video_ids]
+            avatar_map = [self._intern(self.avatars, self._avatar_lookup, avatar) for avatar in comments.avatars]
+            self.authors.extend(comments.authors)
+            self.texts.extend(comments.texts)
+            self.dates.extend(comments.dates)
+            self.comment_ids.extend(comments.comment_ids)
+            self.likes.extend(comments.likes)
+            self.sentiments.extend(comments.sentiments)
+            self.parent_ids.extend(comments.parent_ids)
+            self.video_index.extend(video_map[index] for index in comments.video_index)
+            self.avatar_index.extend(avatar_map[index] for index in comments.avatar_index)
+            return
+        for c in comments:
+            self.append(c['author'], c['comment'], c['date'], c['likeCount'], c['sentiment'],
+                        c.get('authorProfileImageUrl', ''), c['videoId'], c['commentId'], c.get('parentId'))
+    
+    @classmethod
+    def from_dicts(cls, comments):
+        batch = cls()
+        batch.extend(comments)
+        return batch
+    
+    def sentiment(self, index):
+        return SENTIMENTS[self.sentiments[index]]
+    
+    def video_id(self, index):
+        return self.video_ids[self.video_index[index]]
+    
+    def comment(self, index):
+        """Materialize one comment as the dict the API returns; replies also get parentId"""
+        comment = {
+            'author': self.authors[index],
+            'comment': self.texts[index],
+            'date': self.dates[index],
+            'likeCount': self.likes[index],
+            'sentiment': SENTIMENTS[self.sentiments[index]],
+            'authorProfileImageUrl': self.avatars[self.avatar_index[index]],
+            'videoId': self.video_ids[self.video_index[index]],
+            'commentId': self.comment_ids[index]
+        }
+        if self.parent_ids[index] is not None:
+            comment['parentId'] = self.parent_ids[index]
+        return comment
+    
+    def to_dicts(self, start=0, stop=None):
+        """Materialize comments start..stop as dicts"""
+        stop = len(self) if stop is None else stop
+        return [self.comment(i) for i in range(start, stop)]
+    
+    def sentiment_counts(self, start=0, stop=None):
+        """Count comments per sentiment label without materializing them"""
+        stop = len(self) if stop is None else stop
+        return {label: self.sentiments.count(code, start, stop) for code, label in enumerate(SENTIMENTS)}
+    
+    def total_likes(self, start=0, stop=None):
+        return sum(self.likes[start:stop])
+    
+    def reply_count(self, start=0, stop=None):
+        stop = len(self) if stop is None else stop
+        return stop - start - self.parent_ids[start:stop].count(None)
+    
+    def find(self, sentiment, start=0):
+        """Index of the next comment with sentiment at or after start, or -1"""
+        return self.sentiments.find(SENTIMENT_CODES[sentiment], start)
+    
+    def to_columns(self):
+        """JSON-friendly column form, used to store batches in the shared cache"""
+        return {
+            'author': self.authors,
+            'comment': self.texts,
+            'date': self.dates,
+            'commentId': self.comment_ids,
+            'likeCount': self.likes.tolist(),
+            'sentiment': list(self.sentiments),
+            'parentId': self.parent_ids,
+            'videoIndex': self.video_index.tolist(),
+            'videoIds': self.video_ids,
+            'avatarIndex': self.avatar_index.tolist(),
+            'avatars': self.avatars
+        }
+    
+    @classmethod
+    def from_columns(cls, columns):
+        batch = cls()
+        batch.authors = columns['author']
+        batch.texts = columns['comment']
+        batch.dates = columns['date']
+        batch.comment_ids = columns['commentId']
+        batch.likes = array('q', columns['likeCount'])
+        batch.sentiments = bytearray(columns['sentiment'])
+        batch.parent_ids = columns.get('parentId') or [None] * len(batch.texts)
+        batch.video_index = array('I', columns['videoIndex'])
+        batch.video_ids = columns['videoIds']
+        batch.avatar_index = array('I', columns['avatarIndex'])
+        batch.avatars = columns['avatars']
+        batch._video_lookup = {video_id: i for i, video_id in enumerate(batch.video_ids)}
+        batch._avatar_lookup = {avatar: i for i, avatar in enumerate(batch.avatars)}
+        return batch
+
+def encode_cached(value):
+    """json.dumps default hook storing CommentBatch values by column"""
+    if isinstance(value, CommentBatch):
+        return {'__comment_batch__': value.to_columns()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def decode_cached(obj):
+    """json.loads object hook restoring CommentBatch values"""
+    if '__comment_batch__' in obj:
+        return CommentBatch.from_columns(obj['__comment_batch__'])
+    return obj
+
+class SQLiteDatabase:
+    """Base for stores kept in a SQLite file shared by every worker process"""
+    
+    def __init__(self, db_path):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._init_db()
+    
+    def _init_db(self):
+        """Create the store's tables if they do not exist"""
+    
+    @contextmanager
+    def _connect(self):
+        """Open a committed-on-exit connection; WAL mode lets readers and a writer work concurrently"""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+class SharedCache(SQLiteDatabase):
+    """TTL cache stored in SQLite so every worker process reads and writes the same copy"""
+    
+    def __init__(self, db_path=CACHE_DB_PATH, ttl_seconds=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        super().__init__(db_path)
+    
+    def _init_db(self):
+        """Create the cache tables if they do not exist"""
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache_entries ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                'created_at REAL NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE TABLE IF NOT EXISTS cache_stats (name TEXT PRIMARY KEY, count INTEGER NOT NULL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS cache_locks (name TEXT PRIMARY KEY, expires_at REAL NOT NULL)')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS quota_buckets ('
+                'name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, spent INTEGER NOT NULL DEFAULT 0)'
+            )
+            conn.execute("INSERT OR IGNORE INTO cache_stats (name, count) VALUES ('hits', 0), ('misses', 0), ('evictions', 0)")
+    
+    def _bump(self, conn, name, amount=1):
+        conn.execute('UPDATE cache_stats SET count = count + ? WHERE name = ?', (amount, name))
+    
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired"""
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+    
+    def get_entry(self, key):
+        """Return (value, created_at) for key, or None if missing or expired"""
+        try:
+            now = time.time()
+            with self._connect() as conn:
+                row = conn.execute('SELECT value, expires_at, created_at FROM cache_entries WHERE key = ?', (key,)).fetchone()
+                if row is None or row[1] <= now:
+                    self._bump(conn, 'misses')
+                    return None
+                conn.execute('UPDATE cache_entries SET accessed_at = ? WHERE key = ?', (now, key))
+                self._bump(conn, 'hits')
+                return json.loads(row[0], object_hook=decode_cached), row[2]
+        except sqlite3.Error as e:
+            logger.error(f"Error reading cache key {key}: {e}")
+            return None
+    
+    def get_created_at(self, key):
+        """Return created_at for key without reading its value, or None if missing or expired"""
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    'SELECT created_at FROM cache_entries WHERE key = ? AND expires_at > ?', (key, time.time())
+                ).fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            logger.error(f"Error reading cache key {key}: {e}")
+            return None
+    
+    def try_lock(self, name, ttl_seconds):
+        """Take a cross-process lock that expires on its own after ttl_seconds"""
+        try:
+            now = time.time()
+            with self._connect() as conn:
+                conn.execute('DELETE FROM cache_locks WHERE name = ? AND expires_at <= ?', (name, now))
+                return conn.execute(
+                    'INSERT OR IGNORE INTO cache_locks (name, expires_at) VALUES (?, ?)', (name, now + ttl_seconds)
+                ).rowcount == 1
+        except sqlite3.Error as e:
+            logger.error(f"Error taking cache lock {name}: {e}")
+            return False
+    
+    def release_lock(self, name):
+        """Release a lock taken with try_lock"""
+        try:
+            with self._connect() as conn:
+                conn.execute('DELETE FROM cache_locks WHERE name = ?', (name,))
+        except sqlite3.Error as e:
+            logger.error(f"Error releasing cache lock {name}: {e}")
+    
+    @staticmethod
+    def _bucket_levels(conn, names, capacity, refill_per_second, now):
+        """{name: (tokens, spent)} for token buckets refilled up to now; unknown buckets are full"""
+        rows = conn.execute(
+            f"SELECT name, tokens, updated_at, spent FROM quota_buckets WHERE name IN ({','.join('?' * len(names))})", list(names)
+        ).fetchall()
+        levels = {name: (capacity, 0) for name in names}
+        for name, tokens, updated_at, spent in rows:
+            levels[name] = (min(capacity, tokens + max(0.0, now - updated_at) * refill_per_second), spent)
+        return levels
+    
+    def take_tokens(self, names, cost, capacity, refill_per_second):
+        """Charge cost to the fullest of the named token buckets; returns its name, or None when none has cost left
+        
+        The read and the charge share one write transaction, so concurrent
+        processes never spend the same tokens. Raises sqlite3.Error.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            levels = self._bucket_levels(conn, names, capacity, refill_per_second, now)
+            name = max(names, key=lambda n: levels[n][0])
+            if levels[name][0] < cost:
+                return None
+            conn.execute(
+                'INSERT INTO quota_buckets (name, tokens, updated_at, spent) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(name) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at, '
+                'spent = spent + excluded.spent',
+                (name, levels[name][0] - cost, now, cost)
+            )
+            return name
+    
+    def refund_tokens(self, name, cost, capacity, refill_per_second):
+        """Give back tokens taken with take_tokens for a call that was never made. Raises sqlite3.Error"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            tokens, spent = self._bucket_levels(conn, [name], capacity, refill_per_second, now)[name]
+            conn.execute(
+                'INSERT OR REPLACE INTO quota_buckets (name, tokens, updated_at, spent) VALUES (?, ?, ?, ?)',
+                (name, min(capacity, tokens + cost), now, max(0, spent - cost))
+            )
+    
+    def drain_tokens(self, name):
+        """Empty a token bucket; it refills from zero. Raises sqlite3.Error"""
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO quota_buckets (name, tokens, updated_at) VALUES (?, 0, ?) '
+                'ON CONFLICT(name) DO UPDATE SET tokens = 0, updated_at = excluded.updated_at',
+                (name, time.time())
+            )
+    
+    def token_levels(self, names, capacity, refill_per_second):
+        """{name: (tokens, spent)} for the named token buckets. Raises sqlite3.Error"""
+        with self._connect() as conn:
+            return self._bucket_levels(conn, names, capacity, refill_per_second, time.time())
+    
+    def set(self, key, value, ttl_seconds=None):
+        """Store value under key, evict expired or least recently used entries and return its created_at"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        try:
+            now = time.time()
+            payload = json.dumps(value, default=encode_cached)
+            with self._connect() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO cache_entries (key, value, created_at, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)',
+                    (key, payload, now, now + ttl, now)
+                )
+                evicted = conn.execute('DELETE FROM cache_entries WHERE expires_at <= ?', (now,)).rowcount
+                evicted += conn.execute(
+                    'DELETE FROM cache_entries WHERE key IN ('
+                    'SELECT key FROM cache_entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+                    (self.max_entries,)
+                ).rowcount
+                if evicted:
+                    self._bump(conn, 'evictions', evicted)
+            return now
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.error(f"Error writing cache key {key}: {e}")
+            return None
+    
+    def clear(self):
+        """Remove all cached entries (stats are kept)"""
+        try:
+            with self._connect() as conn:
+                conn.execute('DELETE FROM cache_entries')
+        except sqlite3.Error as e:
+            logger.error(f"Error clearing cache: {e}")
+    
+    def stats(self):
+        """Return hit/miss counters and current size"""
+        try:
+            with self._connect() as conn:
+                counts = dict(conn.execute('SELECT name, count FROM cache_stats').fetchall())
+                entries = conn.execute('SELECT COUNT(*) FROM cache_entries WHERE expires_at > ?', (time.time(),)).fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"Error reading cache stats: {e}")
+            return {'error': str(e)}
+        
+        lookups = counts.get('hits', 0) + counts.get('misses', 0)
+        return {
+            'hits': counts.get('hits', 0),
+            'misses': counts.get('misses', 0),
+            'evictions': counts.get('evictions', 0),
+            'hit_rate': round(counts.get('hits', 0) / lookups, 4) if lookups else 0,
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds
+        }
+
+class CommentStore(SQLiteDatabase):
+    """Persistent store of videos and scored comments, keyed by videoId and comment id"""
+    
+    def __init__(self, db_path=COMMENT_STORE_PATH):
+        super().__init__(db_path)
+    
+    def _init_db(self):
+        """Create the video, comment and sync-state tables if they do not exist"""
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS videos ('
+                'video_id TEXT PRIMARY KEY, channel_id TEXT, title TEXT NOT NULL, published_at TEXT NOT NULL, '
+                'description TEXT, thumbnail TEXT, synced_at REAL, synced_depth INTEGER NOT NULL DEFAULT 0)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_videos_channel ON videos (channel_id, published_at)')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS comments ('
+                'comment_id TEXT PRIMARY KEY, video_id TEXT NOT NULL, author TEXT, comment TEXT, date TEXT NOT NULL, '
+                'like_count INTEGER NOT NULL DEFAULT 0, sentiment TEXT NOT NULL, author_profile_image_url TEXT)'
+            )
+            columns = [r[1] for r in conn.execute('PRAGMA table_info(comments)').fetchall()]
+            if 'parent_id' not in columns:
+                conn.execute('ALTER TABLE comments ADD COLUMN parent_id TEXT')
+            if 'updated_seq' not in columns:
+                conn.execute('ALTER TABLE comments ADD COLUMN updated_seq INTEGER NOT NULL DEFAULT 0')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_comments_updated ON comments (updated_seq)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_comments_video_date ON comments (video_id, date)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_comments_parent ON comments (parent_id) WHERE parent_id IS NOT NULL')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_comments_sentiment_date ON comments (sentiment, date)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_comments_sentiment_likes ON comments (sentiment, like_count)')
+            conn.execute(
+                'CREATE VIRTUAL TABLE IF NOT EXISTS comment_search USING fts5('
+                "comment, author, content='comments', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2')"
+            )
+            conn.execute('CREATE TABLE IF NOT EXISTS sync_state (name TEXT PRIMARY KEY, synced_at REAL NOT NULL, depth INTEGER NOT NULL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS store_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+            conn.execute("INSERT OR IGNORE INTO store_meta (name, value) VALUES ('change_seq', 0), ('channel_index_version', 0)")
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS daily_rollups ('
+                'video_id TEXT NOT NULL, day TEXT NOT NULL, sentiment TEXT NOT NULL, '
+                'comment_count INTEGER NOT NULL DEFAULT 0, like_total INTEGER NOT NULL DEFAULT 0, '
+                'PRIMARY KEY (video_id, day, sentiment))'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS reply_rollups ('
+                'video_id TEXT NOT NULL, day TEXT NOT NULL, sentiment TEXT NOT NULL, '
+                'comment_count INTEGER NOT NULL DEFAULT 0, like_total INTEGER NOT NULL DEFAULT 0, '
+                'PRIMARY KEY (video_id, day, sentiment))'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS channel_rollups ('
+                'channel_id TEXT NOT NULL, day TEXT NOT NULL, sentiment TEXT NOT NULL, is_reply INTEGER NOT NULL, '
+                'comment_count INTEGER NOT NULL DEFAULT 0, like_total INTEGER NOT NULL DEFAULT 0, '
+                'PRIMARY KEY (channel_id, day, sentiment, is_reply))'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS backfill_state ('
+                'channel_id TEXT PRIMARY KEY, playlist_id TEXT, page_token TEXT, until TEXT, status TEXT NOT NULL, '
+                'pages INTEGER NOT NULL DEFAULT 0, videos INTEGER NOT NULL DEFAULT 0, comments INTEGER NOT NULL DEFAULT 0, '
+                'oldest_published TEXT, error TEXT, started_at REAL NOT NULL, updated_at REAL NOT NULL)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS term_counts ('
+                'scope TEXT NOT NULL, sentiment TEXT NOT NULL, term TEXT NOT NULL, count INTEGER NOT NULL, '
+                'PRIMARY KEY (scope, sentiment, term))'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_term_counts_top ON term_counts (scope, sentiment, count)')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS term_totals ('
+                'scope TEXT NOT NULL, sentiment TEXT NOT NULL, comments INTEGER NOT NULL, PRIMARY KEY (scope, sentiment))'
+            )
+            has_rollups = conn.execute('SELECT 1 FROM daily_rollups LIMIT 1').fetchone()
+            has_comments = conn.execute('SELECT 1 FROM comments LIMIT 1').fetchone()
+            if has_comments and not has_rollups:
+                logger.info("Rebuilding daily rollups from stored comments")
+                for table, condition in (('daily_rollups', 'parent_id IS NULL'), ('reply_rollups', 'parent_id IS NOT NULL')):
+                    conn.execute(
+                        f"INSERT INTO {table} (video_id, day, sentiment, comment_count, like_total) "
+                        'SELECT video_id, substr(date, 1, 10), sentiment, COUNT(*), SUM(like_count) '
+                        f"FROM comments WHERE {condition} GROUP BY video_id, substr(date, 1, 10), sentiment"
+                    )
+            has_terms = conn.execute('SELECT 1 FROM term_totals LIMIT 1').fetchone()
+            if has_comments and not has_terms:
+                logger.info("Rebuilding term index from stored comments")
+                rows = conn.execute('SELECT video_id, sentiment, comment FROM comments').fetchall()
+                self._apply_term_deltas(conn, *self._term_deltas(conn, [], rows))
+            channel_index_version = conn.execute("SELECT value FROM store_meta WHERE name = 'channel_index_version'").fetchone()[0]
+            if has_comments and channel_index_version < CHANNEL_INDEX_VERSION:
+                # Earlier versions left out comments saved before their video's channel was known
+                logger.info("Rebuilding channel rollups and channel term index from stored comments")
+                conn.execute('DELETE FROM channel_rollups')
+                for table, is_reply in (('daily_rollups', 0), ('reply_rollups', 1)):
+                    conn.execute(
+                        'INSERT INTO channel_rollups (channel_id, day, sentiment, is_reply, comment_count, like_total) '
+                        f"SELECT v.channel_id, r.day, r.sentiment, {is_reply}, SUM(r.comment_count), SUM(r.like_total) "
+                        f"FROM {table} r JOIN videos v ON v.video_id = r.video_id WHERE v.channel_id IS NOT NULL "
+                        'GROUP BY v.channel_id, r.day, r.sentiment'
+                    )
+                conn.execute("DELETE FROM term_counts WHERE scope LIKE 'channel:%'")
+                conn.execute("DELETE FROM term_totals WHERE scope LIKE 'channel:%'")
+                rows = conn.execute(
+                    'SELECT v.channel_id, c.sentiment, c.comment FROM comments c JOIN videos v ON v.video_id = c.video_id '
+                    'WHERE v.channel_id IS NOT NULL'
+                ).fetchall()
+                self._apply_term_deltas(conn, *self._channel_term_deltas(
+                    [(channel_id, 1, sentiment, text) for channel_id, sentiment, text in rows]
+                ))
+            conn.execute("UPDATE store_meta SET value = ? WHERE name = 'channel_index_version'", (CHANNEL_INDEX_VERSION,))
+            has_search = conn.execute('SELECT 1 FROM comment_search_docsize LIMIT 1').fetchone()
+            if has_comments and not has_search:
+                logger.info("Rebuilding comment search index from stored comments")
+                conn.execute("INSERT INTO comment_search (comment_search) VALUES ('rebuild')")
+    
+    def save_videos(self, channel_id, videos):
+        """Insert or update video metadata without touching sync bookkeeping
+        
+        Comments stored before their video's channel was known (or under
+        another channel) are moved into the channel's rollups and term index.
+        """
+        with self._connect() as conn:
+            # Take the write lock before reading the current channels so a concurrent save cannot slip in between
+            conn.execute('BEGIN IMMEDIATE')
+            previous = self._video_channels(conn, [v['videoId'] for v in videos])
+            moved = {v['videoId']: previous.get(v['videoId']) for v in videos if previous.get(v['videoId']) != channel_id}
+            if moved:
+                self._move_channel_indexes(conn, moved, channel_id)
+            conn.executemany(
+                'INSERT INTO videos (video_id, channel_id, title, published_at, description, thumbnail) VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(video_id) DO UPDATE SET channel_id = excluded.channel_id, title = excluded.title, '
+                'published_at = excluded.published_at, description = excluded.description, thumbnail = excluded.thumbnail',
+                [(v['videoId'], channel_id, v['title'], v['publishedAt'], v.get('description', ''), v.get('thumbnail', '')) for v in videos]
+            )
+    
+    def save_comments(self, comments):
+        """Insert or update scored comments and apply their deltas to the rollups, term and search indexes
+        
+        Replies (comments with a parentId) are rolled up separately so
+        aggregates can include or exclude them. Each call takes the next
+        change sequence number; new comments and ones whose text, likes or
+        sentiment changed are stamped with it for delta reads. A comment id
+        repeated within one call is saved once, from its last occurrence.
+        """
+        if not comments:
+            return
+        comments = list({c['commentId']: c for c in comments}.values())
+        
+        deltas = {'daily_rollups': {}, 'reply_rollups': {}}
+        def add_delta(video_id, date, sentiment, like_count, parent_id, sign):
+            table = deltas['reply_rollups' if parent_id else 'daily_rollups']
+            key = (video_id, date[:10], sentiment)
+            count, likes = table.get(key, (0, 0))
+            table[key] = (count + sign, likes + sign * (like_count or 0))
+        
+        with self._connect() as conn:
+            # Taking the write lock first also keeps concurrent saves from reading stale rows
+            conn.execute("UPDATE store_meta SET value = value + 1 WHERE name = 'change_seq'")
+            seq = conn.execute("SELECT value FROM store_meta WHERE name = 'change_seq'").fetchone()[0]
+            ids = [c['commentId'] for c in comments]
+            replaced = []
+            unindexed = []
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                rows = conn.execute(
+                    'SELECT video_id, date, sentiment, like_count, comment, rowid, author, parent_id '
+                    f"FROM comments WHERE comment_id IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for video_id, date, sentiment, like_count, text, rowid, author, parent_id in rows:
+                    add_delta(video_id, date, sentiment, like_count, parent_id, -1)
+                    replaced.append((video_id, sentiment, text))
+                    unindexed.append((rowid, text, author))
+            for c in comments:
+                add_delta(c['videoId'], c['date'], c['sentiment'], c['likeCount'], c.get('parentId'), 1)
+            self._apply_term_deltas(conn, *self._term_deltas(
+                conn, replaced, [(c['videoId'], c['sentiment'], c['comment']) for c in comments]
+            ))
             
-            if not cleaned_text.strip():
-                return 'neutral'
+            channel_deltas = {}
+            video_channels = self._video_channels(conn, {key[0] for table_deltas in deltas.values() for key in table_deltas})
+            for table, table_deltas in deltas.items():
+                conn.executemany(
+                    f"INSERT INTO {table} (video_id, day, sentiment, comment_count, like_total) VALUES (?, ?, ?, ?, ?) "
+                    'ON CONFLICT(video_id, day, sentiment) DO UPDATE SET '
+                    'comment_count = comment_count + excluded.comment_count, like_total = like_total + excluded.like_total',
+                    [(key[0], key[1], key[2], count, likes) for key, (count, likes) in table_deltas.items() if count or likes]
+                )
+                for (video_id, day, sentiment), (count, likes) in table_deltas.items():
+                    if video_channels.get(video_id):
+                        key = (video_channels[video_id], day, sentiment, int(table == 'reply_rollups'))
+                        total_count, total_likes = channel_deltas.get(key, (0, 0))
+                        channel_deltas[key] = (total_count + count, total_likes + likes)
+            self._apply_channel_deltas(conn, channel_deltas)
+            # Upsert rather than replace so a comment keeps its rowid, which the search index is keyed on
+            conn.executemany(
+                "INSERT INTO comment_search (comment_search, rowid, comment, author) VALUES ('delete', ?, ?, ?)", unindexed
+            )
+            conn.executemany(
+                'INSERT INTO comments (comment_id, video_id, author, comment, date, like_count, sentiment, author_profile_image_url, '
+                'parent_id, updated_seq) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(comment_id) DO UPDATE SET '
+                'updated_seq = CASE WHEN comment IS NOT excluded.comment OR like_count != excluded.like_count '
+                'OR sentiment != excluded.sentiment OR author IS NOT excluded.author THEN excluded.updated_seq ELSE updated_seq END, '
+                'video_id = excluded.video_id, author = excluded.author, comment = excluded.comment, date = excluded.date, '
+                'like_count = excluded.like_count, sentiment = excluded.sentiment, '
+                'author_profile_image_url = excluded.author_profile_image_url, parent_id = excluded.parent_id',
+                [(c['commentId'], c['videoId'], c['author'], c['comment'], c['date'], c['likeCount'], c['sentiment'],
+                  c['authorProfileImageUrl'], c.get('parentId'), seq) for c in comments]
+            )
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                conn.execute(
+                    'INSERT INTO comment_search (rowid, comment, author) SELECT rowid, comment, author FROM comments '
+                    f"WHERE comment_id IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+    
+    def _term_deltas(self, conn, removed, added):
+        """Term index changes for (video_id, sentiment, text) rows leaving and entering the store
+        
+        Each comment counts once per term in its video's scope and, when the
+        video's channel is known, in the channel's scope.
+        """
+        channels = self._video_channels(conn, {video_id for video_id, _, _ in removed} | {video_id for video_id, _, _ in added})
+        
+        counts = {}
+        totals = {}
+        for sign, rows in ((-1, removed), (1, added)):
+            for video_id, sentiment, text in rows:
+                scopes = [f"video:{video_id}"]
+                if channels.get(video_id):
+                    scopes.append(f"channel:{channels[video_id]}")
+                terms = extract_terms(text)
+                for scope in scopes:
+                    totals[(scope, sentiment)] = totals.get((scope, sentiment), 0) + sign
+                    for term in terms:
+                        counts[(scope, sentiment, term)] = counts.get((scope, sentiment, term), 0) + sign
+        return counts, totals
+    
+    def _move_channel_indexes(self, conn, old_channels, channel_id):
+        """Move the stored comments of {video_id: old channel or None} videos to channel_id's rollups and term index"""
+        video_ids = list(old_channels)
+        channel_deltas = {}
+        term_rows = []
+        for i in range(0, len(video_ids), 500):
+            chunk = video_ids[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            for table, is_reply in (('daily_rollups', 0), ('reply_rollups', 1)):
+                rows = conn.execute(
+                    f"SELECT video_id, day, sentiment, comment_count, like_total FROM {table} WHERE video_id IN ({placeholders})", chunk
+                ).fetchall()
+                for video_id, day, sentiment, count, likes in rows:
+                    for owner, sign in ((old_channels[video_id], -1), (channel_id, 1)):
+                        if owner:
+                            key = (owner, day, sentiment, is_reply)
+                            total_count, total_likes = channel_deltas.get(key, (0, 0))
+                            channel_deltas[key] = (total_count + sign * count, total_likes + sign * likes)
+            rows = conn.execute(f"SELECT video_id, sentiment, comment FROM comments WHERE video_id IN ({placeholders})", chunk).fetchall()
+            for video_id, sentiment, text in rows:
+                for owner, sign in ((old_channels[video_id], -1), (channel_id, 1)):
+                    if owner:
+                        term_rows.append((owner, sign, sentiment, text))
+        self._apply_channel_deltas(conn, channel_deltas)
+        self._apply_term_deltas(conn, *self._channel_term_deltas(term_rows))
+    
+    @staticmethod
+    def _apply_channel_deltas(conn, channel_deltas):
+        """Add {(channel_id, day, sentiment, is_reply): (count, likes)} deltas to the channel rollups"""
+        conn.executemany(
+            'INSERT INTO channel_rollups (channel_id, day, sentiment, is_reply, comment_count, like_total) VALUES (?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT(channel_id, day, sentiment, is_reply) DO UPDATE SET '
+            'comment_count = comment_count + excluded.comment_count, like_total = like_total + excluded.like_total',
+            [key + (count, likes) for key, (count, likes) in channel_deltas.items() if count or likes]
+        )
+    
+    @staticmethod
+    def _channel_term_deltas(rows):
+        """Term index changes for (channel_id, sign, sentiment, text) rows in channel scopes"""
+        counts = {}
+        totals = {}
+        for channel_id, sign, sentiment, text in rows:
+            scope = f"channel:{channel_id}"
+            totals[(scope, sentiment)] = totals.get((scope, sentiment), 0) + sign
+            for term in extract_terms(text):
+                counts[(scope, sentiment, term)] = counts.get((scope, sentiment, term), 0) + sign
+        return counts, totals
+    
+    @staticmethod
+    def _video_channels(conn, video_ids):
+        """{video_id: channel_id} for stored videos among video_ids"""
+        video_ids = list(video_ids)
+        channels = {}
+        for i in range(0, len(video_ids), 500):
+            chunk = video_ids[i:i + 500]
+            channels.update(conn.execute(
+                f"SELECT video_id, channel_id FROM videos WHERE video_id IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall())
+        return channels
+    
+    def _apply_term_deltas(self, conn, counts, totals):
+        """Add term index deltas, dropping terms whose count falls to zero"""
+        conn.executemany(
+            'INSERT INTO term_counts (scope, sentiment, term, count) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT(scope, sentiment, term) DO UPDATE SET count = count + excluded.count',
+            [key + (delta,) for key, delta in counts.items() if delta]
+        )
+        conn.executemany(
+            'DELETE FROM term_counts WHERE scope = ? AND sentiment = ? AND term = ? AND count <= 0',
+            [key for key, delta in counts.items() if delta < 0]
+        )
+        conn.executemany(
+            'INSERT INTO term_totals (scope, sentiment, comments) VALUES (?, ?, ?) '
+            'ON CONFLICT(scope, sentiment) DO UPDATE SET comments = comments + excluded.comments',
+            [key + (delta,) for key, delta in totals.items() if delta]
+        )
+    
+    def get_themes(self, sentiment, video_id=None, channel_id=None, limit=5, candidates=200):
+        """Most distinctive terms in a video's or channel's comments of one sentiment
+        
+        Reads the top candidates by count from the term index and weighs them
+        against the channel across all sentiments (or the video itself when
+        its channel is unknown), so cost does not grow with comment volume.
+        Returns (term, count, score) tuples.
+        """
+        scope = f"video:{video_id}" if video_id else f"channel:{channel_id}"
+        with self._connect() as conn:
+            baseline = scope
+            if video_id:
+                row = conn.execute('SELECT channel_id FROM videos WHERE video_id = ?', (video_id,)).fetchone()
+                if row and row[0]:
+                    baseline = f"channel:{row[0]}"
             
-            blob = TextBlob(cleaned_text)
-            polarity = blob.sentiment.polarity
+            term_counts = dict(conn.execute(
+                'SELECT term, count FROM term_counts WHERE scope = ? AND sentiment = ? ORDER BY count DESC LIMIT ?',
+                (scope, sentiment, candidates)
+            ).fetchall())
+            if not term_counts:
+                return []
+            scope_total = conn.execute(
+                'SELECT comments FROM term_totals WHERE scope = ? AND sentiment = ?', (scope, sentiment)
+            ).fetchone()
+            baseline_total = conn.execute('SELECT SUM(comments) FROM term_totals WHERE scope = ?', (baseline,)).fetchone()
+            terms = list(term_counts)
+            baseline_counts = dict(conn.execute(
+                f"SELECT term, SUM(count) FROM term_counts WHERE scope = ? AND sentiment IN ('positive', 'negative', 'neutral') "
+                f"AND term IN ({','.join('?' * len(terms))}) GROUP BY term",
+                [baseline] + terms
+            ).fetchall())
+        
+        return rank_themes(term_counts, scope_total[0] if scope_total else 0, baseline_counts,
+                           baseline_total[0] or 0, limit)
+    
+    def get_videos(self, channel_id, limit, published_after=None, published_before=None):
+        """Get the most recent stored videos for a channel"""
+        query = 'SELECT video_id, title, published_at, description, thumbnail FROM videos WHERE channel_id = ?'
+        args = [channel_id]
+        if published_after:
+            query += ' AND published_at >= ?'
+            args.append(published_after)
+        if published_before:
+            query += ' AND published_at < ?'
+            args.append(published_before)
+        query += ' ORDER BY published_at DESC, rowid ASC LIMIT ?'
+        args.append(limit)
+        with self._connect() as conn:
+            rows = conn.execute(query, args).fetchall()
+        return [
+            {'videoId': r[0], 'title': r[1], 'publishedAt': r[2], 'description': r[3] or '', 'thumbnail': r[4] or ''}
+            for r in rows
+        ]
+    
+    def get_comments(self, video_id, limit, include_replies=False):
+        """Get the newest stored top-level comments for a video as a CommentBatch, newest first
+        
+        With include_replies, the stored replies to those comments follow them.
+        """
+        columns = 'comment_id, author, comment, date, like_count, sentiment, author_profile_image_url, parent_id'
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {columns} FROM comments WHERE video_id = ? AND parent_id IS NULL ORDER BY date DESC LIMIT ?",
+                (video_id, limit)
+            ).fetchall()
+            if include_replies and rows:
+                parent_ids = [r[0] for r in rows]
+                rows += conn.execute(
+                    f"SELECT {columns} FROM comments WHERE parent_id IN ({','.join('?' * len(parent_ids))}) ORDER BY date DESC",
+                    parent_ids
+                ).fetchall()
+        batch = CommentBatch()
+        for r in rows:
+            batch.append(r[1], r[2], r[3], r[4], r[5], r[6], video_id, r[0], r[7])
+        return batch
+    
+    def search_comments(self, match=None, sentiment=None, video_id=None, channel_id=None, date_from=None, date_to=None,
+                        sort='date', limit=20, offset=0):
+        """Page of stored comments matching an FTS5 expression and filters
+        
+        Returns (CommentBatch, sentiment_counts); the counts cover every match
+        across sentiments so filter buttons can show totals without a refetch.
+        date_to is exclusive.
+        """
+        source = 'comments c'
+        where = []
+        args = []
+        if match:
+            source = 'comment_search JOIN comments c ON c.rowid = comment_search.rowid'
+            where.append('comment_search MATCH ?')
+            args.append(match)
+        if video_id:
+            where.append('c.video_id = ?')
+            args.append(video_id)
+        if channel_id:
+            where.append('c.video_id IN (SELECT video_id FROM videos WHERE channel_id = ?)')
+            args.append(channel_id)
+        if date_from:
+            where.append('c.date >= ?')
+            args.append(date_from)
+        if date_to:
+            where.append('c.date < ?')
+            args.append(date_to)
+        
+        order = {
+            'date': 'c.date DESC',
+            'likes': 'c.like_count DESC, c.date DESC',
+            'relevance': 'comment_search.rank, c.date DESC' if match else 'c.date DESC'
+        }[sort]
+        conditions = ' AND '.join(where) or '1'
+        page_conditions = conditions
+        page_args = list(args)
+        if sentiment:
+            page_conditions += ' AND c.sentiment = ?'
+            page_args.append(sentiment)
+        
+        with self._connect() as conn:
+            counts = dict(conn.execute(
+                f"SELECT c.sentiment, COUNT(*) FROM {source} WHERE {conditions} GROUP BY c.sentiment", args
+            ).fetchall())
+            rows = conn.execute(
+                'SELECT c.comment_id, c.author, c.comment, c.date, c.like_count, c.sentiment, c.author_profile_image_url, c.video_id '
+                f"FROM {source} WHERE {page_conditions} ORDER BY {order} LIMIT ? OFFSET ?",
+                page_args + [limit, offset]
+            ).fetchall()
+        
+        batch = CommentBatch()
+        for r in rows:
+            batch.append(r[1], r[2], r[3], r[4], r[5], r[6], r[7], r[0])
+        return batch, {name: counts.get(name, 0) for name in SENTIMENTS}
+    
+    def get_rollup_aggregates(self, video_ids, max_days=30, include_replies=False, changed_since=None):
+        """Aggregate daily rollups for a set of videos; cost scales with days, not comments
+        
+        With changed_since (a change sequence number), by_day holds only the
+        days that have comments saved or changed after it.
+        """
+        if not video_ids:
+            return {'per_video': {}, 'by_day': {}, 'sentiment_counts': {'positive': 0, 'negative': 0, 'neutral': 0}, 'total_likes': 0}
+        
+        placeholders = ','.join('?' * len(video_ids))
+        rollups = '(SELECT * FROM daily_rollups UNION ALL SELECT * FROM reply_rollups)' if include_replies else 'daily_rollups'
+        with self._connect() as conn:
+            per_video = dict(conn.execute(
+                f'SELECT video_id, SUM(comment_count) FROM {rollups} WHERE video_id IN ({placeholders}) GROUP BY video_id',
+                video_ids
+            ).fetchall())
+            totals = conn.execute(
+                f'SELECT sentiment, SUM(comment_count), SUM(like_total) FROM {rollups} WHERE video_id IN ({placeholders}) GROUP BY sentiment',
+                video_ids
+            ).fetchall()
+            if changed_since is None:
+                days = f'SELECT DISTINCT day FROM {rollups} WHERE video_id IN ({placeholders}) AND comment_count > 0 ORDER BY day DESC LIMIT ?'
+                day_args = list(video_ids) + [max_days]
+            else:
+                days = (
+                    f'SELECT DISTINCT substr(date, 1, 10) FROM comments WHERE updated_seq > ? AND video_id IN ({placeholders})'
+                    + ('' if include_replies else ' AND parent_id IS NULL')
+                )
+                day_args = [changed_since] + list(video_ids)
+            day_rows = conn.execute(
+                f'SELECT day, sentiment, SUM(comment_count) FROM {rollups} '
+                f'WHERE video_id IN ({placeholders}) AND day IN ({days}) GROUP BY day, sentiment',
+                list(video_ids) + day_args
+            ).fetchall()
+        
+        sentiment_counts = {'positive': 0, 'negative': 0, 'neutral': 0}
+        total_likes = 0
+        for sentiment, count, likes in totals:
+            sentiment_counts[sentiment] = sentiment_counts.get(sentiment, 0) + (count or 0)
+            total_likes += likes or 0
+        
+        by_day = {}
+        for day, sentiment, count in day_rows:
+            by_day.setdefault(day, {'positive': 0, 'negative': 0, 'neutral': 0})[sentiment] += count or 0
+        
+        return {'per_video': per_video, 'by_day': by_day, 'sentiment_counts': sentiment_counts, 'total_likes': total_likes}
+    
+    def get_changed_comments(self, video_ids, changed_since, limit, include_replies=False):
+        """Comments saved or changed after a change sequence number, newest first, at most limit per video
+        
+        Returns {video_id: CommentBatch}; videos without changes are left out.
+        """
+        if not video_ids:
+            return {}
+        columns = 'comment_id, author, comment, date, like_count, sentiment, author_profile_image_url, parent_id, video_id'
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {columns} FROM comments WHERE updated_seq > ? AND video_id IN ({','.join('?' * len(video_ids))})"
+                + ('' if include_replies else ' AND parent_id IS NULL') + ' ORDER BY date DESC',
+                [changed_since] + list(video_ids)
+            ).fetchall()
+        
+        changed = {}
+        for r in rows:
+            batch = changed.setdefault(r[8], CommentBatch())
+            if len(batch) < limit:
+                batch.append(r[1], r[2], r[3], r[4], r[5], r[6], r[8], r[0], r[7])
+        return changed
+    
+    def get_window_aggregates(self, channel_id, start_day, end_day, bucket='day', include_replies=False):
+        """Sum a channel's daily rollups between two days (inclusive) into day, week or month buckets
+        
+        Reads at most one row per day and sentiment, so a year costs about the
+        same as a fortnight. Weeks start on Monday and months on the 1st; each
+        bucket is labelled with its first day.
+        """
+        bucket_expr = {'day': 'day', 'week': "date(day, '-6 days', 'weekday 1')", 'month': "substr(day, 1, 7) || '-01'"}[bucket]
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {bucket_expr} AS bucket, sentiment, SUM(comment_count), SUM(like_total) FROM channel_rollups "
+                'WHERE channel_id = ? AND day >= ? AND day <= ?' + ('' if include_replies else ' AND is_reply = 0')
+                + ' GROUP BY bucket, sentiment',
+                (channel_id, start_day, end_day)
+            ).fetchall()
+        
+        by_bucket = {}
+        sentiment_counts = {'positive': 0, 'negative': 0, 'neutral': 0}
+        total_likes = 0
+        for bucket_start, sentiment, count, likes in rows:
+            if count:
+                by_bucket.setdefault(bucket_start, {'positive': 0, 'negative': 0, 'neutral': 0})[sentiment] += count
+            sentiment_counts[sentiment] += count or 0
+            total_likes += likes or 0
+        return {'by_bucket': by_bucket, 'sentiment_counts': sentiment_counts, 'total_likes': total_likes}
+    
+    def get_video_counts(self, video_ids, start_day, end_day, include_replies=False):
+        """{video_id: comments posted between two days (inclusive)} for a few videos"""
+        if not video_ids:
+            return {}
+        rollups = '(SELECT * FROM daily_rollups UNION ALL SELECT * FROM reply_rollups)' if include_replies else 'daily_rollups'
+        with self._connect() as conn:
+            return dict(conn.execute(
+                f"SELECT video_id, SUM(comment_count) FROM {rollups} WHERE video_id IN ({','.join('?' * len(video_ids))}) "
+                'AND day >= ? AND day <= ? GROUP BY video_id',
+                list(video_ids) + [start_day, end_day]
+            ).fetchall())
+    
+    def get_backfill(self, channel_id):
+        """Return a channel's backfill checkpoint as a dict, or None if it never started"""
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT channel_id, playlist_id, page_token, until, status, pages, videos, comments, oldest_published, error, '
+                'started_at, updated_at FROM backfill_state WHERE channel_id = ?', (channel_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'channel_id': row[0], 'playlist_id': row[1], 'page_token': row[2], 'until': row[3], 'status': row[4],
+            'pages': row[5], 'videos': row[6], 'comments': row[7], 'oldest_published': row[8], 'error': row[9],
+            'started_at': row[10], 'updated_at': row[11]
+        }
+    
+    def start_backfill(self, channel_id, until=None):
+        """Reset a channel's backfill checkpoint to the newest upload"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO backfill_state (channel_id, until, status, started_at, updated_at) '
+                "VALUES (?, ?, 'pending', ?, ?)",
+                (channel_id, until, now, now)
+            )
+    
+    def update_backfill(self, channel_id, **fields):
+        """Set checkpoint fields (page_token, status, counters, ...) on a channel's backfill"""
+        try:
+            columns = ', '.join(f"{name} = ?" for name in fields)
+            with self._connect() as conn:
+                conn.execute(
+                    f"UPDATE backfill_state SET {columns}, updated_at = ? WHERE channel_id = ?",
+                    list(fields.values()) + [time.time(), channel_id]
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error updating backfill for channel {channel_id}: {e}")
+    
+    def change_seq(self):
+        """The latest change sequence number; comments stamped above a reader's cursor are new to it"""
+        with self._connect() as conn:
+            return conn.execute("SELECT value FROM store_meta WHERE name = 'change_seq'").fetchone()[0]
+    
+    def get_video_sync_state(self, video_id):
+        """Return (synced_at, synced_depth, newest top-level comment date) for a video"""
+        with self._connect() as conn:
+            row = conn.execute('SELECT synced_at, synced_depth FROM videos WHERE video_id = ?', (video_id,)).fetchone()
+            watermark = conn.execute(
+                'SELECT MAX(date) FROM comments WHERE video_id = ? AND parent_id IS NULL', (video_id,)
+            ).fetchone()[0]
+        if row is None:
+            return None, 0, watermark
+        return row[0], row[1], watermark
+    
+    def mark_video_synced(self, video_id, depth):
+        """Record that a video's comments were synced to at least depth"""
+        with self._connect() as conn:
+            conn.execute(
+                'UPDATE videos SET synced_at = ?, synced_depth = MAX(synced_depth, ?) WHERE video_id = ?',
+                (time.time(), depth, video_id)
+            )
+    
+    def get_sync_state(self, name):
+        """Return (synced_at, depth) for a named sync, or (None, 0)"""
+        with self._connect() as conn:
+            row = conn.execute('SELECT synced_at, depth FROM sync_state WHERE name = ?', (name,)).fetchone()
+        return row if row else (None, 0)
+    
+    def mark_synced(self, name, depth):
+        """Record a named sync run"""
+        with self._connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO sync_state (name, synced_at, depth) VALUES (?, ?, ?)', (name, time.time(), depth))
+
+class ReportJobStore(SQLiteDatabase):
+    """Export job state kept in SQLite so any worker process can answer a status poll or download"""
+    
+    def __init__(self, db_path=CACHE_DB_PATH, report_dir=REPORT_DIR, ttl_seconds=REPORT_TTL_SECONDS,
+                 lease_seconds=REPORT_LEASE_SECONDS):
+        self.report_dir = report_dir
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+        os.makedirs(report_dir, exist_ok=True)
+        super().__init__(db_path)
+    
+    def _init_db(self):
+        """Create the job table if it does not exist"""
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS report_jobs ('
+                'job_id TEXT PRIMARY KEY, spec_key TEXT NOT NULL, spec TEXT NOT NULL, status TEXT NOT NULL, '
+                'completed INTEGER NOT NULL DEFAULT 0, total INTEGER NOT NULL, error TEXT, path TEXT, '
+                'created_at REAL NOT NULL, updated_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_report_jobs_spec ON report_jobs (spec_key, updated_at)')
+    
+    def create(self, spec, reuse_seconds=ANALYSIS_TTL_SECONDS):
+        """Queue a job for spec, or reuse a matching one that is still live or finished recently; returns (job_id, created)
+        
+        A queued or running job is live while the process that owns it keeps
+        renewing its lease (see touch); older ones are failed, not reused.
+        """
+        self.purge()
+        self.expire_stale()
+        spec_key = hashlib.blake2b(json.dumps(spec, sort_keys=True).encode('utf-8'), digest_size=16).hexdigest()
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT job_id FROM report_jobs WHERE spec_key = ? AND ('
+                "(status = 'done' AND updated_at > ?) OR (status IN ('queued', 'running') AND updated_at > ?)) "
+                'ORDER BY created_at DESC LIMIT 1',
+                (spec_key, now - reuse_seconds, now - self.lease_seconds)
+            ).fetchone()
+            if row:
+                return row[0], False
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                'INSERT INTO report_jobs (job_id, spec_key, spec, status, total, created_at, updated_at) '
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, spec_key, json.dumps(spec), max(len(spec['video_urls']), 1), now, now)
+            )
+        return job_id, True
+    
+    def update(self, job_id, **fields):
+        """Set status, completed, error or path on a job"""
+        try:
+            columns = ', '.join(f"{name} = ?" for name in fields)
+            with self._connect() as conn:
+                conn.execute(
+                    f"UPDATE report_jobs SET {columns}, updated_at = ? WHERE job_id = ?",
+                    list(fields.values()) + [time.time(), job_id]
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error updating report job {job_id}: {e}")
+    
+    def touch(self, job_ids):
+        """Renew the lease on queued or running jobs owned by this process"""
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    f"UPDATE report_jobs SET updated_at = ? WHERE job_id IN ({','.join('?' * len(job_ids))}) "
+                    "AND status IN ('queued', 'running')",
+                    [time.time()] + list(job_ids)
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error renewing report job leases: {e}")
+    
+    def expire_stale(self):
+        """Fail queued or running jobs whose lease lapsed, e.g. because the worker that owned them restarted"""
+        try:
+            now = time.time()
+            with self._connect() as conn:
+                expired = conn.execute(
+                    "UPDATE report_jobs SET status = 'failed', error = ?, updated_at = ? "
+                    "WHERE status IN ('queued', 'running') AND updated_at <= ?",
+                    ('The report worker stopped before finishing; please submit the report again', now, now - self.lease_seconds)
+                ).rowcount
+            if expired:
+                logger.info(f"Failed {expired} report jobs whose worker stopped")
+        except sqlite3.Error as e:
+            logger.error(f"Error expiring report jobs: {e}")
+    
+    def get(self, job_id):
+        """Return a job as a dict, or None if it is unknown or expired"""
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT job_id, spec, status, completed, total, error, path, created_at, updated_at '
+                'FROM report_jobs WHERE job_id = ?', (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        if row[2] in ('queued', 'running') and row[8] <= time.time() - self.lease_seconds:
+            self.expire_stale()
+            return self.get(job_id)
+        return {
+            'job_id': row[0], 'spec': json.loads(row[1]), 'status': row[2], 'completed': row[3], 'total': row[4],
+            'error': row[5], 'path': row[6], 'created_at': row[7], 'updated_at': row[8]
+        }
+    
+    def purge(self):
+        """Delete jobs and report files older than ttl_seconds"""
+        try:
+            cutoff = time.time() - self.ttl_seconds
+            with self._connect() as conn:
+                paths = [r[0] for r in conn.execute(
+                    'SELECT path FROM report_jobs WHERE updated_at <= ? AND path IS NOT NULL', (cutoff,)
+                ).fetchall()]
+                conn.execute('DELETE FROM report_jobs WHERE updated_at <= ?', (cutoff,))
+            for path in paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"Error purging report jobs: {e}")
+
+class QuotaExhaustedError(Exception):
+    """Raised when no API key has enough quota headroom left for a call"""
+
+class ReplyBudget:
+    """Quota units and wall-clock time one request may spend expanding reply threads, shared by its workers"""
+    
+    def __init__(self, quota_units=REPLY_QUOTA_BUDGET, seconds=REPLY_TIME_BUDGET):
+        self.quota_units = quota_units
+        self.deadline = time.monotonic() + seconds
+        self.spent = 0
+        self._lock = threading.Lock()
+    
+    def spend(self, units):
+        """Reserve units for one more call; False once the quota or the time budget is used up"""
+        with self._lock:
+            if time.monotonic() >= self.deadline or self.spent + units > self.quota_units:
+                return False
+            self.spent += units
+            return True
+
+class CommentPager:
+    """Page sizes and stop conditions for walking a video's commentThreads, without the I/O
+    
+    Iterating yields (page size, page token) for each request to make.
+    Paging stops once max_comments have been taken, a comment older than
+    published_after (ISO 8601) is reached, the pages run out or the next
+    page would exceed quota_budget units. Both services drive one, so a
+    change to when paging stops lands in sync and async fetching alike.
+    """
+    
+    def __init__(self, video_id, max_comments=50, published_after=None, quota_budget=None):
+        self.video_id = video_id
+        self.remaining = max_comments
+        self.published_after = published_after
+        self.quota_budget = quota_budget
+        self.quota_spent = 0
+        self.page_token = None
+        self.done = False
+    
+    def __iter__(self):
+        while not self.done and (self.remaining is None or self.remaining > 0):
+            if self.quota_budget is not None and self.quota_spent + QUOTA_COSTS['commentThreads'] > self.quota_budget:
+                logger.info(f"Quota budget of {self.quota_budget} units reached for video {self.video_id}")
+                return
+            self.quota_spent += QUOTA_COSTS['commentThreads']
+            yield (100 if self.remaining is None else min(self.remaining, 100)), self.page_token
+    
+    def take(self, data, parse_page):
+        """Parse a fetched page (None when the fetch failed) into its comments and advance past it"""
+        if data is None:
+            self.done = True
+            return []
+        batch, reached_cutoff = parse_page(data, self.video_id, self.published_after, self.remaining)
+        if self.remaining is not None:
+            self.remaining -= len(batch)
+        self.page_token = data.get('nextPageToken')
+        self.done = reached_cutoff or not self.page_token
+        return batch
+
+class TokenBuckets:
+    """Named token buckets that each hold up to capacity units and refill continuously over a day
+    
+    With a SharedCache the buckets live in its SQLite file, so every
+    gunicorn worker and the refresh worker spend from the same budget.
+    Without one, or while the file cannot be used, they are held in this
+    process.
+    """
+    
+    def __init__(self, capacity, cache=None):
+        self.capacity = float(capacity)
+        self.refill_per_second = self.capacity / 86400
+        self.cache = cache
+        self._tokens = {}
+        self._updated = {}
+        self._spent = {}
+        self._lock = threading.Lock()
+    
+    def _refill(self, names, now):
+        for name in names:
+            elapsed = now - self._updated.get(name, now)
+            self._tokens[name] = min(self.capacity, self._tokens.get(name, self.capacity) + elapsed * self.refill_per_second)
+            self._updated[name] = now
+    
+    def _shared(self, operation, *args):
+        """Run a SharedCache bucket operation as (result,); None when there is no cache or it failed"""
+        if self.cache is None:
+            return None
+        try:
+            return (getattr(self.cache, operation)(*args),)
+        except sqlite3.Error as e:
+            logger.error(f"Error using shared quota buckets, falling back to this process's: {e}")
+            return None
+    
+    def take(self, names, cost):
+        """Charge cost to the fullest bucket among names and return its name, or None when none has cost left"""
+        shared = self._shared('take_tokens', names, cost, self.capacity, self.refill_per_second)
+        if shared is not None:
+            return shared[0]
+        with self._lock:
+            self._refill(names, time.time())
+            name = max(names, key=lambda n: self._tokens[n])
+            if self._tokens[name] < cost:
+                return None
+            self._tokens[name] -= cost
+            self._spent[name] = self._spent.get(name, 0) + cost
+            return name
+    
+    def refund(self, name, cost):
+        """Give back tokens taken for a call that was never made"""
+        if self._shared('refund_tokens', name, cost, self.capacity, self.refill_per_second) is not None:
+            return
+        with self._lock:
+            self._refill([name], time.time())
+            self._tokens[name] = min(self.capacity, self._tokens[name] + cost)
+            self._spent[name] = max(0, self._spent.get(name, 0) - cost)
+    
+    def drain(self, name):
+        """Empty a bucket so it refills from zero"""
+        if self._shared('drain_tokens', name) is not None:
+            return
+        with self._lock:
+            self._tokens[name] = 0.0
+            self._updated[name] = time.time()
+    
+    def levels(self, names):
+        """{name: (tokens, spent)} for the named buckets"""
+        shared = self._shared('token_levels', names, self.capacity, self.refill_per_second)
+        if shared is not None:
+            return shared[0]
+        with self._lock:
+            self._refill(names, time.time())
+            return {name: (self._tokens[name], self._spent.get(name, 0)) for name in names}
+
+class ApiKeyPool:
+    """Thread-safe pool of API keys with a per-key token-bucket quota budget
+    
+    Each key holds up to daily_quota units and refills continuously over a
+    day. Calls are charged by QUOTA_COSTS and go to the key with the most
+    headroom. Given the SharedCache, the buckets are shared by every process
+    using it, so headroom reflects what all of them spent. The lock is only
+    held for bookkeeping, never across I/O, so the pool is safe to share
+    between threads and event-loop code.
+    """
+    
+    def __init__(self, keys, daily_quota=YOUTUBE_DAILY_QUOTA, reserve_fraction=QUOTA_RESERVE_FRACTION,
+                 concurrency=API_CONCURRENCY, cache=None):
+        self.keys = [key for key in keys if key]
+        self.capacity = float(daily_quota)
+        self.reserve_fraction = reserve_fraction
+        self.concurrency = max(1, concurrency)
+        self.buckets = TokenBuckets(self.capacity, cache)
+        # Buckets are named by a hash so the shared file never holds the keys themselves
+        self._bucket_names = {key: f"key:{hashlib.blake2b(key.encode('utf-8'), digest_size=8).hexdigest()}" for key in self.keys}
+        self._keys_by_bucket = {name: key for key, name in self._bucket_names.items()}
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._lock = threading.Lock()
+        self.switches = 0
+        self.rejections = 0
+    
+    def __len__(self):
+        return len(self.keys)
+    
+    def acquire(self, call_type):
+        """Charge a call to the key with the most remaining quota and return that key"""
+        cost = QUOTA_COSTS.get(call_type, 1)
+        if not self.keys:
+            with self._lock:
+                self.rejections += 1
+            raise QuotaExhaustedError("No YouTube API keys configured")
+        name = self.buckets.take(list(self._keys_by_bucket), cost)
+        if name is None:
+            with self._lock:
+                self.rejections += 1
+            raise QuotaExhaustedError(f"No API key has {cost} quota units left for {call_type}")
+        return self._keys_by_bucket[name]
+    
+    def mark_exhausted(self, key):
+        """Drain a key the API reported as out of quota so calls move to the others"""
+        if key not in self._bucket_names:
+            return
+        self.buckets.drain(self._bucket_names[key])
+        with self._lock:
+            self.switches += 1
+        metrics.inc('youtube_api_key_switches_total')
+        logger.info(f"API key {self.keys.index(key) + 1} exhausted, switching keys")
+    
+    def is_low(self, call_type=None):
+        """True when callers should serve cached data rather than spend more quota"""
+        cost = QUOTA_COSTS.get(call_type, 1) if call_type else 0
+        if not self.keys:
+            return True
+        tokens = [tokens for tokens, _ in self.buckets.levels(list(self._keys_by_bucket)).values()]
+        return sum(tokens) < self.capacity * len(self.keys) * self.reserve_fraction or max(tokens) < cost
+    
+    @contextmanager
+    def slot(self):
+        """Hold one of the pool's concurrent API call slots"""
+        with self._slots:
+            yield
+    
+    def stats(self):
+        """Return remaining and spent quota per key (keys themselves are never exposed)"""
+        levels = self.buckets.levels(list(self._keys_by_bucket)) if self.keys else {}
+        with self._lock:
+            return {
+                'keys': [
+                    {'index': i + 1, 'remaining': round(levels[self._bucket_names[key]][0], 1),
+                     'spent': levels[self._bucket_names[key]][1]}
+                    for i, key in enumerate(self.keys)
+                ],
+                'daily_quota_per_key': self.capacity,
+                'shared': self.buckets.cache is not None,
+                'concurrency': self.concurrency,
+                'switches': self.switches,
+                'rejections': self.rejections
+            }
+
+class ChannelQuota:
+    """One channel's fair share of a shared ApiKeyPool
+    
+    The channel may spend at most share of the pool's daily quota, tracked
+    in its own token bucket, and hold at most concurrency of the pool's API
+    call slots, so one busy channel cannot starve the others. The bucket is
+    shared across processes when the pool's is. It offers the pool's
+    interface, so a service uses it in place of the pool.
+    """
+    
+    def __init__(self, pool, channel_id, share=1.0, concurrency=CHANNEL_CONCURRENCY):
+        self.pool = pool
+        self.channel_id = channel_id
+        self.share = share
+        self.capacity = pool.capacity * len(pool) * share
+        self.concurrency = max(1, min(concurrency, pool.concurrency))
+        self.buckets = TokenBuckets(self.capacity, pool.buckets.cache)
+        self._bucket_name = f"channel:{channel_id}"
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._lock = threading.Lock()
+        self.rejections = 0
+    
+    def __len__(self):
+        return len(self.pool)
+    
+    def _level(self):
+        return self.buckets.levels([self._bucket_name])[self._bucket_name]
+    
+    def acquire(self, call_type):
+        """Charge a call to the channel's share, then to the pool, and return the pool's key"""
+        cost = QUOTA_COSTS.get(call_type, 1)
+        if not len(self.pool):
+            return self.pool.acquire(call_type)
+        if self.buckets.take([self._bucket_name], cost) is None:
+            with self._lock:
+                self.rejections += 1
+            raise QuotaExhaustedError(f"Channel {self.channel_id} has used its share of the API quota")
+        try:
+            key = self.pool.acquire(call_type)
+        except QuotaExhaustedError:
+            self.buckets.refund(self._bucket_name, cost)
+            raise
+        metrics.inc('youtube_api_quota_units_total', cost, channel=self.channel_id)
+        return key
+    
+    def mark_exhausted(self, key):
+        self.pool.mark_exhausted(key)
+    
+    def is_low(self, call_type=None):
+        """True when the channel's share or the whole pool is running low"""
+        cost = QUOTA_COSTS.get(call_type, 1) if call_type else 0
+        low = self._level()[0] < max(self.capacity * self.pool.reserve_fraction, cost)
+        return low or self.pool.is_low(call_type)
+    
+    def headroom(self):
+        """Fraction of the channel's share still unspent"""
+        return self._level()[0] / self.capacity if self.capacity else 0.0
+    
+    @contextmanager
+    def slot(self):
+        """Hold one of the channel's API call slots and one of the pool's"""
+        with self._slots, self.pool.slot():
+            yield
+    
+    def stats(self):
+        """Return the channel's share, remaining and spent quota"""
+        tokens, spent = self._level()
+        with self._lock:
+            return {
+                'channel_id': self.channel_id,
+                'share': round(self.share, 4),
+                'daily_quota': round(self.capacity, 1),
+                'remaining': round(tokens, 1),
+                'spent': spent,
+                'concurrency': self.concurrency,
+                'rejections': self.rejections
+            }
+
+def parse_admission_limits(spec):
+    """Parse 'endpoint:max_concurrent' entries separated by commas"""
+    limits = {}
+    for entry in spec.split(','):
+        try:
+            route, limit = entry.strip().split(':')
+            limits[route] = max(int(limit), 1)
+        except ValueError:
+            logger.warning(f"Ignoring invalid admission limit: {entry!r}")
+    return limits
+
+class AdmissionRejected(Exception):
+    """Raised when a request is refused a slot; carries the reason and a Retry-After hint in seconds"""
+    
+    def __init__(self, reason, retry_after):
+        super().__init__(f"Request rejected: {reason}")
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """Per-endpoint concurrency limits with a bounded wait queue, plus per-client rate limits
+    
+    Each client has a token bucket of burst requests refilled at rate per
+    second, shared by the guarded endpoints. A request over its endpoint's
+    limit waits up to queue_timeout seconds for a slot, but only queue_size
+    requests may wait per endpoint; the rest are rejected at once. State is
+    kept per process, like the metrics.
+    """
+    
+    def __init__(self, limits, queue_size=ADMISSION_QUEUE_SIZE, queue_timeout=ADMISSION_QUEUE_TIMEOUT,
+                 rate=CLIENT_RATE_LIMIT, burst=CLIENT_RATE_BURST):
+        self.limits = limits
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.rate = rate
+        self.burst = float(burst)
+        self._active = {route: 0 for route in limits}
+        self._waiting = {route: 0 for route in limits}
+        self._latency = {}
+        self._buckets = {}
+        self._rejections = {}
+        self._condition = threading.Condition()
+        for route in limits:
+            self._publish(route)
+    
+    def _publish(self, route):
+        metrics.set('admission_in_flight', self._active[route], route=route)
+        metrics.set('admission_queue_depth', self._waiting[route], route=route)
+    
+    def _take_token(self, client, now):
+        """Charge one request to a client's bucket; returns 0 or the seconds until a token is available"""
+        if len(self._buckets) > MAX_TRACKED_CLIENTS:
+            full_after = self.burst / self.rate
+            self._buckets = {
+                key: bucket for key, bucket in self._buckets.items() if now - bucket[1] < full_after
+            }
+        tokens, updated = self._buckets.get(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self._buckets[client] = (tokens, now)
+            return (1 - tokens) / self.rate
+        self._buckets[client] = (tokens - 1, now)
+        return 0
+    
+    def _reject(self, route, reason, retry_after):
+        self._rejections[reason] = self._rejections.get(reason, 0) + 1
+        return AdmissionRejected(reason, max(1, math.ceil(retry_after)))
+    
+    def _queue_retry_after(self, route):
+        """Estimate when a slot frees up from the endpoint's recent latency and queue depth"""
+        latency = self._latency.get(route, 1.0)
+        return latency * (self._waiting[route] + 1) / self.limits[route]
+    
+    def enter(self, route, client):
+        """Take a slot for route, waiting in the bounded queue if needed; raises AdmissionRejected"""
+        limit = self.limits.get(route)
+        with self._condition:
+            now = time.monotonic()
+            if self.rate > 0:
+                wait = self._take_token(client, now)
+                if wait:
+                    raise self._reject(route, 'rate_limited', wait)
+            if limit is None:
+                return now
+            
+            if self._active[route] >= limit:
+                if self._waiting[route] >= self.queue_size:
+                    raise self._reject(route, 'queue_full', self._queue_retry_after(route))
+                self._waiting[route] += 1
+                self._publish(route)
+                deadline = now + self.queue_timeout
+                try:
+                    while self._active[route] >= limit:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise self._reject(route, 'queue_timeout', self._queue_retry_after(route))
+                        self._condition.wait(remaining)
+                finally:
+                    self._waiting[route] -= 1
             
-            if polarity > 0.1:
-                return 'positive'
-            elif polarity < -0.1:
-                return 'negative'
+            self._active[route] += 1
+            self._publish(route)
+            admitted = time.monotonic()
+            metrics.observe('admission_wait_seconds', admitted - now, route=route)
+            return admitted
+    
+    def leave(self, route, admitted):
+        """Release the slot taken at admitted, folding the request's duration into the latency estimate"""
+        if route not in self.limits:
+            return
+        with self._condition:
+            elapsed = time.monotonic() - admitted
+            previous = self._latency.get(route)
+            self._latency[route] = elapsed if previous is None else 0.8 * previous + 0.2 * elapsed
+            self._active[route] -= 1
+            self._publish(route)
+            self._condition.notify_all()
+    
+    @contextmanager
+    def slot(self, route, client):
+        """Hold a slot for the duration of a with block"""
+        admitted = self.enter(route, client)
+        try:
+            yield
+        finally:
+            self.leave(route, admitted)
+    
+    def stats(self):
+        """Return per-endpoint limits, in-flight and waiting counts, and rejections by reason"""
+        with self._condition:
+            return {
+                'routes': {
+                    route: {
+                        'limit': limit,
+                        'in_flight': self._active[route],
+                        'waiting': self._waiting[route],
+                        'avg_seconds': round(self._latency.get(route, 0.0), 3)
+                    }
+                    for route, limit in self.limits.items()
+                },
+                'tracked_clients': len(self._buckets),
+                'rejections': dict(self._rejections)
+            }
+
+class SingleFlight:
+    """Collapses concurrent calls that share a key into one execution whose result they all get
+    
+    Every caller of a shared execution gets its own deep copy of the result,
+    so callers that trim or update it cannot affect each other; an
+    execution nobody joined hands back its result without copying.
+    """
+    
+    class _Call:
+        def __init__(self):
+            self.event = threading.Event()
+            self.result = None
+            self.error = None
+            self.followers = 0
+    
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+    
+    def do(self, key, fn):
+        """Run fn for key, or wait for the in-flight run with the same key and share its outcome"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+                self.executions += 1
             else:
-                return 'neutral'
+                call.followers += 1
+                self.coalesced += 1
+        
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+        
+        try:
+            call.result = fn()
         except Exception as e:
-            logger.error(f"Error analyzing sentiment: {e}")
-            return 'neutral'
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                shared = call.followers > 0
+            call.event.set()
+        # Followers copy call.result, so the leader must not hand the original to a caller that may change it
+        return copy.deepcopy(call.result) if shared else call.result
+    
+    def stats(self):
+        """Return execution and coalesced-call counters"""
+        with self._lock:
+            return {'executions': self.executions, 'coalesced': self.coalesced, 'in_flight': len(self._calls)}
+
+def coalesce(method):
+    """Route a service method through the service's SingleFlight, keyed by its bound arguments
+    
+    Callers may mutate what they get back: coalesced callers each get a copy.
+    """
+    signature = inspect.signature(method)
+    
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        key = (method.__name__, self.channel_id) + tuple(
+            value for name, value in bound.arguments.items() if name != 'self'
+        )
+        return self.single_flight.do(key, lambda: method(self, *args, **kwargs))
+    return wrapper
+
+class YouTubeCommentsService:
+    def __init__(self, cache=None, max_workers=FETCH_CONCURRENCY, store=None, refresher=None, key_pool=None,
+                 channel_id=CHANNEL_ID, quota_share=1.0):
+        pool = key_pool if key_pool is not None else ApiKeyPool([YOUTUBE_API_KEY_1, YOUTUBE_API_KEY_2], cache=cache)
+        self.key_pool = ChannelQuota(pool, channel_id, quota_share)
+        self.channel_id = channel_id
+        self.cache = cache
+        self.store = store
+        self.refresher = refresher
+        self.single_flight = SingleFlight()
+        self.max_workers = max(1, max_workers)
+        self.session = self._build_session()
+    
+    def _build_session(self):
+        """Build a keep-alive session whose connection pool fits the fetch concurrency"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_workers)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+    
+    @staticmethod
+    def _is_quota_error(error):
+        """Whether an API error payload is a quota/rate error (unknown 403 reasons count as quota)"""
+        reasons = {item.get('reason') for item in error.get('errors', []) if isinstance(item, dict)}
+        reasons.discard(None)
+        return not reasons or bool(reasons & QUOTA_ERROR_REASONS)
+    
+    def _api_attempts(self, endpoint, params, description):
+        """Yield (attempt, query parameters) once per pooled key, each charged to the key with the most quota left
+        
+        The caller returns on success and moves on to the next attempt after
+        a quota error; running out of attempts raises QuotaExhaustedError.
+        Shared by the sync and async clients, which only differ in the HTTP
+        call itself.
+        """
+        for attempt in range(max(1, len(self.key_pool))):
+            try:
+                key = self.key_pool.acquire(endpoint)
+            except QuotaExhaustedError:
+                metrics.inc('youtube_api_errors_total', endpoint=endpoint, reason='quota_exhausted')
+                raise
+            yield attempt, dict(params, key=key)
+        raise QuotaExhaustedError(f"All API keys failed to fetch {description}")
+    
+    def _retry_http_error(self, endpoint, description, attempt, key, response, error):
+        """Whether a failed response should move the call to another key; drains the key on quota errors"""
+        status = response.status_code if response is not None else 'http_error'
+        metrics.inc('youtube_api_errors_total', endpoint=endpoint, reason=status)
+        if status != 403:
+            return False
+        try:
+            payload = response.json().get('error', {})
+        except ValueError:
+            payload = {}
+        if not self._is_quota_error(payload):
+            return False
+        logger.error(f"Quota error fetching {description} (attempt {attempt + 1}): {error}")
+        self.key_pool.mark_exhausted(key)
+        return True
+    
+    def _api_payload(self, endpoint, description, key, data):
+        """A successful response's payload, or None when an in-body quota error drained its key; raises other API errors"""
+        if 'error' not in data:
+            return data
+        metrics.inc('youtube_api_errors_total', endpoint=endpoint, reason=data['error'].get('code', 'api_error'))
+        logger.error(f"YouTube API error for {description}: {data['error']}")
+        if data['error'].get('code') == 403 and self._is_quota_error(data['error']):
+            self.key_pool.mark_exhausted(key)
+            return None
+        raise Exception(data['error']['message'])
+    
+    def _api_get(self, endpoint, params, description):
+        """Call a YouTube Data API endpoint with a pooled key, moving to another key on quota errors"""
+        url = f"{YOUTUBE_API_BASE_URL}/{endpoint}"
+        for attempt, request_params in self._api_attempts(endpoint, params, description):
+            try:
+                with self.key_pool.slot(), timed('youtube_api_request_duration_seconds', f"youtube-{endpoint}", endpoint=endpoint):
+                    response = self.session.get(url, params=request_params, timeout=HTTP_TIMEOUT)
+                    response.raise_for_status()
+                    data = response.json()
+            except requests.exceptions.HTTPError as e:
+                if self._retry_http_error(endpoint, description, attempt, request_params['key'], e.response, e):
+                    continue
+                raise
+            except requests.exceptions.RequestException as e:
+                metrics.inc('youtube_api_errors_total', endpoint=endpoint, reason=type(e).__name__)
+                raise
+            
+            data = self._api_payload(endpoint, description, request_params['key'], data)
+            if data is not None:
+                return data
+    
+    def analyze_sentiment(self, text):
+        """Analyze sentiment of text using TextBlob"""
+        return sentiment_engine.analyze(text)[0]
     
-    def get_latest_videos(self, max_results=50):
-        """Get latest videos from the YouTube channel"""
-        url = "https://www.googleapis.com/youtube/v3/search"
+    def analyze_sentiments(self, texts):
+        """Analyze sentiment labels for a batch of texts"""
+        return [label for label, _ in sentiment_engine.analyze_batch(texts)]
+    
+    def _latest_videos_params(self, max_results):
+        """search.list parameters for the channel's videos from the last 30 days"""
         published_after = (datetime.now(timezone.utc) - timedelta(days=30)).replace(microsecond=0).isoformat()
-        params = {
-            'key': self.get_current_api_key(),
+        return {
             'channelId': self.channel_id,
             'part': 'snippet,id',
             'order': 'date',
@@ -78,276 +2241,1595 @@ class YouTubeCommentsService:
             'type': 'video',
             'publishedAfter': published_after
         }
+    
+    def _parse_search_items(self, data):
+        """Turn a search.list response into video dicts"""
+        videos = []
+        for item in data.get('items', []):
+            if 'videoId' in item.get('id', {}):
+                videos.append({
+                    'videoId': item['id']['videoId'],
+                    'title': item['snippet']['title'],
+                    'publishedAt': item['snippet']['publishedAt'],
+                    'description': item['snippet'].get('description', '')[:200],
+                    'thumbnail': item['snippet']['thumbnails'].get('default', {}).get('url', '')
+                })
+        
+        logger.info(f"Retrieved {len(videos)} videos")
+        return videos
+    
+    def get_latest_videos(self, max_results=50):
+        """Get latest videos from the YouTube channel"""
+        params = self._latest_videos_params(max_results)
+        
+        try:
+            logger.info(f"Fetching videos with params: {params}")
+            data = self._api_get('search', params, f"videos for channel {self.channel_id}")
+        except QuotaExhaustedError as e:
+            logger.error(f"All API keys failed to fetch videos: {e}")
+            return []
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching videos: {e}")
+            return []
+        except Exception as e:
+            logger.error(f"Unexpected error fetching videos: {e}")
+            return []
+        
+        return self._parse_search_items(data)
+    
+    def get_uploads_playlist(self):
+        """The channel's uploads playlist ID (channels.list, 1 quota unit), or None for an unknown channel"""
+        data = self._api_get('channels', {'id': self.channel_id, 'part': 'contentDetails'}, f"channel {self.channel_id}")
+        items = data.get('items', [])
+        if not items:
+            return None
+        return items[0].get('contentDetails', {}).get('relatedPlaylists', {}).get('uploads')
+    
+    def _parse_playlist_items(self, data):
+        """Turn a playlistItems.list page into video dicts, skipping private and deleted uploads"""
+        videos = []
+        for item in data.get('items', []):
+            snippet = item.get('snippet', {})
+            details = item.get('contentDetails', {})
+            if not details.get('videoId') or not details.get('videoPublishedAt'):
+                continue
+            videos.append({
+                'videoId': details['videoId'],
+                'title': snippet.get('title', ''),
+                'publishedAt': details['videoPublishedAt'],
+                'description': snippet.get('description', '')[:200],
+                'thumbnail': snippet.get('thumbnails', {}).get('default', {}).get('url', '')
+            })
+        return videos
+    
+    def _backfill_page(self, state):
+        """Store one uploads-playlist page of videos with their comments; returns the advanced checkpoint fields"""
+        params = {'playlistId': state['playlist_id'], 'part': 'snippet,contentDetails', 'maxResults': 50}
+        if state['page_token']:
+            params['pageToken'] = state['page_token']
+        data = self._api_get('playlistItems', params, f"uploads of channel {self.channel_id}")
+        videos = self._parse_playlist_items(data)
+        reached_until = False
+        if state['until']:
+            kept = [video for video in videos if video['publishedAt'][:10] >= state['until']]
+            reached_until = len(kept) < len(videos)
+            videos = kept
+        self.store.save_videos(self.channel_id, videos)
         
-        for attempt in range(len(self.api_keys)):
+        def sync(video):
             try:
-                logger.info(f"Fetching videos with params: {params}")
-                response = requests.get(url, params=params, timeout=30)
-                response.raise_for_status()
-                data = response.json()
-                
-                if 'error' in data:
-                    logger.error(f"YouTube API error: {data['error']}")
-                    if data['error'].get('code') == 403:
-                        params['key'] = self.switch_api_key()
-                        continue
-                    else:
-                        raise Exception(data['error']['message'])
-                
-                videos = []
-                for item in data.get('items', []):
-                    if 'videoId' in item.get('id', {}):
-                        videos.append({
-                            'videoId': item['id']['videoId'],
-                            'title': item['snippet']['title'],
-                            'publishedAt': item['snippet']['publishedAt'],
-                            'description': item['snippet'].get('description', '')[:200],
-                            'thumbnail': item['snippet']['thumbnails'].get('default', {}).get('url', '')
-                        })
-                
-                logger.info(f"Retrieved {len(videos)} videos")
-                return videos
-                
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Error fetching videos (attempt {attempt} + 1): {e}")
-                if isinstance(e, requests.exceptions.HTTPError) and e.response.status_code == 403:
-                    params['key'] = self.switch_api_key()
-                    continue
-                return []
+                return self.sync_video_comments(video['videoId'], BACKFILL_COMMENTS_PER_VIDEO)
             except Exception as e:
-                logger.error(f"Unexpected error fetching videos: {e}")
-                return []
+                logger.error(f"Error backfilling comments for video {video['videoId']}: {e}")
+                return 0
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(videos)))) as executor:
+            comments = sum(executor.map(sync, videos))
+        
+        published = [video['publishedAt'] for video in videos]
+        if state['oldest_published']:
+            published.append(state['oldest_published'])
+        next_token = data.get('nextPageToken')
+        return {
+            'page_token': next_token,
+            'pages': state['pages'] + 1,
+            'videos': state['videos'] + len(videos),
+            'comments': state['comments'] + comments,
+            'oldest_published': min(published) if published else None,
+            'status': 'done' if reached_until or not next_token else 'running',
+            'error': None
+        }
+    
+    def run_backfill(self, max_pages=BACKFILL_PAGES_PER_RUN):
+        """Walk the uploads playlist from the stored checkpoint for up to max_pages pages
+        
+        playlistItems.list costs 1 unit per 50 videos against 100 for a
+        search page. Pages are BACKFILL_PAGE_INTERVAL seconds apart, the
+        checkpoint is saved after each one, and the run pauses while the
+        channel's quota headroom is under BACKFILL_QUOTA_FLOOR so dashboard
+        refreshes keep theirs. Returns the checkpoint, or None when the
+        channel has no backfill to run or another process holds its lease.
+        """
+        state = self.store.get_backfill(self.channel_id) if self.store is not None else None
+        if state is None or state['status'] not in BACKFILL_RESUMABLE:
+            return None
+        lease = f"backfill:{self.channel_id}"
+        if self.cache is not None and not self.cache.try_lock(lease, BACKFILL_LEASE_SECONDS):
+            return None
+        
+        try:
+            if not state['playlist_id']:
+                playlist_id = self.get_uploads_playlist()
+                if not playlist_id:
+                    self.store.update_backfill(self.channel_id, status='failed', error='Channel has no uploads playlist')
+                    return self.store.get_backfill(self.channel_id)
+                self.store.update_backfill(self.channel_id, playlist_id=playlist_id)
+                state['playlist_id'] = playlist_id
+            
+            for page in range(max_pages):
+                if page:
+                    time.sleep(BACKFILL_PAGE_INTERVAL)
+                if self.key_pool.headroom() < BACKFILL_QUOTA_FLOOR:
+                    logger.info(f"Quota headroom is low, pausing backfill of channel {self.channel_id}")
+                    self.store.update_backfill(self.channel_id, status='paused')
+                    break
+                fields = self._backfill_page(state)
+                self.store.update_backfill(self.channel_id, **fields)
+                state.update(fields)
+                logger.info(f"Backfilled page {state['pages']} of channel {self.channel_id}: {state['videos']} videos so far")
+                if fields['status'] == 'done':
+                    break
+        except Exception as e:
+            logger.error(f"Error backfilling channel {self.channel_id}: {e}")
+            self.store.update_backfill(self.channel_id, status='paused', error=str(e))
+        finally:
+            if self.cache is not None:
+                self.cache.release_lock(lease)
+        return self.store.get_backfill(self.channel_id)
+    
+    def _parse_comment_item(self, item, video_id):
+        """Turn a commentThreads item into an unscored comment dict"""
+        top_level_comment = item['snippet']['topLevelComment']
+        comment_data = top_level_comment['snippet']
+        comment_text = comment_data['textDisplay']
+        comment_id = top_level_comment.get('id') or item.get('id')
+        if not comment_id:
+            comment_id = hashlib.blake2b(
+                f"{video_id}|{comment_data['authorDisplayName']}|{comment_data['publishedAt']}|{comment_text}".encode('utf-8'),
+                digest_size=12
+            ).hexdigest()
         
-        logger.error("All API keys failed to fetch videos")
-        return []
+        return {
+            'author': comment_data['authorDisplayName'],
+            'comment': comment_text[:500],
+            'date': comment_data['publishedAt'],
+            'likeCount': comment_data.get('likeCount', 0),
+            'sentiment': None,
+            'authorProfileImageUrl': comment_data.get('authorProfileImageUrl', ''),
+            'videoId': video_id,
+            'commentId': comment_id,
+            '_text': comment_text
+        }
     
-    def get_comments_for_video(self, video_id, max_results=50):
-        """Get comments for a specific video"""
-        url = "https://www.googleapis.com/youtube/v3/commentThreads"
+    def _comment_page_params(self, video_id, page_size, page_token=None, include_replies=False):
+        """commentThreads.list parameters for one page, newest first"""
         params = {
-            'key': self.get_current_api_key(),
-            'part': 'snippet',
+            'part': 'snippet,replies' if include_replies else 'snippet',
             'videoId': video_id,
-            'maxResults': min(max_results, 100),
+            'maxResults': page_size,
             'order': 'time'
         }
+        if page_token:
+            params['pageToken'] = page_token
+        return params
+    
+    def _fetch_comment_page(self, video_id, page_size, page_token=None, include_replies=False):
+        """Fetch one raw commentThreads page, rotating API keys on quota errors"""
+        params = self._comment_page_params(video_id, page_size, page_token, include_replies)
+        
+        try:
+            logger.info(f"Fetching comments for video {video_id} with params: {params}")
+            return self._api_get('commentThreads', params, f"comments for video {video_id}")
+        except QuotaExhaustedError as e:
+            logger.error(f"All API keys failed to fetch comments for video {video_id}: {e}")
+            return None
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching comments for video {video_id}: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Unexpected error fetching comments for video {video_id}: {e}")
+            return None
+    
+    def iter_comment_batches(self, video_id, max_comments=50, published_after=None, quota_budget=None, reply_budget=None):
+        """Yield scored comment batches page by page, newest first, via nextPageToken
         
-        for attempt in range(len(self.api_keys)):
+        Paging stops once max_comments have been yielded, a comment older than
+        published_after (ISO 8601) is reached, or the next page would exceed
+        quota_budget units. Each raw page is discarded as soon as it is scored.
+        With a reply_budget, each batch also carries the replies to its
+        comments; they do not count toward max_comments.
+        """
+        pager = CommentPager(video_id, max_comments, published_after, quota_budget)
+        for page_size, page_token in pager:
+            data = self._fetch_comment_page(video_id, page_size, page_token, reply_budget is not None)
+            batch = pager.take(data, self._parse_comment_page)
+            if batch and reply_budget is not None:
+                batch += self._collect_replies(data, video_id, batch, reply_budget)
+            if batch:
+                yield self._score_batch(batch)
+    
+    def _parse_comment_page(self, data, video_id, published_after=None, limit=None):
+        """Parse a commentThreads page up to limit comments; returns (batch, reached_cutoff)"""
+        batch = []
+        reached_cutoff = False
+        for item in data.get('items', []):
             try:
-                logger.info(f"Fetching comments for video {video_id} with params: {params}")
-                response = requests.get(url, params=params, timeout=30)
-                response.raise_for_status()
-                data = response.json()
-                
-                if 'error' in data:
-                    logger.error(f"YouTube API error for video {video_id}: {data['error']}")
-                    if data['error'].get('code') == 403:
-                        params['key'] = self.switch_api_key()
-                        continue
-                    else:
-                        raise Exception(data['error']['message'])
-                
-                comments = []
-                for item in data.get('items', []):
-                    try:
-                        comment_data = item['snippet']['topLevelComment']['snippet']
-                        comment_text = comment_data['textDisplay']
-                        sentiment = self.analyze_sentiment(comment_text)
-                        
-                        comments.append({
-                            'author': comment_data['authorDisplayName'],
-                            'comment': comment_text[:500],
-                            'date': comment_data['publishedAt'],
-                            'likeCount': comment_data.get('likeCount', 0),
-                            'sentiment': sentiment,
-                            'authorProfileImageUrl': comment_data.get('authorProfileImageUrl', ''),
-                            'videoId': video_id
-                        })
-                    except KeyError as e:
-                        logger.warning(f"Missing key in comment data: {e}")
-                        continue
-                
-                logger.info(f"Retrieved {len(comments)} comments for video {video_id}")
-                return comments
-                
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Error fetching comments for video {video_id} (attempt {attempt} + 1): {e}")
-                if isinstance(e, requests.exceptions.HTTPError) and e.response.status_code == 403:
-                    params['key'] = self.switch_api_key()
-                    continue
-                return []
+                comment = self._parse_comment_item(item, video_id)
+            except KeyError as e:
+                logger.warning(f"Missing key in comment data: {e}")
+                continue
+            if published_after and comment['date'] < published_after:
+                reached_cutoff = True
+                break
+            batch.append(comment)
+        
+        if limit is not None:
+            batch = batch[:limit]
+        return batch, reached_cutoff
+    
+    def _parse_reply_item(self, item, video_id, parent_id):
+        """Turn a reply (inline in a thread or from comments.list) into an unscored comment dict"""
+        reply_data = item['snippet']
+        reply_text = reply_data['textDisplay']
+        return {
+            'author': reply_data['authorDisplayName'],
+            'comment': reply_text[:500],
+            'date': reply_data['publishedAt'],
+            'likeCount': reply_data.get('likeCount', 0),
+            'sentiment': None,
+            'authorProfileImageUrl': reply_data.get('authorProfileImageUrl', ''),
+            'videoId': video_id,
+            'commentId': item['id'],
+            'parentId': reply_data.get('parentId') or parent_id,
+            '_text': reply_text
+        }
+    
+    def _parse_inline_replies(self, data, video_id, thread_ids):
+        """Replies returned inline for the kept threads of a page, and (thread id, totalReplyCount) for threads with more"""
+        replies = []
+        partial = []
+        for item in data.get('items', []):
+            snippet = item.get('snippet', {})
+            thread_id = snippet.get('topLevelComment', {}).get('id') or item.get('id')
+            if thread_id not in thread_ids:
+                continue
+            inline = item.get('replies', {}).get('comments', [])
+            for reply in inline:
+                try:
+                    replies.append(self._parse_reply_item(reply, video_id, thread_id))
+                except KeyError as e:
+                    logger.warning(f"Missing key in reply data: {e}")
+            if snippet.get('totalReplyCount', 0) > len(inline):
+                partial.append((thread_id, snippet['totalReplyCount']))
+        return replies, partial
+    
+    def _reply_page_params(self, parent_id, fetched, budget, page_token=None):
+        """comments.list parameters for a thread's next reply page, or None once the thread cap or reply budget is reached"""
+        if fetched >= MAX_REPLIES_PER_THREAD or not budget.spend(QUOTA_COSTS['comments']):
+            return None
+        params = {'part': 'snippet', 'parentId': parent_id, 'maxResults': min(MAX_REPLIES_PER_THREAD - fetched, 100)}
+        if page_token:
+            params['pageToken'] = page_token
+        return params
+    
+    def _parse_reply_page(self, data, video_id, parent_id):
+        """Replies on a comments.list page and the next page's token"""
+        replies = []
+        for item in data.get('items', []):
+            try:
+                replies.append(self._parse_reply_item(item, video_id, parent_id))
+            except KeyError as e:
+                logger.warning(f"Missing key in reply data: {e}")
+        return replies, data.get('nextPageToken')
+    
+    def _fetch_reply_thread(self, video_id, parent_id, budget):
+        """Page through comments.list for one thread while the request's reply budget lasts"""
+        replies = []
+        params = self._reply_page_params(parent_id, 0, budget)
+        while params is not None:
+            try:
+                data = self._api_get('comments', params, f"replies to comment {parent_id}")
             except Exception as e:
-                logger.error(f"Unexpected error fetching comments for video {video_id}: {e}")
-                return []
+                logger.error(f"Error fetching replies to comment {parent_id}: {e}")
+                break
+            page, page_token = self._parse_reply_page(data, video_id, parent_id)
+            replies.extend(page)
+            params = self._reply_page_params(parent_id, len(replies), budget, page_token) if page_token else None
+        return replies
+    
+    @staticmethod
+    def _expansion_order(threads):
+        """(thread id, totalReplyCount) threads to expand, busiest first so a tight budget goes where most discussion is"""
+        return sorted(threads, key=lambda thread: thread[1], reverse=True)
+    
+    @staticmethod
+    def _merge_replies(replies, expanded):
+        """Inline replies plus the expanded threads' replies that were not already inline"""
+        seen = {reply['commentId'] for reply in replies}
+        for thread_replies in expanded.values():
+            replies.extend(reply for reply in thread_replies if reply['commentId'] not in seen)
+        return replies
+    
+    def expand_reply_threads(self, video_id, threads, budget):
+        """Fetch the full replies of (thread id, totalReplyCount) threads concurrently within budget
+        
+        The busiest threads go first, so a tight budget is spent where most
+        of the discussion is. Returns {thread id: replies}.
+        """
+        threads = self._expansion_order(threads)
         
-        logger.error(f"All API keys failed to fetch comments for video {video_id}")
-        return []
+        def fetch(thread):
+            return thread[0], self._fetch_reply_thread(video_id, thread[0], budget)
+        
+        if self.max_workers == 1 or len(threads) <= 1:
+            results = [fetch(thread) for thread in threads]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(threads))) as executor:
+                results = list(executor.map(with_request_timings(fetch), threads))
+        return {thread_id: replies for thread_id, replies in results if replies}
+    
+    def _collect_replies(self, data, video_id, batch, budget):
+        """Replies to a parsed page's comments: inline ones, completed through comments.list where threads are longer"""
+        replies, partial = self._parse_inline_replies(data, video_id, {comment['commentId'] for comment in batch})
+        if partial:
+            replies = self._merge_replies(replies, self.expand_reply_threads(video_id, partial, budget))
+        return replies
+    
+    def _score_batch(self, batch):
+        """Label a parsed batch in one sentiment pass, dropping the raw text"""
+        labels = self.analyze_sentiments([comment.pop('_text') for comment in batch])
+        for comment, label in zip(batch, labels):
+            comment['sentiment'] = label
+        return batch
+    
+    @coalesce
+    def get_comments_for_video(self, video_id, max_results=50, published_after=None, quota_budget=None, include_replies=False,
+                               reply_budget=None):
+        """Get comments for a specific video, paging through nextPageToken beyond 100
+        
+        include_replies adds reply threads, spending reply_budget when one is
+        shared across a request's videos or a fresh ReplyBudget otherwise.
+        """
+        comments = []
+        if include_replies and reply_budget is None:
+            reply_budget = ReplyBudget()
+        for batch in self.iter_comment_batches(video_id, max_results, published_after, quota_budget, reply_budget):
+            comments.extend(batch)
+        
+        logger.info(f"Retrieved {len(comments)} comments for video {video_id}")
+        return comments
     
-    def get_video_details_by_url(self, video_url, max_comments=50):
-        """Get video details and comments based on a YouTube or Bing search URL"""
+    @coalesce
+    def resolve_video_id(self, video_url):
+        """Video ID for a YouTube or Bing search URL; Bing pages are scanned once and cached for VIDEO_URL_TTL"""
         try:
-            # Check if URL is a Bing search results page
-            if 'bing.com/videos' in video_url:
-                logger.info(f"Processing Bing search URL: {video_url}")
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                }
-                response = requests.get(video_url, headers=headers, timeout=30)
+            return extract_video_id(video_url)
+        except ValueError:
+            if not is_bing_url(video_url):
+                raise
+        
+        key = video_url_cache_key(video_url)
+        if self.cache is not None:
+            video_id = self.cache.get(key)
+            if video_id:
+                return video_id
+        
+        logger.info(f"Processing Bing search URL: {video_url}")
+        scanner = VideoIdScanner()
+        video_id = None
+        with timed('youtube_api_request_duration_seconds', 'bing', endpoint='bing'):
+            with self.session.get(video_url, headers=BING_HEADERS, timeout=HTTP_TIMEOUT, stream=True) as response:
                 response.raise_for_status()
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Find the first YouTube video link
-                youtube_url = None
-                for link in soup.find_all('a', href=True):
-                    href = link['href']
-                    if 'youtube.com/watch?v=' in href or 'youtu.be/' in href:
-                        youtube_url = href
+                response.encoding = response.encoding or 'utf-8'
+                for chunk in response.iter_content(chunk_size=16384, decode_unicode=True):
+                    video_id = scanner.feed(chunk)
+                    if video_id or scanner.exhausted:
                         break
-                
-                if not youtube_url:
-                    raise ValueError("No YouTube video found in Bing search results")
-                
-                # Ensure full URL
-                if youtube_url.startswith('/'):
-                    youtube_url = 'https://www.bing.com' + youtube_url
-                elif not youtube_url.startswith('http'):
-                    youtube_url = 'https://' + youtube_url
-                
-                logger.info(f"Extracted YouTube URL: {youtube_url}")
-                video_url = youtube_url
-        
-            # Extract video ID from YouTube URL
-            video_id = None
-            if 'youtube.com/watch?v=' in video_url:
-                video_id = video_url.split('v=')[1].split('&')[0]
-            elif 'youtu.be/' in video_url:
-                video_id = video_url.split('youtu.be/')[1].split('?')[0]
-            
-            if not video_id:
-                raise ValueError("Invalid YouTube URL")
+        video_id = video_id or scanner.finish()
+        if not video_id:
+            raise ValueError("No YouTube video found in Bing search results")
+        
+        logger.info(f"Resolved Bing search URL to video {video_id} after scanning {scanner.scanned} characters")
+        if self.cache is not None:
+            self.cache.set(key, video_id, ttl_seconds=VIDEO_URL_TTL)
+        return video_id
+    
+    @coalesce
+    def get_video_details_by_url(self, video_url, max_comments=50, include_replies=False):
+        """Get video details and comments (and optionally their replies) based on a YouTube or Bing search URL"""
+        try:
+            video_id = self.resolve_video_id(video_url)
             
             # Fetch video details
-            url = "https://www.googleapis.com/youtube/v3/videos"
-            params = {
-                'key': self.get_current_api_key(),
-                'part': 'snippet',
-                'id': video_id
-            }
+            video_data = self.get_video_metadata([video_id]).get(video_id)
             
-            for attempt in range(len(self.api_keys)):
-                try:
-                    response = requests.get(url, params=params, timeout=30)
-                    response.raise_for_status()
-                    data = response.json()
-                    
-                    if 'error' in data:
-                        logger.error(f"YouTube API error for video {video_id}: {data['error']}")
-                        if data['error'].get('code') == 403:
-                            params['key'] = self.switch_api_key()
-                            continue
-                        else:
-                            raise Exception(data['error']['message'])
-                    
-                    if not data.get('items'):
-                        raise ValueError("Video not found")
-                    
-                    video_data = data['items'][0]['snippet']
-                    comments = self.get_comments_for_video(video_id, max_comments)
-                    
-                    return {
-                        'videoId': video_id,
-                        'title': video_data['title'],
-                        'publishedAt': video_data['publishedAt'],
-                        'description': video_data.get('description', '')[:200],
-                        'thumbnail': video_data['thumbnails'].get('default', {}).get('url', ''),
-                        'comments': comments,
-                        'commentCount': len(comments)
-                    }
-                
-                except requests.exceptions.RequestException as e:
-                    logger.error(f"Error fetching video details for {video_id} (attempt {attempt} + 1): {e}")
-                    if isinstance(e, requests.exceptions.HTTPError) and e.response.status_code == 403:
-                        params['key'] = self.switch_api_key()
-                        continue
-                    raise
-                except Exception as e:
-                    logger.error(f"Unexpected error fetching video details for {video_id}: {e}")
-                    raise
+            if not video_data:
+                raise ValueError("Video not found")
+            
+            comments = self.get_comments_for_video(video_id, max_comments, include_replies=include_replies)
+            if self.store is not None and comments:
+                self.store.save_comments(comments)
             
-            logger.error(f"All API keys failed to fetch video details for {video_id}")
-            raise Exception("Failed to fetch video details")
+            return {
+                **video_data,
+                'comments': comments,
+                'commentCount': len(comments),
+                'replyCount': sum(1 for comment in comments if comment.get('parentId')),
+                'totalCommentCount': video_data['commentCount']
+            }
         
         except Exception as e:
             logger.error(f"Error in get_video_details_by_url: {e}")
             raise
     
-    def get_all_comments_data(self, max_videos=10, max_comments_per_video=50):
-        """Get all comments data for analysis"""
+    def get_themes(self, sentiment_type, video_id=None, limit=5):
+        """Distinctive themes from the store's term index for a video, or the whole channel when video_id is None"""
+        if self.store is None:
+            return None
+        try:
+            themes = self.store.get_themes(sentiment_type, video_id=video_id, channel_id=self.channel_id, limit=limit)
+            return [term for term, _, _ in themes] or None
+        except Exception as e:
+            logger.error(f"Error reading themes from the term index: {e}")
+            return None
+    
+    def get_channel_videos(self, max_videos):
+        """Recent channel videos from the store or cache when fresh, saving a 100-unit search call"""
+        if self.store is not None:
+            synced_at, depth = self.store.get_sync_state(f"videos:{self.channel_id}")
+            if synced_at and depth >= max_videos and time.time() - synced_at < STORE_SYNC_INTERVAL:
+                return self.store.get_videos(self.channel_id, max_videos, self._window_start())
+        
+        key = f"channel_videos:{self.channel_id}:{max_videos}"
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        videos = self.get_latest_videos(max_videos)[:max_videos]
+        if videos:
+            if self.store is not None:
+                self.store.save_videos(self.channel_id, videos)
+            if self.cache is not None:
+                self.cache.set(key, videos)
+        return videos
+    
+    def _parse_video_item(self, item):
+        """Flatten a videos.list item with snippet, statistics and contentDetails parts"""
+        snippet = item.get('snippet', {})
+        statistics = item.get('statistics', {})
+        return {
+            'videoId': item['id'],
+            'title': snippet.get('title', ''),
+            'publishedAt': snippet.get('publishedAt', ''),
+            'description': snippet.get('description', '')[:200],
+            'thumbnail': snippet.get('thumbnails', {}).get('default', {}).get('url', ''),
+            'channelTitle': snippet.get('channelTitle', ''),
+            'viewCount': int(statistics.get('viewCount', 0)),
+            'likeCount': int(statistics.get('likeCount', 0)),
+            'commentCount': int(statistics.get('commentCount', 0)),
+            'duration': item.get('contentDetails', {}).get('duration', '')
+        }
+    
+    def get_video_metadata(self, video_ids):
+        """Get metadata and statistics for many videos, 50 IDs per videos.list call, cached with TTL
+        
+        Returns a dict keyed by videoId; unknown or private videos are omitted.
+        """
+        video_ids = list(dict.fromkeys(video_id for video_id in video_ids if video_id))
+        metadata = {}
+        missing = []
+        for video_id in video_ids:
+            cached = self.cache.get(f"video_meta:{video_id}") if self.cache is not None else None
+            if cached is not None:
+                metadata[video_id] = cached
+            else:
+                missing.append(video_id)
+        
+        for start in range(0, len(missing), VIDEOS_PER_REQUEST):
+            chunk = missing[start:start + VIDEOS_PER_REQUEST]
+            params = {
+                'part': 'snippet,statistics,contentDetails',
+                'id': ','.join(chunk),
+                'maxResults': VIDEOS_PER_REQUEST
+            }
+            data = self._api_get('videos', params, f"{len(chunk)} videos")
+            for item in data.get('items', []):
+                video = self._parse_video_item(item)
+                metadata[video['videoId']] = video
+                if self.cache is not None:
+                    self.cache.set(f"video_meta:{video['videoId']}", video, ttl_seconds=VIDEO_METADATA_TTL)
+        
+        return metadata
+    
+    def stream_comments(self, max_videos=5, max_comments_per_video=20, video_id=None):
+        """Yield (event, payload) pairs as each video's comment pages are fetched and scored
+        
+        Videos are fetched concurrently; pages travel through a bounded queue
+        and are dropped once yielded, so memory stays flat however many
+        comments are streamed. Events: video, comments, totals, video_done,
+        error and a final done carrying the running totals and, with a store,
+        a delta cursor for /api/sentiment-data?since=.
+        """
+        if video_id:
+            videos = [{'videoId': video_id, 'title': video_id, 'publishedAt': '', 'description': '', 'thumbnail': ''}]
+        else:
+            videos = self.get_channel_videos(max_videos)
+        
+        seq = self.store.change_seq() if self.store is not None and not video_id else None
+        totals = {
+            'sentiment_counts': {'positive': 0, 'negative': 0, 'neutral': 0},
+            'total_comments': 0,
+            'total_likes': 0,
+            'videos_done': 0,
+            'total_videos': len(videos)
+        }
+        for video in videos:
+            yield 'video', video
+        if not videos:
+            yield 'done', totals
+            return
+        
+        events = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+        cancelled = threading.Event()
+        
+        def put(event):
+            while not cancelled.is_set():
+                try:
+                    events.put(event, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def fetch(video):
+            count = 0
+            try:
+                for batch in self.iter_comment_batches(video['videoId'], max_comments_per_video):
+                    if self.store is not None:
+                        self.store.save_comments(batch)
+                    count += len(batch)
+                    if not put(('comments', {'videoId': video['videoId'], 'comments': batch})):
+                        return
+            except Exception as e:
+                logger.error(f"Error streaming comments for video {video['videoId']}: {e}")
+                put(('error', {'videoId': video['videoId'], 'error': str(e)}))
+            finally:
+                put(('video_done', {'videoId': video['videoId'], 'commentCount': count}))
+        
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(videos)), thread_name_prefix='comment-stream')
+        try:
+            for video in videos:
+                executor.submit(fetch, video)
+            
+            while totals['videos_done'] < len(videos):
+                event, payload = events.get()
+                if event == 'comments':
+                    for comment in payload['comments']:
+                        totals['sentiment_counts'][comment['sentiment']] += 1
+                        totals['total_likes'] += comment['likeCount']
+                    totals['total_comments'] += len(payload['comments'])
+                    yield event, payload
+                    yield 'totals', totals
+                else:
+                    if event == 'video_done':
+                        totals['videos_done'] += 1
+                    yield event, payload
+            
+            if seq is not None:
+                totals['cursor'] = make_cursor(seq, [video['videoId'] for video in videos])
+            yield 'done', totals
+        finally:
+            cancelled.set()
+            executor.shutdown(wait=False)
+    
+    def get_comments_for_videos(self, videos, max_results=50, include_replies=False):
+        """Fetch comments for several videos on a bounded thread pool, preserving video order
+        
+        With include_replies, all videos share one ReplyBudget.
+        """
+        reply_budget = ReplyBudget() if include_replies else None
+        
+        def fetch(indexed_video):
+            i, video = indexed_video
+            logger.info(f"Processing video {i+1}/{len(videos)}: {video['title'][:50]}...")
+            try:
+                return self.get_comments_for_video(video['videoId'], max_results, include_replies=include_replies,
+                                                   reply_budget=reply_budget)
+            except Exception as e:
+                logger.error(f"Unexpected error fetching comments for video {video['videoId']}: {e}")
+                return []
+        
+        if self.max_workers == 1 or len(videos) <= 1:
+            return [fetch(item) for item in enumerate(videos)]
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(videos))) as executor:
+            return list(executor.map(with_request_timings(fetch), enumerate(videos)))
+    
+    def _snapshot_spec(self, kind, max_videos, max_comments_per_video, include_replies=False):
+        """Return the cache key and producer for a dashboard snapshot"""
+        suffix = ':replies' if include_replies else ''
+        if kind == 'chart':
+            return (
+                f"chart_aggregates:{self.channel_id}:{max_videos}:{max_comments_per_video}{suffix}",
+                lambda: self._build_chart_aggregates(max_videos, max_comments_per_video, include_replies)
+            )
+        return (
+            f"all_comments:v2:{self.channel_id}:{max_videos}:{max_comments_per_video}{suffix}",
+            lambda: self._fetch_all_comments_data(max_videos, max_comments_per_video, include_replies)
+        )
+    
+    def _get_snapshot(self, key, producer):
+        """Serve the latest snapshot immediately, revalidating in the background when stale
+        
+        Only a combination that has never been built blocks on the producer.
+        """
+        entry = self.cache.get_entry(key)
+        if entry is None:
+            return self.refresh_snapshot(key, producer)
+        return self._serve_snapshot(key, producer, entry)
+    
+    def _serve_snapshot(self, key, producer, entry):
+        """Return a cached (value, created_at) snapshot, scheduling a rebuild when it is stale"""
+        value, created_at = entry
+        age = time.time() - created_at
+        stale = age >= SNAPSHOT_STALE_SECONDS
+        if stale and self.refresher is not None:
+            if self.key_pool.is_low():
+                logger.info(f"API quota is low, serving stale snapshot {key} without refreshing")
+            else:
+                self.refresher.schedule(key, producer)
+        return dict(
+            value,
+            snapshot_at=datetime.fromtimestamp(created_at, timezone.utc).isoformat(),
+            snapshot_age=round(age, 1),
+            stale=stale
+        )
+    
+    def last_snapshot(self, kind, max_videos, max_comments_per_video, include_replies=False):
+        """The stored snapshot for a combination, marked stale and not refreshed; None when it was never built"""
+        if self.cache is None:
+            return None
+        key, _ = self._snapshot_spec(kind, max_videos, max_comments_per_video, include_replies)
+        entry = self.cache.get_entry(key)
+        if entry is None:
+            return None
+        value, created_at = entry
+        return dict(
+            value,
+            snapshot_at=datetime.fromtimestamp(created_at, timezone.utc).isoformat(),
+            snapshot_age=round(time.time() - created_at, 1),
+            stale=True
+        )
+    
+    def revalidate_snapshot(self, kind, max_videos, max_comments_per_video, include_replies=False):
+        """Schedule a rebuild of a combination's snapshot when it is missing or stale, without reading it
+        
+        Delta reads answer from the store directly; the rebuild is what keeps
+        syncing new comments into it.
+        """
+        if self.cache is None or self.refresher is None:
+            return
+        key, producer = self._snapshot_spec(kind, max_videos, max_comments_per_video, include_replies)
+        created_at = self.cache.get_created_at(key)
+        if created_at is not None and time.time() - created_at < SNAPSHOT_STALE_SECONDS:
+            return
+        if self.key_pool.is_low():
+            logger.info(f"API quota is low, not refreshing snapshot {key} behind a delta read")
+            return
+        self.refresher.schedule(key, producer)
+    
+    def current_chart_aggregates(self, max_videos=10, max_comments_per_video=50, include_replies=False):
+        """Chart aggregates from the current snapshot without waiting on a build
+        
+        A combination that has never been built is queued on the refresher and
+        None is returned; without a refresher it is built here.
+        """
+        kind = 'chart' if self.store is not None else 'all'
+        key, producer = self._snapshot_spec(kind, max_videos, max_comments_per_video, include_replies)
+        entry = self.cache.get_entry(key) if self.cache is not None else None
+        if entry is None and self.refresher is not None:
+            self.refresher.schedule(key, producer)
+            return None
+        data = self._serve_snapshot(key, producer, entry) if entry is not None else self.refresh_snapshot(key, producer)
+        return data if kind == 'chart' else aggregate_comments(data)
+    
+    def refresh_snapshot(self, key, producer):
+        """Build a snapshot now and store it; failed builds keep the previous snapshot"""
+        value = producer()
+        created_at = None
+        if 'error' not in value and self.cache is not None:
+            created_at = self.cache.set(key, value, ttl_seconds=SNAPSHOT_MAX_AGE)
+        return dict(value, snapshot_at=datetime.fromtimestamp(created_at or time.time(), timezone.utc).isoformat(), snapshot_age=0, stale=False)
+    
+    def refresh_snapshots(self, combinations):
+        """Rebuild the snapshots for (kind, max_videos, max_comments) combinations"""
+        for kind, max_videos, max_comments_per_video in combinations:
+            key, producer = self._snapshot_spec(kind, max_videos, max_comments_per_video)
+            if self.key_pool.is_low():
+                logger.info(f"API quota is low, skipping refresh of snapshot {key}")
+                continue
+            try:
+                logger.info(f"Refreshing snapshot {key}")
+                self.refresh_snapshot(key, producer)
+            except Exception as e:
+                logger.error(f"Error refreshing snapshot {key}: {e}")
+    
+    @coalesce
+    def get_chart_aggregates(self, max_videos=10, max_comments_per_video=50, use_cache=True, include_replies=False):
+        """Get per-video, per-day and per-sentiment totals for the charts
+        
+        With a store configured these come from the daily rollup index over
+        every stored comment of the selected videos, so cost scales with the
+        number of days rather than the number of comments. Stored replies are
+        counted only with include_replies.
+        """
+        if self.store is None:
+            return aggregate_comments(self.get_all_comments_data(max_videos, max_comments_per_video, use_cache, include_replies))
+        
+        key, producer = self._snapshot_spec('chart', max_videos, max_comments_per_video, include_replies)
+        if not use_cache or self.cache is None:
+            return producer()
+        return self._get_snapshot(key, producer)
+    
+    def _build_chart_aggregates(self, max_videos=10, max_comments_per_video=50, include_replies=False):
+        """Sync the store and sum its daily rollups for the selected videos"""
+        try:
+            self.sync_store(max_videos, max_comments_per_video)
+            return self.stored_chart_aggregates(max_videos, include_replies)
+        except Exception as e:
+            logger.error(f"Error in get_chart_aggregates: {e}")
+            return aggregate_comments({'video_comment_counts': {}, 'error': str(e)})
+    
+    def stored_chart_aggregates(self, max_videos=10, include_replies=False):
+        """Sum the stored daily rollups for the selected videos without syncing"""
+        seq = self.store.change_seq()
+        videos = self.store.get_videos(self.channel_id, max_videos, self._window_start())
+        video_ids = [video['videoId'] for video in videos]
+        with timed('aggregation_duration_seconds', 'aggregation', stage='rollups'):
+            rollups = self.store.get_rollup_aggregates(video_ids, include_replies=include_replies)
+        return dict(summarize_rollups(videos, rollups), cursor=make_cursor(seq, video_ids))
+    
+    @coalesce
+    def get_all_comments_data(self, max_videos=10, max_comments_per_video=50, use_cache=True, include_replies=False):
+        """Get all comments data for analysis, served from the latest shared snapshot"""
+        key, producer = self._snapshot_spec('all', max_videos, max_comments_per_video, include_replies)
+        if not use_cache or self.cache is None:
+            return producer()
+        return self._get_snapshot(key, producer)
+    
+    def sync_video_comments(self, video_id, max_comments=50, force=False, reply_budget=None):
+        """Pull only comments newer than the stored watermark for a video into the store
+        
+        Comments arrive newest first (order=time), so paging stops at the first
+        comment older than the newest one already stored. A video is fetched in
+        full when it has never been synced to the requested depth. With a
+        reply_budget, replies to the fetched comments are stored too.
+        """
+        due, published_after = self._video_sync_plan(video_id, max_comments, force)
+        if not due:
+            return 0
+        
+        fetched = 0
+        for batch in self.iter_comment_batches(video_id, max_comments, published_after, reply_budget=reply_budget):
+            self.store.save_comments(batch)
+            fetched += len(batch)
+        
+        self.store.mark_video_synced(video_id, max_comments)
+        logger.info(f"Synced {fetched} new comments for video {video_id}")
+        return fetched
+    
+    def _video_sync_plan(self, video_id, max_comments, force=False):
+        """(due, published_after) for syncing a video's comments, from its stored sync state
+        
+        A video synced to max_comments within STORE_SYNC_INTERVAL is not due,
+        nor is any synced video while quota is low. A video synced deep
+        enough resumes from its watermark; others are fetched in full.
+        """
+        synced_at, synced_depth, watermark = self.store.get_video_sync_state(video_id)
+        deep_enough = synced_depth >= max_comments
+        if not force and deep_enough and synced_at and time.time() - synced_at < STORE_SYNC_INTERVAL:
+            return False, None
+        if synced_at and self.key_pool.is_low('commentThreads'):
+            logger.info(f"API quota is low, serving stored comments for video {video_id}")
+            return False, None
+        return True, watermark if deep_enough else None
+    
+    def _video_list_due(self, max_videos, force=False):
+        """Whether sync_store should fetch the channel's latest videos, from the list's stored sync state"""
+        synced_at, depth = self.store.get_sync_state(f"videos:{self.channel_id}")
+        if synced_at and self.key_pool.is_low('search'):
+            logger.info("API quota is low, serving stored video list")
+            return False
+        return force or depth < max_videos or not synced_at or time.time() - synced_at >= STORE_SYNC_INTERVAL
+    
+    def _save_video_list(self, videos, max_videos):
+        """Store the fetched latest videos and mark the list synced to max_videos"""
+        if videos:
+            self.store.save_videos(self.channel_id, videos)
+            self.store.mark_synced(f"videos:{self.channel_id}", max_videos)
+    
+    @staticmethod
+    def _store_reply_budget():
+        """The ReplyBudget one store sync shares across its videos, or None without REPLY_EXPANSION"""
+        return ReplyBudget() if REPLY_EXPANSION == 'on' else None
+    
+    def sync_store(self, max_videos=10, max_comments_per_video=50, force=False):
+        """Refresh the store's video list and incrementally sync each video's comments
+        
+        With REPLY_EXPANSION=on, replies are synced too, all videos sharing one ReplyBudget.
+        """
+        if self._video_list_due(max_videos, force):
+            self._save_video_list(self.get_latest_videos(max_videos), max_videos)
+        
+        videos = self.store.get_videos(self.channel_id, max_videos, self._window_start())
+        reply_budget = self._store_reply_budget()
+        
+        def sync(video):
+            try:
+                return self.sync_video_comments(video['videoId'], max_comments_per_video, force, reply_budget)
+            except Exception as e:
+                logger.error(f"Error syncing comments for video {video['videoId']}: {e}")
+                return 0
+        
+        if self.max_workers == 1 or len(videos) <= 1:
+            return sum(sync(video) for video in videos)
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(videos))) as executor:
+            return sum(executor.map(with_request_timings(sync), videos))
+    
+    def search_comments(self, query='', sentiment=None, video_id=None, date_from=None, date_to=None, sort='date',
+                        page=1, per_page=20):
+        """Search the channel's stored comments through the store's inverted index, one page at a time
+        
+        A channel whose store has never synced gets an empty page flagged
+        syncing while the refresher runs its first sync; search never waits
+        on the YouTube API.
+        """
+        if self.store is None:
+            raise RuntimeError("Comment search needs the comment store")
+        synced_at, _ = self.store.get_sync_state(f"videos:{self.channel_id}")
+        if not synced_at:
+            if self.refresher is None:
+                self.sync_store()
+            else:
+                # The default chart snapshot's producer syncs the store
+                self.revalidate_snapshot('chart', 10, 50)
+                return {
+                    'comments': [],
+                    'sentiment_counts': {name: 0 for name in SENTIMENTS},
+                    'page': page,
+                    'per_page': per_page,
+                    'total': 0,
+                    'has_more': False,
+                    'syncing': True
+                }
+        
+        with timed('aggregation_duration_seconds', 'search', stage='search'):
+            batch, sentiment_counts = self.store.search_comments(
+                search_match_query(query), sentiment, video_id, self.channel_id, date_from, date_to,
+                sort, per_page, (page - 1) * per_page
+            )
+        total = sentiment_counts[sentiment] if sentiment else sum(sentiment_counts.values())
+        return {
+            'comments': batch.to_dicts(),
+            'sentiment_counts': sentiment_counts,
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'has_more': page * per_page < total,
+            'syncing': False
+        }
+    
+    def _delta_base(self, since, max_videos):
+        """(change sequence, videos) for a cursor that is still valid for the current video selection, else None
+        
+        A cursor is invalid once the selected videos change (a new upload or
+        one leaving the window) or the store is rebuilt, and the client then
+        needs a full payload.
+        """
+        if self.store is None or not since:
+            return None
+        try:
+            seq = int(since.partition('.')[0])
+        except ValueError:
+            return None
+        videos = self.store.get_videos(self.channel_id, max_videos, self._window_start())
+        if make_cursor(seq, [video['videoId'] for video in videos]) != since:
+            return None
+        return seq, videos
+    
+    def get_chart_delta(self, since, max_videos=10, max_comments_per_video=50, include_replies=False):
+        """Chart totals with only the days changed after a cursor, or None when the client needs a full payload
+        
+        Changed days carry their current totals, so applying a delta twice is
+        harmless; the per-video and overall totals are always current. The
+        chart snapshot is not read, only revalidated when stale.
+        """
+        current = self.store.change_seq() if self.store is not None else None
+        base = self._delta_base(since, max_videos)
+        if base is None or base[0] > current:
+            return None
+        self.revalidate_snapshot('chart', max_videos, max_comments_per_video, include_replies)
+        seq, videos = base
+        if seq == current:
+            return {'delta': True, 'changed': False, 'cursor': since}
+        
+        video_ids = [video['videoId'] for video in videos]
+        with timed('aggregation_duration_seconds', 'aggregation', stage='rollup_delta'):
+            rollups = self.store.get_rollup_aggregates(video_ids, include_replies=include_replies, changed_since=seq)
+        if not rollups['by_day']:
+            return {'delta': True, 'changed': False, 'cursor': make_cursor(current, video_ids)}
+        return dict(summarize_rollups(videos, rollups), delta=True, changed=True, cursor=make_cursor(current, video_ids))
+    
+    def get_comments_delta(self, since, max_videos=5, max_comments_per_video=20, include_replies=False):
+        """Comments saved or changed after a cursor, per video, or None when the client needs a full payload
+        
+        Reads only the changed rows, so a poll costs the same whatever the
+        snapshot's size; the snapshot is revalidated when stale but not read.
+        """
+        current = self.store.change_seq() if self.store is not None else None
+        base = self._delta_base(since, max_videos)
+        if base is None or base[0] > current:
+            return None
+        self.revalidate_snapshot('all', max_videos, max_comments_per_video, include_replies)
+        seq, videos = base
+        if seq == current:
+            return {'delta': True, 'changed': False, 'cursor': since}
+        
+        video_ids = [video['videoId'] for video in videos]
+        changed = self.store.get_changed_comments(video_ids, seq, max_comments_per_video, include_replies)
+        return {
+            'delta': True,
+            'changed': bool(changed),
+            'cursor': make_cursor(current, video_ids),
+            'videos': [video for video in videos if video['videoId'] in changed],
+            'comments': changed
+        }
+    
+    @coalesce
+    def get_window_aggregates(self, start_day, end_day, max_videos=10, max_comments_per_video=50, use_cache=True,
+                              include_replies=False):
+        """Chart aggregates for comments posted between two days, from the channel's time buckets
+        
+        Served as a snapshot like get_chart_aggregates. Totals and trends
+        cover every stored comment of the channel in the window, including
+        backfilled videos; the per-video counts cover the latest max_videos
+        videos published in it.
+        """
+        key, producer = self._window_spec(start_day, end_day, max_videos, max_comments_per_video, include_replies)
+        if not use_cache or self.cache is None:
+            return producer()
+        return self._get_snapshot(key, producer)
+    
+    def _window_spec(self, start_day, end_day, max_videos, max_comments_per_video, include_replies=False):
+        """(snapshot key, producer) for a window's chart aggregates"""
+        suffix = ':replies' if include_replies else ''
+        return (
+            f"chart_window:{self.channel_id}:{start_day}:{end_day}:{max_videos}:{max_comments_per_video}{suffix}",
+            lambda: self._build_window_aggregates(start_day, end_day, max_videos, max_comments_per_video, include_replies)
+        )
+    
+    def _build_window_aggregates(self, start_day, end_day, max_videos=10, max_comments_per_video=50, include_replies=False):
+        """Sync the store and sum the channel's time buckets for a window"""
+        try:
+            self.sync_store(max_videos, max_comments_per_video)
+            return self.stored_window_aggregates(start_day, end_day, max_videos, include_replies)
+        except Exception as e:
+            logger.error(f"Error in get_window_aggregates: {e}")
+            return aggregate_comments({'video_comment_counts': {}, 'error': str(e)})
+    
+    def stored_window_aggregates(self, start_day, end_day, max_videos=10, include_replies=False):
+        """Sum the channel's stored time buckets for a window without syncing"""
+        bucket = window_bucket(start_day, end_day)
+        with timed('aggregation_duration_seconds', 'aggregation', stage='window_buckets'):
+            buckets = self.store.get_window_aggregates(self.channel_id, start_day, end_day, bucket, include_replies)
+        end_exclusive = (datetime.strptime(end_day, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+        videos = self.store.get_videos(self.channel_id, max_videos, start_day, end_exclusive)
+        video_counts = self.store.get_video_counts([video['videoId'] for video in videos], start_day, end_day, include_replies)
+        return summarize_window(videos, video_counts, buckets, start_day, end_day, bucket)
+    
+    def _window_start(self):
+        """ISO timestamp of the start of the dashboard's video window"""
+        return (datetime.now(timezone.utc) - timedelta(days=VIDEO_WINDOW_DAYS)).strftime('%Y-%m-%dT%H:%M:%SZ')
+    
+    def stored_comments_data(self, max_videos=10, max_comments_per_video=50, include_replies=False):
+        """Comments data for the selected videos from the store without syncing"""
+        seq = self.store.change_seq()
+        videos = self.store.get_videos(self.channel_id, max_videos, self._window_start())
+        comments_per_video = [
+            self.store.get_comments(video['videoId'], max_comments_per_video, include_replies) for video in videos
+        ]
+        return dict(summarize_comments(videos, comments_per_video), cursor=make_cursor(seq, [video['videoId'] for video in videos]))
+    
+    def _fetch_all_comments_data(self, max_videos=10, max_comments_per_video=50, include_replies=False):
+        """Fetch all comments data for analysis, from the local store when one is configured"""
+        try:
+            if self.store is not None:
+                self.sync_store(max_videos, max_comments_per_video)
+                return self.stored_comments_data(max_videos, max_comments_per_video, include_replies)
+            
+            videos = self.get_latest_videos(max_videos)[:max_videos]
+            comments_per_video = self.get_comments_for_videos(videos, max_comments_per_video, include_replies)
+            return summarize_comments(videos, comments_per_video)
+            
+        except Exception as e:
+            logger.error(f"Error in get_all_comments_data: {e}")
+            return empty_comments_data(str(e))
+
+BING_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# YouTube video links in any common form, also when URL-encoded (Bing redirect targets) or HTML-escaped
+URL_SEPARATOR = r'(?:/|%2[Ff])'
+YOUTUBE_URL_PATTERN = re.compile(
+    rf"(?:youtube(?:-nocookie)?\.com{URL_SEPARATOR}"
+    rf"(?:watch(?:\?|%3[Ff])(?:[^\"'\s<>]*?(?:&|%26)(?:amp;)?)?v(?:=|%3[Dd])|(?:shorts|embed|live|v){URL_SEPARATOR})"
+    rf"|youtu\.be{URL_SEPARATOR})([A-Za-z0-9_-]+)"
+)
+
+class VideoIdScanner:
+    """Regex scan of a page fed in chunks that stops at the first YouTube video link
+    
+    Keeps a short tail of the previous chunk so links split across chunk
+    boundaries still match; a match running into the end of a chunk waits
+    for the next one (or finish()) in case the ID continues there.
+    """
+    
+    overlap = 512
+    
+    def __init__(self, max_chars=BING_SCAN_MAX_CHARS):
+        self.max_chars = max_chars
+        self.scanned = 0
+        self._tail = ''
+    
+    def feed(self, chunk):
+        """Scan the next chunk of text and return the video ID once one is found"""
+        window = self._tail + chunk
+        self.scanned += len(chunk)
+        match = YOUTUBE_URL_PATTERN.search(window)
+        if match and match.end() < len(window):
+            return match.group(1)
+        self._tail = window[match.start():] if match else window[-self.overlap:]
+        return None
+    
+    def finish(self):
+        """Return a video ID left pending at the end of the stream, if any"""
+        match = YOUTUBE_URL_PATTERN.search(self._tail)
+        return match.group(1) if match else None
+    
+    @property
+    def exhausted(self):
+        return self.scanned >= self.max_chars
+
+def find_video_id(html):
+    """Return the first YouTube video ID on a search results page"""
+    scanner = VideoIdScanner()
+    video_id = scanner.feed(html) or scanner.finish()
+    if not video_id:
+        raise ValueError("No YouTube video found in Bing search results")
+    return video_id
+
+def extract_video_id(video_url):
+    """Extract the video ID from a YouTube watch, youtu.be, shorts or embed URL, or a Bing URL wrapping one"""
+    for _ in range(3):
+        match = YOUTUBE_URL_PATTERN.search(video_url)
+        if match:
+            return match.group(1)
+        decoded = unquote(video_url)
+        if decoded == video_url:
+            break
+        video_url = decoded
+    raise ValueError("Invalid YouTube URL")
+
+def is_bing_url(video_url):
+    """Whether a URL is a Bing video search page that has to be scanned for its YouTube link"""
+    return 'bing.com/videos' in video_url
+
+def video_url_cache_key(video_url):
+    return f"video_url:{hashlib.blake2b(video_url.encode('utf-8'), digest_size=16).hexdigest()}"
+
+def summarize_rollups(videos, rollups):
+    """Build chart aggregates from the store's daily rollups for the selected videos"""
+    video_comment_counts = {}
+    for video in videos:
+        count = rollups['per_video'].get(video['videoId'], 0)
+        if count:
+            video_title_short = video['title'][:30] + ('...' if len(video['title']) > 30 else '')
+            video_comment_counts[video_title_short] = count
+    
+    total_comments = sum(rollups['sentiment_counts'].values())
+    return {
+        'video_comment_counts': video_comment_counts,
+        'comments_by_date': {day: sum(counts.values()) for day, counts in rollups['by_day'].items()},
+        'sentiment_by_date': rollups['by_day'],
+        'total_comments': total_comments,
+        'total_videos': len(video_comment_counts),
+        'sentiment_counts': rollups['sentiment_counts'],
+        'total_likes': rollups['total_likes'],
+        'avg_likes_per_comment': round(rollups['total_likes'] / total_comments, 2) if total_comments else 0
+    }
+
+def parse_window(window=None, date_from=None, date_to=None):
+    """(first day, last day) for a window like 7d, 12w, 6m or 1y, or a from/to date range; None when neither is given
+    
+    Raises ValueError for a malformed or oversized window.
+    """
+    today = datetime.now(timezone.utc).date()
+    if date_from or date_to:
+        if not date_from:
+            raise ValueError('from is required with to')
+        try:
+            start = datetime.strptime(date_from, '%Y-%m-%d').date()
+            end = datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else today
+        except ValueError:
+            raise ValueError('Dates must be YYYY-MM-DD')
+    elif window:
+        match = WINDOW_PATTERN.fullmatch(window.strip().lower())
+        if not match:
+            raise ValueError('window must look like 7d, 12w, 6m or 1y')
+        end = today
+        start = today - timedelta(days=int(match.group(1)) * WINDOW_UNIT_DAYS[match.group(2)] - 1)
+    else:
+        return None
+    
+    if start > end:
+        raise ValueError('The window must not end before it starts')
+    if (end - start).days >= MAX_WINDOW_DAYS:
+        raise ValueError(f"Windows are limited to {MAX_WINDOW_DAYS} days")
+    return start.isoformat(), end.isoformat()
+
+def window_bucket(start_day, end_day):
+    """Bucket size that keeps a window's trend at a few dozen points: days up to a month, weeks up to six months, then months"""
+    days = (datetime.strptime(end_day, '%Y-%m-%d') - datetime.strptime(start_day, '%Y-%m-%d')).days + 1
+    if days <= 31:
+        return 'day'
+    return 'week' if days <= 183 else 'month'
+
+def summarize_window(videos, video_counts, buckets, start_day, end_day, bucket):
+    """Build chart aggregates for a window from the channel's bucketed totals"""
+    video_comment_counts = {}
+    for video in videos:
+        count = video_counts.get(video['videoId'], 0)
+        if count:
+            video_title_short = video['title'][:30] + ('...' if len(video['title']) > 30 else '')
+            video_comment_counts[video_title_short] = count
+    
+    total_comments = sum(buckets['sentiment_counts'].values())
+    return {
+        'video_comment_counts': video_comment_counts,
+        'comments_by_date': {day: sum(counts.values()) for day, counts in buckets['by_bucket'].items()},
+        'sentiment_by_date': buckets['by_bucket'],
+        'total_comments': total_comments,
+        'total_videos': len(video_comment_counts),
+        'sentiment_counts': buckets['sentiment_counts'],
+        'total_likes': buckets['total_likes'],
+        'avg_likes_per_comment': round(buckets['total_likes'] / total_comments, 2) if total_comments else 0,
+        'window': {'from': start_day, 'to': end_day, 'bucket': bucket}
+    }
+
+def summarize_comments(videos, comments_per_video):
+    """Build the get_all_comments_data result from each video's scored comments
+    
+    Every comment is held once, in a single CommentBatch; each entry of
+    videos_with_comments points at its slice through commentRange.
+    """
+    comments = CommentBatch()
+    video_comment_counts = {}
+    videos_with_comments = []
+    
+    for video, video_comments in zip(videos, comments_per_video):
+        if video_comments:
+            start = len(comments)
+            comments.extend(video_comments)
+            video_title_short = video['title'][:30] + ('...' if len(video['title']) > 30 else '')
+            video_comment_counts[video_title_short] = len(comments) - start
+            videos_with_comments.append({
+                'title': video['title'],
+                'videoId': video['videoId'],
+                'publishedAt': video['publishedAt'],
+                'description': video.get('description', ''),
+                'thumbnail': video.get('thumbnail', ''),
+                'commentRange': [start, len(comments)],
+                'commentCount': len(comments) - start
+            })
+    
+    with timed('aggregation_duration_seconds', 'aggregation', stage='comments_summary'):
+        sentiment_counts = comments.sentiment_counts()
+        total_likes = comments.total_likes()
+    avg_likes_per_comment = total_likes / len(comments) if len(comments) else 0
+    
+    logger.info(f"Analysis complete: {len(comments)} comments from {len(videos_with_comments)} videos")
+    
+    return {
+        'total_comments': len(comments),
+        'total_replies': comments.reply_count(),
+        'video_comment_counts': video_comment_counts,
+        'comments': comments,
+        'videos_with_comments': videos_with_comments,
+        'total_videos': len(videos_with_comments),
+        'sentiment_counts': sentiment_counts,
+        'total_likes': total_likes,
+        'avg_likes_per_comment': round(avg_likes_per_comment, 2),
+        'processed_at': datetime.now().isoformat()
+    }
+
+def empty_comments_data(error):
+    """get_all_comments_data result for a failed fetch"""
+    return {
+        'total_comments': 0,
+        'video_comment_counts': {},
+        'comments': CommentBatch(),
+        'videos_with_comments': [],
+        'total_videos': 0,
+        'sentiment_counts': {'positive': 0, 'negative': 0, 'neutral': 0},
+        'total_likes': 0,
+        'avg_likes_per_comment': 0,
+        'error': error
+    }
+
+def aggregate_comments(data):
+    """Build chart aggregates by scanning a get_all_comments_data result once"""
+    comments_by_date = {}
+    sentiment_by_date = {}
+    comments = data.get('comments') or CommentBatch()
+    with timed('aggregation_duration_seconds', 'aggregation', stage='comment_scan'):
+        for date, code in zip(comments.dates, comments.sentiments):
+            date = date[:10]
+            comments_by_date[date] = comments_by_date.get(date, 0) + 1
+            if date not in sentiment_by_date:
+                sentiment_by_date[date] = {'positive': 0, 'negative': 0, 'neutral': 0}
+            sentiment_by_date[date][SENTIMENTS[code]] += 1
+    
+    aggregates = {
+        'video_comment_counts': data.get('video_comment_counts', {}),
+        'comments_by_date': comments_by_date,
+        'sentiment_by_date': sentiment_by_date,
+        'total_comments': data.get('total_comments', 0),
+        'total_videos': data.get('total_videos', 0),
+        'sentiment_counts': data.get('sentiment_counts', {'positive': 0, 'negative': 0, 'neutral': 0}),
+        'total_likes': data.get('total_likes', 0),
+        'avg_likes_per_comment': data.get('avg_likes_per_comment', 0)
+    }
+    if 'error' in data:
+        aggregates['error'] = data['error']
+    aggregates.update(snapshot_fields(data))
+    return aggregates
+
+def snapshot_fields(data):
+    """Pick the snapshot age and delta cursor fields to pass through to API responses"""
+    return {field: data[field] for field in ('snapshot_at', 'snapshot_age', 'stale', 'cursor') if field in data}
+
+def make_cursor(seq, video_ids):
+    """Opaque delta cursor pinning the store's change sequence and the selected video set"""
+    digest = hashlib.blake2b(','.join(sorted(video_ids)).encode('utf-8'), digest_size=6).hexdigest()
+    return f"{seq}.{digest}"
+
+def parse_channel_ids(spec):
+    """Parse comma-separated channel IDs, dropping blanks and repeats but keeping their order"""
+    return list(dict.fromkeys(channel_id.strip() for channel_id in spec.split(',') if channel_id.strip()))
+
+def channel_comparison_row(channel_id, aggregates):
+    """One channel's line in the cross-channel comparison, from its chart aggregates (None while pending)"""
+    if aggregates is None:
+        return {'channel_id': channel_id, 'pending': True}
+    counts = aggregates['sentiment_counts']
+    total = aggregates['total_comments']
+    row = {
+        'channel_id': channel_id,
+        'pending': False,
+        'total_comments': total,
+        'total_videos': aggregates['total_videos'],
+        'sentiment_counts': counts,
+        'sentiment_share': {sentiment: round(counts.get(sentiment, 0) / total, 4) if total else 0 for sentiment in SENTIMENTS},
+        'net_sentiment': round((counts.get('positive', 0) - counts.get('negative', 0)) / total, 4) if total else 0,
+        'total_likes': aggregates['total_likes'],
+        'avg_likes_per_comment': aggregates['avg_likes_per_comment']
+    }
+    if 'error' in aggregates:
+        row['error'] = aggregates['error']
+    row.update({field: aggregates[field] for field in ('snapshot_at', 'snapshot_age', 'stale') if field in aggregates})
+    return row
+
+def parse_refresh_combinations(spec):
+    """Parse 'kind:max_videos:max_comments' entries separated by commas"""
+    combinations = []
+    for entry in spec.split(','):
+        try:
+            kind, max_videos, max_comments = entry.strip().split(':')
+            combinations.append((kind, int(max_videos), int(max_comments)))
+        except ValueError:
+            logger.warning(f"Ignoring invalid refresh combination: {entry!r}")
+    return combinations
+
+class SnapshotRefresher:
+    """Rebuilds dashboard snapshots off the request path
+    
+    Stale snapshots are revalidated on a small thread pool; a lock in the
+    shared cache keeps several gunicorn workers from rebuilding the same one.
+    """
+    
+    def __init__(self, cache, max_workers=REFRESH_WORKERS, interval=REFRESH_INTERVAL, combinations=None, backfills=None):
+        self.cache = cache
+        self.backfills = backfills
+        self.interval = interval
+        self.combinations = combinations if combinations is not None else parse_refresh_combinations(REFRESH_COMBINATIONS)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='snapshot-refresh')
+        self._inflight = set()
+        self._lock = threading.Lock()
+        self._thread = None
+    
+    def schedule(self, key, producer):
+        """Queue a background rebuild of key unless one is already running somewhere"""
+        with self._lock:
+            if key in self._inflight:
+                return False
+            self._inflight.add(key)
+        
+        lock_name = f"refresh:{key}"
+        if not self.cache.try_lock(lock_name, HTTP_TIMEOUT * 4):
+            with self._lock:
+                self._inflight.discard(key)
+            return False
+        
+        def run():
+            try:
+                value = producer()
+                if 'error' not in value:
+                    self.cache.set(key, value, ttl_seconds=SNAPSHOT_MAX_AGE)
+            except Exception as e:
+                logger.error(f"Error refreshing snapshot {key}: {e}")
+            finally:
+                self.cache.release_lock(lock_name)
+                with self._lock:
+                    self._inflight.discard(key)
+        
+        self._executor.submit(run)
+        return True
+    
+    def refresh_channel(self, service):
+        """Pre-warm one channel's combinations unless another worker holds its lease this interval
+        
+        Leases run out a little before the next pass so the holder can renew
+        them; the channels therefore spread across refresh workers and stay put.
+        """
+        if not self.cache.try_lock(f"ingest:{service.channel_id}", self.interval * 0.8):
+            return False
+        service.refresh_snapshots(self.combinations)
+        if self.backfills is not None and service.store is not None:
+            state = service.store.get_backfill(service.channel_id)
+            if state is not None and state['status'] in BACKFILL_RESUMABLE:
+                self.backfills.submit(service)
+        return True
+    
+    def run_forever(self, services, max_workers=INGEST_WORKERS):
+        """Pre-warm the configured combinations for every channel every interval seconds"""
+        services = list(services)
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(services))), thread_name_prefix='ingest') as executor:
+            while True:
+                started = time.time()
+                refreshed = sum(executor.map(self.refresh_channel, services))
+                logger.info(f"Refreshed {refreshed} of {len(services)} channels in {time.time() - started:.1f}s")
+                time.sleep(max(0, self.interval - (time.time() - started)))
+    
+    def start(self, services):
+        """Run the pre-warm loop on a daemon thread inside this process"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run_forever, args=(services,), name='snapshot-prewarm', daemon=True)
+            self._thread.start()
+
+class ReportQueue:
+    """Builds export reports on a small thread pool so web workers only enqueue, poll and download
+    
+    Jobs run in the process that accepted them; their state lives in the
+    ReportJobStore, so polls and downloads can land on any worker. A
+    heartbeat thread renews the lease on this process's jobs, so jobs left
+    behind by a worker that died are failed once their lease lapses.
+    """
+    
+    def __init__(self, jobs, max_workers=REPORT_WORKERS):
+        self.jobs = jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='report')
+        self._active = set()
+        self._lock = threading.Lock()
+        self._heartbeat = None
+        jobs.expire_stale()
+    
+    def submit(self, spec, builder):
+        """Queue builder(spec, progress) unless a matching job is live or fresh; returns (job_id, created)"""
+        job_id, created = self.jobs.create(spec)
+        if created:
+            with self._lock:
+                self._active.add(job_id)
+                if self._heartbeat is None:
+                    self._heartbeat = threading.Thread(target=self._renew_leases, name='report-heartbeat', daemon=True)
+                    self._heartbeat.start()
+            self._executor.submit(self._run, job_id, spec, builder)
+        return job_id, created
+    
+    def _renew_leases(self):
+        while True:
+            time.sleep(self.jobs.lease_seconds / 3)
+            with self._lock:
+                job_ids = list(self._active)
+            if job_ids:
+                self.jobs.touch(job_ids)
+    
+    def _run(self, job_id, spec, builder):
         try:
-            videos = self.get_latest_videos(max_videos)
-            all_comments = []
-            video_comment_counts = {}
-            videos_with_comments = []
-            
-            for i, video in enumerate(videos[:max_videos]):
-                logger.info(f"Processing video {i+1}/{max_videos}: {video['title'][:50]}...")
-                comments = self.get_comments_for_video(video['videoId'], max_comments_per_video)
-                
-                if comments:
-                    video_title_short = video['title'][:30] + ('...' if len(video['title']) > 30 else '')
-                    video_comment_counts[video_title_short] = len(comments)
-                    videos_with_comments.append({
-                        'title': video['title'],
-                        'videoId': video['videoId'],
-                        'publishedAt': video['publishedAt'],
-                        'description': video.get('description', ''),
-                        'thumbnail': video.get('thumbnail', ''),
-                        'comments': comments,
-                        'commentCount': len(comments)
-                    })
-                    all_comments.extend(comments)
-            
-            sentiment_counts = {'positive': 0, 'negative': 0, 'neutral': 0}
-            for comment in all_comments:
-                sentiment_counts[comment['sentiment']] += 1
-            
-            total_likes = sum(comment['likeCount'] for comment in all_comments)
-            avg_likes_per_comment = total_likes / len(all_comments) if all_comments else 0
-            
-            logger.info(f"Analysis complete: {len(all_comments)} comments from {len(videos_with_comments)} videos")
-            
-            return {
-                'total_comments': len(all_comments),
-                'video_comment_counts': video_comment_counts,
-                'comments': all_comments,
-                'videos_with_comments': videos_with_comments,
-                'total_videos': len(videos_with_comments),
-                'sentiment_counts': sentiment_counts,
-                'total_likes': total_likes,
-                'avg_likes_per_comment': round(avg_likes_per_comment, 2),
-                'processed_at': datetime.now().isoformat()
-            }
-            
+            self._build(job_id, spec, builder)
+        finally:
+            with self._lock:
+                self._active.discard(job_id)
+    
+    def _build(self, job_id, spec, builder):
+        self.jobs.update(job_id, status='running')
+        started = time.perf_counter()
+        try:
+            content = builder(spec, lambda completed: self.jobs.update(job_id, completed=completed))
+            path = os.path.join(self.jobs.report_dir, f"{job_id}.docx")
+            with open(f"{path}.tmp", 'wb') as f:
+                f.write(content)
+            os.replace(f"{path}.tmp", path)
+            self.jobs.update(job_id, status='done', path=path)
+            outcome = 'done'
         except Exception as e:
-            logger.error(f"Error in get_all_comments_data: {e}")
-            return {
-                'total_comments': 0,
-                'video_comment_counts': {},
-                'comments': [],
-                'videos_with_comments': [],
-                'total_videos': 0,
-                'sentiment_counts': {'positive': 0, 'negative': 0, 'neutral': 0},
-                'total_likes': 0,
-                'avg_likes_per_comment': 0,
-                'error': str(e)
-            }
+            logger.error(f"Error building report {job_id}: {e}")
+            self.jobs.update(job_id, status='failed', error=str(e))
+            outcome = 'failed'
+        metrics.observe('report_job_duration_seconds', time.perf_counter() - started, outcome=outcome)
+
+class BackfillRunner:
+    """Runs channel backfills on a small thread pool, one run per channel at a time in this process
+    
+    Progress is checkpointed in the comment store after every playlist page,
+    so a backfill cut short by a restart or a quota pause resumes where it
+    stopped the next time its channel is submitted; the refresh worker
+    resubmits unfinished ones every interval.
+    """
+    
+    def __init__(self, max_workers=1):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='backfill')
+        self._inflight = set()
+        self._lock = threading.Lock()
+    
+    def submit(self, service):
+        """Queue runs of a channel's backfill until it finishes or pauses, unless one is already queued here"""
+        with self._lock:
+            if service.channel_id in self._inflight:
+                return False
+            self._inflight.add(service.channel_id)
+        
+        def run():
+            try:
+                state = service.run_backfill()
+                while state is not None and state['status'] == 'running':
+                    state = service.run_backfill()
+            except Exception as e:
+                logger.error(f"Error running backfill for channel {service.channel_id}: {e}")
+            finally:
+                with self._lock:
+                    self._inflight.discard(service.channel_id)
+        
+        self._executor.submit(run)
+        return True
+
+class ChannelRegistry:
+    """One YouTubeCommentsService per monitored channel, all sharing a cache, store, refresher and key pool
+    
+    Each channel gets an equal share of the pool's quota and its own cap on
+    concurrent API calls; snapshots, cursors and coalescing are already keyed
+    by channel, so channels never wait on each other's requests.
+    """
+    
+    def __init__(self, channel_ids, cache=None, store=None, refresher=None, key_pool=None):
+        self.channel_ids = list(channel_ids) or [CHANNEL_ID]
+        self.key_pool = key_pool if key_pool is not None else ApiKeyPool([YOUTUBE_API_KEY_1, YOUTUBE_API_KEY_2], cache=cache)
+        share = 1 / len(self.channel_ids)
+        self.services = {
+            channel_id: YouTubeCommentsService(cache=cache, store=store, refresher=refresher, key_pool=self.key_pool,
+                                               channel_id=channel_id, quota_share=share)
+            for channel_id in self.channel_ids
+        }
+        self.default = self.services[self.channel_ids[0]]
+    
+    def __iter__(self):
+        return iter(self.services.values())
+    
+    def __len__(self):
+        return len(self.services)
+    
+    def get(self, channel_id=None):
+        """The service for a channel, the default one when channel_id is empty, or None when it is not monitored"""
+        if not channel_id:
+            return self.default
+        return self.services.get(channel_id)
+    
+    def compare(self, max_videos=10, max_comments_per_video=50, include_replies=False):
+        """Side-by-side sentiment and engagement totals for every channel, read from their current snapshots
+        
+        Channels are read in parallel and never block on a build; one whose
+        snapshot does not exist yet is queued and reported as pending.
+        """
+        def row(service):
+            try:
+                aggregates = service.current_chart_aggregates(max_videos, max_comments_per_video, include_replies)
+            except Exception as e:
+                logger.error(f"Error comparing channel {service.channel_id}: {e}")
+                aggregates = aggregate_comments({'error': str(e)})
+            return channel_comparison_row(service.channel_id, aggregates)
+        
+        services = list(self)
+        with timed('aggregation_duration_seconds', 'aggregation', stage='channel_compare'):
+            if len(services) == 1:
+                rows = [row(services[0])]
+            else:
+                with ThreadPoolExecutor(max_workers=min(COMPARE_WORKERS, len(services))) as executor:
+                    rows = list(executor.map(with_request_timings(row), services))
+        
+        ready = [r for r in rows if not r['pending']]
+        total = sum(r['total_comments'] for r in ready)
+        counts = {sentiment: sum(r['sentiment_counts'].get(sentiment, 0) for r in ready) for sentiment in SENTIMENTS}
+        return {
+            'channels': rows,
+            'totals': {
+                'channels': len(rows),
+                'pending': len(rows) - len(ready),
+                'total_comments': total,
+                'sentiment_counts': counts,
+                'net_sentiment': round((counts['positive'] - counts['negative']) / total, 4) if total else 0
+            },
+            'ranking': [r['channel_id'] for r in sorted(ready, key=lambda r: r['net_sentiment'], reverse=True)]
+        }
+
+# Initialize the services, one per monitored channel
+shared_cache = SharedCache()
+backfill_runner = BackfillRunner()
+snapshot_refresher = SnapshotRefresher(shared_cache, backfills=backfill_runner)
+channels = ChannelRegistry(parse_channel_ids(CHANNEL_IDS), cache=shared_cache, store=CommentStore(), refresher=snapshot_refresher)
+youtube_service = channels.default
+if BACKGROUND_REFRESH == 'thread':
+    snapshot_refresher.start(channels)
+report_queue = ReportQueue(ReportJobStore())
+admission = AdmissionController(parse_admission_limits(ADMISSION_LIMITS)) if ADMISSION_CONTROL == 'on' else None
 
-# Initialize the service
-youtube_service = YouTubeCommentsService()
+def comment_themes(comments, sentiment_type, limit=5):
+    """Rank themes for one sentiment from in-memory comments, using all of them as the baseline"""
+    term_counts = Counter()
+    baseline_counts = Counter()
+    scope_total = 0
+    for comment in comments:
+        terms = extract_terms(comment['comment'])
+        baseline_counts.update(terms)
+        if comment['sentiment'] == sentiment_type:
+            term_counts.update(terms)
+            scope_total += 1
+    return [term for term, _, _ in rank_themes(term_counts, scope_total, baseline_counts, len(comments), limit)]
+
+def channel_analysis_input(data):
+    """Analysis input covering the dashboard's recent videos, from a get_all_comments_data result"""
+    return {
+        'title': f"{data['total_videos']} recent channel videos",
+        'comments': data['comments'].to_dicts()
+    }
 
 # AI Analysis Function
-def generate_ai_analysis(video_data, sentiment_type='negative'):
-    """Generate detailed AI analysis for specified sentiment comments of a video"""
+def generate_ai_analysis(video_data, sentiment_type='negative', themes=None):
+    """Generate detailed AI analysis for specified sentiment comments of a video
+    
+    themes come from the term index when given; otherwise they are ranked from
+    the supplied comments against all of the video's comments.
+    """
     try:
         comments = [c for c in video_data['comments'] if c['sentiment'] == sentiment_type]
         if not comments:
@@ -365,13 +3847,8 @@ def generate_ai_analysis(video_data, sentiment_type='negative'):
         }]
         
         # Extract themes from comments
-        words = []
-        for comment in comments:
-            cleaned_text = re.sub(r'[^\w\s]', '', comment['comment'].lower())
-            words.extend(cleaned_text.split())
-        
-        common_words = Counter(words).most_common(20)
-        themes = [word for word, count in common_words if len(word) > 3 and word not in ['this', 'that', 'with', 'from', 'have', 'they', 'video', 'like', 'dont']]
+        if themes is None:
+            themes = comment_themes(video_data['comments'], sentiment_type)
         
         # Generate recommendations based on sentiment type
         recommendations = []
@@ -417,6 +3894,325 @@ def generate_ai_analysis(video_data, sentiment_type='negative'):
             'error': str(e)
         }
 
+def build_chart_payload(data):
+    """Format chart aggregates into the pie, bar, trend and summary blocks the dashboard draws"""
+    video_counts = data['video_comment_counts']
+    sorted_videos = sorted(video_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+    
+    pie_data = {
+        'labels': [video[0] for video in sorted_videos],
+        'values': [video[1] for video in sorted_videos],
+        'colors': ['#FF0000', '#00b894', '#fdcb6e', '#54A0FF', '#5F27CD', 
+                  '#FF9FF3', '#96CEB4', '#FECA57', '#45B7D1', '#FF9F43'][:len(sorted_videos)]
+    }
+    
+    # A window's buckets already span exactly the requested range
+    window = data.get('window')
+    sorted_dates = sorted(data['comments_by_date'].items())
+    if window is None:
+        sorted_dates = sorted_dates[-30:]
+    
+    bar_data = {
+        'labels': [item[0] for item in sorted_dates],
+        'values': [item[1] for item in sorted_dates]
+    }
+    
+    sentiment_by_date = data['sentiment_by_date']
+    sentiment_trend = {
+        'dates': sorted(sentiment_by_date.keys())[-14:] if window is None else sorted(sentiment_by_date.keys()),
+        'positive': [],
+        'negative': [],
+        'neutral': []
+    }
+    
+    for date in sentiment_trend['dates']:
+        day_data = sentiment_by_date.get(date, {'positive': 0, 'negative': 0, 'neutral': 0})
+        sentiment_trend['positive'].append(day_data['positive'])
+        sentiment_trend['negative'].append(day_data['negative'])
+        sentiment_trend['neutral'].append(day_data['neutral'])
+    
+    return {
+        'pie_chart': pie_data,
+        'bar_chart': bar_data,
+        'sentiment_trend': sentiment_trend,
+        'summary': {
+            'total_comments': data['total_comments'],
+            'total_videos': data['total_videos'],
+            'sentiment_counts': data['sentiment_counts'],
+            'total_likes': data.get('total_likes', 0),
+            'avg_likes_per_comment': data.get('avg_likes_per_comment', 0)
+        },
+        **({'window': window} if window is not None else {}),
+        **snapshot_fields(data)
+    }
+
+def build_chart_delta(delta):
+    """Format a get_chart_delta result like build_chart_payload; bar and trend entries cover only the changed days"""
+    if not delta['changed']:
+        return {'delta': True, 'changed': False, 'cursor': delta['cursor']}
+    return dict(build_chart_payload(delta), delta=True, changed=True)
+
+def build_sentiment_delta(delta):
+    """Format a get_comments_delta result with the changed comments of each video that has any"""
+    payload = {'delta': True, 'changed': delta['changed'], 'cursor': delta['cursor']}
+    if delta['changed']:
+        payload['videos_with_comments'] = [
+            dict(video, comments=delta['comments'][video['videoId']].to_dicts()) for video in delta['videos']
+        ]
+    return payload
+
+def build_sentiment_payload(data, view='full'):
+    """Format get_all_comments_data output with up to 10 sample comments per sentiment
+    
+    This is where the CommentBatch is materialized into per-video comment
+    dicts; view='summary' skips them and sends only per-video counts.
+    """
+    comments = data['comments']
+    sample_comments = {sentiment: [] for sentiment in SENTIMENTS}
+    with timed('aggregation_duration_seconds', 'aggregation', stage='sample_comments'):
+        for sentiment, samples in sample_comments.items():
+            index = comments.find(sentiment)
+            while index != -1 and len(samples) < 10:
+                samples.append({
+                    'author': comments.authors[index],
+                    'comment': comments.texts[index][:200],
+                    'likeCount': comments.likes[index],
+                    'date': comments.dates[index],
+                    'videoId': comments.video_id(index)
+                })
+                index = comments.find(sentiment, index + 1)
+    
+    videos_with_comments = []
+    for video in data['videos_with_comments']:
+        video = dict(video)
+        start, stop = video.pop('commentRange')
+        video['sentiment_counts'] = comments.sentiment_counts(start, stop)
+        if view == 'full':
+            video['comments'] = comments.to_dicts(start, stop)
+        videos_with_comments.append(video)
+    
+    return {
+        'videos_with_comments': videos_with_comments,
+        'sentiment_summary': data['sentiment_counts'],
+        'sample_comments': sample_comments,
+        'total_comments': data['total_comments'],
+        'total_replies': data.get('total_replies', 0),
+        'total_videos': data['total_videos'],
+        'total_likes': data.get('total_likes', 0),
+        'avg_likes_per_comment': data.get('avg_likes_per_comment', 0),
+        **snapshot_fields(data)
+    }
+
+@app.before_request
+def start_request_timing():
+    """Start the per-request stage timing breakdown"""
+    request.environ['car_sense.started'] = time.perf_counter()
+    request.environ['car_sense.timings_token'] = current_timings.set(RequestTimings())
+
+@app.after_request
+def record_request_timing(response):
+    """Record route latency and expose the stage breakdown as a Server-Timing header"""
+    started = request.environ.get('car_sense.started')
+    if started is None:
+        return response
+    
+    elapsed = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.observe('http_request_duration_seconds', elapsed, route=route, method=request.method, status=response.status_code)
+    if response.status_code >= 500:
+        metrics.inc('http_request_errors_total', route=route)
+    
+    timings = current_timings.get()
+    breakdown = timings.server_timing() if timings is not None else ''
+    response.headers['Server-Timing'] = ', '.join(part for part in (breakdown, f'total;dur={elapsed * 1000:.1f}') if part)
+    return response
+
+@app.teardown_request
+def reset_request_timing(error=None):
+    """Drop the request's timing context"""
+    token = request.environ.pop('car_sense.timings_token', None)
+    if token is not None:
+        try:
+            current_timings.reset(token)
+        except ValueError:
+            current_timings.set(None)
+
+def dumps_json(payload):
+    """Serialize to compact UTF-8 JSON bytes, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def parse_fields(value):
+    """Parse a comma-separated fields parameter into a set, or None for all fields"""
+    fields = {field.strip() for field in (value or '').split(',') if field.strip()}
+    return fields or None
+
+def parse_flag(value):
+    """Read a boolean query parameter such as include_replies=1"""
+    return (value or '').lower() in ('1', 'true', 'yes', 'on')
+
+def select_fields(payload, fields):
+    """Keep only the requested top-level fields (snapshot fields always pass through)"""
+    if not fields:
+        return payload
+    return {key: value for key, value in payload.items() if key in fields or key in ('snapshot_at', 'snapshot_age', 'stale', 'cursor')}
+
+def snapshot_etag(route, data, query_args):
+    """Weak ETag derived from the snapshot behind a response and the query that shaped it
+    
+    Weak because the body also carries snapshot_age, which changes between
+    otherwise identical responses. Returns None when the data is not a
+    stored snapshot, in which case a strong ETag is computed from the
+    serialized body instead.
+    """
+    if 'snapshot_at' not in data or 'error' in data:
+        return None
+    query = '&'.join(f"{name}={value}" for name, value in sorted(query_args))
+    basis = f"{route}|{data['snapshot_at']}|{data.get('stale')}|{query}"
+    return hashlib.blake2b(basis.encode('utf-8'), digest_size=16).hexdigest()
+
+def matching_etag(if_none_match, etag):
+    """The tag among etag and its encoded variants that an If-None-Match header covers, or None (weak comparison, per RFC 9110)
+    
+    A 304 carries the returned variant, the tag the client's cached 200 was sent with.
+    """
+    for tag in (etag, f"{etag}-gzip", f"{etag}-br"):
+        if if_none_match.contains_weak(tag):
+            return tag
+    return None
+
+def not_modified(etag, weak=False):
+    """304 response for a matching conditional request, tagged with the variant that matched"""
+    response = Response(status=304)
+    response.set_etag(etag, weak)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def negotiate_encoding(accept_encoding):
+    """Pick br (when brotli is installed) or gzip from an Accept-Encoding header value"""
+    offered = {}
+    for part in (accept_encoding or '').lower().split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        offered[name.strip()] = quality
+    for encoding in (('br', 'gzip') if brotli is not None else ('gzip',)):
+        if offered.get(encoding, offered.get('*', 0)) > 0:
+            return encoding
+    return None
+
+def compress_body(body, encoding):
+    """Compress a response body with the negotiated encoding"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=min(COMPRESS_LEVEL, 11))
+    return gzip.compress(body, compresslevel=COMPRESS_LEVEL)
+
+def json_response(payload, route, etag=None):
+    """Serialize a payload with the fast encoder and tag it for conditional requests
+    
+    A given etag is a snapshot ETag and is sent weak; without one, a strong
+    ETag is computed from the body.
+    """
+    with timed('serialization_duration_seconds', 'serialization', route=route):
+        body = dumps_json(payload)
+    weak = etag is not None
+    if etag is None:
+        etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+    matched = matching_etag(request.if_none_match, etag)
+    if matched:
+        return not_modified(matched, weak)
+    
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag, weak)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def client_key(remote_addr, forwarded_for=None):
+    """Identify a client for rate limiting, by the first X-Forwarded-For hop when the proxy is trusted"""
+    if TRUST_FORWARDED_FOR == 'on' and forwarded_for:
+        return forwarded_for.split(',')[0].strip()
+    return remote_addr or 'unknown'
+
+def admit(route, produce, fallback=None):
+    """Run produce() in an admission slot for the current request; returns (value, rejection)
+    
+    A refused request gets fallback()'s cached value instead, with the
+    AdmissionRejected as rejection. Without a cached value the rejection is
+    raised for the route to answer with too_many_requests.
+    """
+    if admission is None:
+        return produce(), None
+    try:
+        with admission.slot(route, client_key(request.remote_addr, request.headers.get('X-Forwarded-For'))):
+            return produce(), None
+    except AdmissionRejected as e:
+        value = shed_fallback(route, fallback, e)
+        if value is None:
+            raise
+        return value, e
+
+def shed_fallback(route, fallback, rejection):
+    """Cached value for a refused request, or None; records the rejection either way"""
+    value = None
+    if fallback is not None:
+        try:
+            value = fallback()
+        except Exception as e:
+            logger.error(f"Error reading fallback for {route}: {e}")
+    metrics.inc('admission_rejections_total', route=route, reason=rejection.reason, response='429' if value is None else 'stale')
+    return value
+
+def with_retry_after(response, rejection):
+    """Tag a response served in place of a refused request with Retry-After"""
+    if rejection is not None:
+        response.headers['Retry-After'] = str(rejection.retry_after)
+    return response
+
+def too_many_requests(rejection):
+    """429 for a refused request that has no cached fallback"""
+    response = jsonify({'error': 'Too many requests, please retry later', 'reason': rejection.reason, 'retry_after': rejection.retry_after})
+    response.status_code = 429
+    return with_retry_after(response, rejection)
+
+@app.after_request
+def compress_response(response):
+    """gzip or brotli encode buffered text responses for clients that accept it"""
+    if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+            or response.status_code in (204, 304) or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+    body = response.get_data()
+    if encoding is None or len(body) < COMPRESS_MIN_BYTES:
+        return response
+    
+    with timed('compression_duration_seconds', 'compression', encoding=encoding):
+        response.set_data(compress_body(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
+
+def last_chart_aggregates(max_videos, max_comments_per_video, include_replies=False, channel_id=None):
+    """Chart aggregates from the last stored snapshot, marked stale, or None"""
+    service = channels.get(channel_id)
+    if service.store is not None:
+        return service.last_snapshot('chart', max_videos, max_comments_per_video, include_replies)
+    data = service.last_snapshot('all', max_videos, max_comments_per_video, include_replies)
+    return aggregate_comments(data) if data is not None else None
+
+def unknown_channel(channel_id):
+    """404 for a channel parameter naming a channel this deployment does not monitor"""
+    return jsonify({'error': f"Unknown channel: {channel_id}"}), 404
+
 @app.route('/')
 def dashboard():
     """Main dashboard page"""
@@ -426,72 +4222,66 @@ def dashboard():
         logger.error("Template 'index.html' not found in templates directory")
         return jsonify({'error': 'Template index.html not found'}), 500
 
+@app.route('/videos')
+def videos_page():
+    """Video browser page"""
+    try:
+        return render_template('videos.html')
+    except TemplateNotFound:
+        logger.error("Template 'videos.html' not found in templates directory")
+        return jsonify({'error': 'Template videos.html not found'}), 500
+
 @app.route('/api/chart-data')
 def get_chart_data():
     """Get data formatted for charts"""
     max_videos = request.args.get('max_videos', 10, type=int)
     max_comments = request.args.get('max_comments', 50, type=int)
     
+    fields = parse_fields(request.args.get('fields'))
+    include_replies = parse_flag(request.args.get('include_replies'))
+    since = request.args.get('since')
+    
     max_videos = min(max(max_videos, 1), 20)
     max_comments = min(max(max_comments, 10), 100)
+    channel_id = request.args.get('channel')
+    service = channels.get(channel_id)
+    if service is None:
+        return unknown_channel(channel_id)
+    try:
+        window = parse_window(request.args.get('window'), request.args.get('from'), request.args.get('to'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if window is not None and service.store is None:
+        return jsonify({'error': 'Time windows need the comment store'}), 400
     
     try:
-        data = youtube_service.get_all_comments_data(max_videos, max_comments)
-        
-        video_counts = data['video_comment_counts']
-        sorted_videos = sorted(video_counts.items(), key=lambda x: x[1], reverse=True)[:10]
-        
-        pie_data = {
-            'labels': [video[0] for video in sorted_videos],
-            'values': [video[1] for video in sorted_videos],
-            'colors': ['#FF0000', '#00b894', '#fdcb6e', '#54A0FF', '#5F27CD', 
-                      '#FF9FF3', '#96CEB4', '#FECA57', '#45B7D1', '#FF9F43'][:len(sorted_videos)]
-        }
-        
-        comments_by_date = {}
-        for comment in data['comments']:
-            date = comment['date'][:10]
-            comments_by_date[date] = comments_by_date.get(date, 0) + 1
-        
-        sorted_dates = sorted(comments_by_date.items())[-30:]
-        
-        bar_data = {
-            'labels': [item[0] for item in sorted_dates],
-            'values': [item[1] for item in sorted_dates]
-        }
+        if since and window is None:
+            # Answer from the store before touching the snapshot; only a cursor that no longer applies gets a full payload
+            delta, _ = admit('chart-data', lambda: service.get_chart_delta(since, max_videos, max_comments, include_replies))
+            if delta is not None:
+                return json_response(select_fields(build_chart_delta(delta), fields), 'chart-data')
+        if window is not None:
+            data, rejection = admit(
+                'chart-data',
+                lambda: service.get_window_aggregates(*window, max_videos, max_comments, include_replies=include_replies)
+            )
+        else:
+            data, rejection = admit(
+                'chart-data',
+                lambda: service.get_chart_aggregates(max_videos, max_comments, include_replies=include_replies),
+                lambda: last_chart_aggregates(max_videos, max_comments, include_replies, channel_id)
+            )
+        etag = snapshot_etag('chart-data', data, request.args.items(multi=True))
+        matched = matching_etag(request.if_none_match, etag) if etag is not None else None
+        if matched:
+            return with_retry_after(not_modified(matched, weak=True), rejection)
         
-        sentiment_by_date = {}
-        for comment in data['comments']:
-            date = comment['date'][:10]
-            if date not in sentiment_by_date:
-                sentiment_by_date[date] = {'positive': 0, 'negative': 0, 'neutral': 0}
-            sentiment_by_date[date][comment['sentiment']] += 1
-        
-        sentiment_trend = {
-            'dates': sorted(sentiment_by_date.keys())[-14:],
-            'positive': [],
-            'negative': [],
-            'neutral': []
-        }
+        with timed('aggregation_duration_seconds', 'aggregation', stage='chart_format'):
+            payload = select_fields(build_chart_payload(data), fields)
         
-        for date in sentiment_trend['dates']:
-            day_data = sentiment_by_date.get(date, {'positive': 0, 'negative': 0, 'neutral': 0})
-            sentiment_trend['positive'].append(day_data['positive'])
-            sentiment_trend['negative'].append(day_data['negative'])
-            sentiment_trend['neutral'].append(day_data['neutral'])
-        
-        return jsonify({
-            'pie_chart': pie_data,
-            'bar_chart': bar_data,
-            'sentiment_trend': sentiment_trend,
-            'summary': {
-                'total_comments': data['total_comments'],
-                'total_videos': data['total_videos'],
-                'sentiment_counts': data['sentiment_counts'],
-                'total_likes': data.get('total_likes', 0),
-                'avg_likes_per_comment': data.get('avg_likes_per_comment', 0)
-            }
-        })
+        return with_retry_after(json_response(payload, 'chart-data', etag), rejection)
+    except AdmissionRejected as e:
+        return too_many_requests(e)
     except Exception as e:
         logger.error(f"Error in get_chart_data: {e}")
         return jsonify({
@@ -504,33 +4294,40 @@ def get_sentiment_data():
     max_videos = request.args.get('max_videos', 5, type=int)
     max_comments = request.args.get('max_comments', 20, type=int)
     
+    view = request.args.get('view', 'full')
+    fields = parse_fields(request.args.get('fields'))
+    include_replies = parse_flag(request.args.get('include_replies'))
+    since = request.args.get('since')
+    
     max_videos = min(max(max_videos, 1), 10)
     max_comments = min(max(max_comments, 10), 50)
+    if view not in ['full', 'summary']:
+        return jsonify({'error': 'Invalid view'}), 400
+    channel_id = request.args.get('channel')
+    service = channels.get(channel_id)
+    if service is None:
+        return unknown_channel(channel_id)
     
     try:
-        data = youtube_service.get_all_comments_data(max_videos, max_comments)
-        
-        sample_comments = {'positive': [], 'negative': [], 'neutral': []}
-        for comment in data['comments']:
-            sentiment = comment['sentiment']
-            if len(sample_comments[sentiment]) < 10:
-                sample_comments[sentiment].append({
-                    'author': comment['author'],
-                    'comment': comment['comment'][:200],
-                    'likeCount': comment['likeCount'],
-                    'date': comment['date'],
-                    'videoId': comment['videoId']
-                })
+        if since and view == 'full':
+            # Answer from the store before loading the snapshot; only a cursor that no longer applies gets a full payload
+            delta, _ = admit('sentiment-data', lambda: service.get_comments_delta(since, max_videos, max_comments, include_replies))
+            if delta is not None:
+                return json_response(select_fields(build_sentiment_delta(delta), fields), 'sentiment-data')
+        data, rejection = admit(
+            'sentiment-data',
+            lambda: service.get_all_comments_data(max_videos, max_comments, include_replies=include_replies),
+            lambda: service.last_snapshot('all', max_videos, max_comments, include_replies)
+        )
+        etag = snapshot_etag('sentiment-data', data, request.args.items(multi=True))
+        matched = matching_etag(request.if_none_match, etag) if etag is not None else None
+        if matched:
+            return with_retry_after(not_modified(matched, weak=True), rejection)
         
-        return jsonify({
-            'videos_with_comments': data['videos_with_comments'],
-            'sentiment_summary': data['sentiment_counts'],
-            'sample_comments': sample_comments,
-            'total_comments': data['total_comments'],
-            'total_videos': data['total_videos'],
-            'total_likes': data.get('total_likes', 0),
-            'avg_likes_per_comment': data.get('avg_likes_per_comment', 0)
-        })
+        payload = select_fields(build_sentiment_payload(data, view), fields)
+        return with_retry_after(json_response(payload, 'sentiment-data', etag), rejection)
+    except AdmissionRejected as e:
+        return too_many_requests(e)
     except Exception as e:
         logger.error(f"Error in get_sentiment_data: {e}")
         return jsonify({
@@ -539,44 +4336,442 @@ def get_sentiment_data():
 
 @app.route('/api/video-details/<video_id>')
 def get_video_details(video_id):
-    """Get detailed information about a specific video"""
+    """Get detailed information about a specific video, paging through high-volume threads"""
     max_comments = request.args.get('max_comments', 100, type=int)
+    published_after = request.args.get('published_after')
+    quota_budget = request.args.get('quota_budget', type=int)
+    
+    max_comments = min(max(max_comments, 1), MAX_COMMENTS_PER_VIDEO)
+    channel_id = request.args.get('channel')
+    service = channels.get(channel_id)
+    if service is None:
+        return unknown_channel(channel_id)
     
     try:
-        comments = youtube_service.get_comments_for_video(video_id, max_comments)
-        
+        comments = []
         sentiment_counts = {'positive': 0, 'negative': 0, 'neutral': 0}
-        for comment in comments:
-            sentiment_counts[comment['sentiment']] += 1
+        total_likes = 0
+        for batch in service.iter_comment_batches(video_id, max_comments, published_after, quota_budget):
+            for comment in batch:
+                sentiment_counts[comment['sentiment']] += 1
+                total_likes += comment['likeCount']
+            comments.extend(batch)
         
-        return jsonify({
+        return json_response({
             'video_id': video_id,
             'comments': comments,
             'comment_count': len(comments),
             'sentiment_counts': sentiment_counts,
-            'total_likes': sum(comment['likeCount'] for comment in comments)
-        })
+            'total_likes': total_likes
+        }, 'video-details')
     except Exception as e:
         logger.error(f"Error getting video details for {video_id}: {e}")
         return jsonify({
             'error': str(e)
         }), 500
 
+@app.route('/api/video-details')
+def get_video_details_batch():
+    """Get metadata and statistics for a comma-separated list of video IDs"""
+    video_ids = [video_id.strip() for video_id in request.args.get('ids', '').split(',') if video_id.strip()]
+    
+    if not video_ids:
+        return jsonify({'error': 'ids parameter is required'}), 400
+    if len(video_ids) > 200:
+        return jsonify({'error': 'At most 200 video IDs per request'}), 400
+    channel_id = request.args.get('channel')
+    service = channels.get(channel_id)
+    if service is None:
+        return unknown_channel(channel_id)
+    
+    try:
+        metadata = service.get_video_metadata(video_ids)
+        return jsonify({
+            'videos': [metadata[video_id] for video_id in video_ids if video_id in metadata],
+            'missing': [video_id for video_id in video_ids if video_id not in metadata]
+        })
+    except Exception as e:
+        logger.error(f"Error getting video details batch: {e}")
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+@app.route('/api/videos')
+def get_videos():
+    """Paginated list of recent channel videos with view, like and comment counts"""
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 12, type=int), 1), 50)
+    channel_id = request.args.get('channel')
+    service = channels.get(channel_id)
+    if service is None:
+        return unknown_channel(channel_id)
+    
+    try:
+        videos = service.get_channel_videos(50)
+        page_videos = videos[(page - 1) * per_page:page * per_page]
+        metadata = service.get_video_metadata([video['videoId'] for video in page_videos])
+        
+        results = []
+        for video in page_videos:
+            details = metadata.get(video['videoId'], {})
+            results.append({
+                'videoId': video['videoId'],
+                'title': details.get('title', video['title']),
+                'date': (details.get('publishedAt') or video['publishedAt'])[:10],
+                'publishedAt': details.get('publishedAt', video['publishedAt']),
+                'thumbnail': details.get('thumbnail', video.get('thumbnail', '')),
+                'views': details.get('viewCount', 0),
+                'likes': details.get('likeCount', 0),
+                'comments': details.get('commentCount', 0),
+                'duration': details.get('duration', '')
+            })
+        
+        return jsonify({
+            'videos': results,
+            'page': page,
+            'per_page': per_page,
+            'total': len(videos),
+            'has_more': page * per_page < len(videos)
+        })
+    except Exception as e:
+        logger.error(f"Error getting videos: {e}")
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+@app.route('/api/comments/search')
+def search_comments():
+    """Search stored comments by text or author with sentiment, video and date filters, one page at a time"""
+    query = request.args.get('q', '')
+    sentiment = request.args.get('sentiment', 'all')
+    video_id = request.args.get('video_id') or None
+    sort = request.args.get('sort', 'relevance' if query.strip() else 'date')
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), SEARCH_MAX_PER_PAGE)
+    
+    if sentiment not in ['all', 'positive', 'negative', 'neutral']:
+        return jsonify({'error': 'Invalid sentiment'}), 400
+    if sort not in ['relevance', 'date', 'likes']:
+        return jsonify({'error': 'Invalid sort'}), 400
+    try:
+        date_from = request.args.get('from')
+        date_to = request.args.get('to')
+        if date_from:
+            date_from = datetime.strptime(date_from, '%Y-%m-%d').strftime('%Y-%m-%d')
+        if date_to:
+            date_to = (datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+    except ValueError:
+        return jsonify({'error': 'Dates must be YYYY-MM-DD'}), 400
+    channel_id = request.args.get('channel')
+    service = channels.get(channel_id)
+    if service is None:
+        return unknown_channel(channel_id)
+    
+    try:
+        results = service.search_comments(
+            query, None if sentiment == 'all' else sentiment, video_id, date_from, date_to, sort, page, per_page
+        )
+        return json_response(results, 'comments-search')
+    except Exception as e:
+        logger.error(f"Error searching comments: {e}")
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+@app.route('/api/comments/stream')
+def stream_comments():
+    """Stream comments and running sentiment totals as NDJSON (default) or Server-Sent Events"""
+    max_videos = request.args.get('max_videos', 5, type=int)
+    max_comments = request.args.get('max_comments', 20, type=int)
+    video_id = request.args.get('video_id')
+    stream_format = request.args.get('format', 'ndjson').lower()
+    
+    max_videos = min(max(max_videos, 1), 10)
+    max_comments = min(max(max_comments, 10), MAX_COMMENTS_PER_VIDEO)
+    if stream_format not in ['ndjson', 'sse']:
+        return jsonify({'error': 'Invalid stream format'}), 400
+    channel_id = request.args.get('channel')
+    service = channels.get(channel_id)
+    if service is None:
+        return unknown_channel(channel_id)
+    
+    def generate():
+        try:
+            for event, payload in service.stream_comments(max_videos, max_comments, video_id):
+                if stream_format == 'sse':
+                    yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+                else:
+                    yield json.dumps({'type': event, **payload}) + '\n'
+        except Exception as e:
+            logger.error(f"Error in stream_comments: {e}")
+            if stream_format == 'sse':
+                yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+            else:
+                yield json.dumps({'type': 'error', 'error': str(e)}) + '\n'
+    
+    return Response(
+        generate(),
+        mimetype='text/event-stream' if stream_format == 'sse' else 'application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/cache-stats')
+def get_cache_stats():
+    """Get shared cache hit/miss counters for TTL tuning"""
+    stats = channels.default.cache.stats() if channels.default.cache else {}
+    stats['sentiment_memo'] = sentiment_engine.stats()
+    coalescing = [service.single_flight.stats() for service in channels]
+    stats['coalescing'] = {field: sum(entry[field] for entry in coalescing) for field in coalescing[0]}
+    stats['admission'] = admission.stats() if admission is not None else None
+    return jsonify(stats)
+
+@app.route('/metrics')
+def get_metrics():
+    """Expose latency histograms and counters in Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/quota-status')
+def get_quota_status():
+    """Get per-key and per-channel quota headroom and whether callers are being served cached data"""
+    stats = channels.key_pool.stats()
+    stats['serving_cached'] = channels.key_pool.is_low()
+    stats['channels'] = [dict(service.key_pool.stats(), serving_cached=service.key_pool.is_low()) for service in channels]
+    return jsonify(stats)
+
+@app.route('/api/channels')
+def get_channels():
+    """List the monitored channels; the first is used when a request has no channel parameter"""
+    return jsonify({'channels': channels.channel_ids, 'default': channels.default.channel_id})
+
+@app.route('/api/channels/compare')
+def compare_channels():
+    """Compare sentiment and engagement across every monitored channel from their current snapshots"""
+    max_videos = min(max(request.args.get('max_videos', 10, type=int), 1), 20)
+    max_comments = min(max(request.args.get('max_comments', 50, type=int), 10), 100)
+    include_replies = parse_flag(request.args.get('include_replies'))
+    
+    try:
+        return json_response(channels.compare(max_videos, max_comments, include_replies), 'channels-compare')
+    except Exception as e:
+        logger.error(f"Error comparing channels: {e}")
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+def backfill_status(state):
+    """Public view of a channel's backfill checkpoint"""
+    return {
+        'channel': state['channel_id'],
+        'status': state['status'],
+        'until': state['until'],
+        'pages': state['pages'],
+        'videos': state['videos'],
+        'comments': state['comments'],
+        'oldest_published': state['oldest_published'],
+        'error': state['error'],
+        'started_at': datetime.fromtimestamp(state['started_at'], timezone.utc).isoformat(),
+        'updated_at': datetime.fromtimestamp(state['updated_at'], timezone.utc).isoformat()
+    }
+
+@app.route('/api/backfill', methods=['POST'])
+def start_backfill():
+    """Start or resume a channel's historical backfill from its uploads playlist, optionally back to an until date"""
+    body = request.get_json(silent=True) or {}
+    channel_id = body.get('channel')
+    service = channels.get(channel_id)
+    if service is None:
+        return unknown_channel(channel_id)
+    if service.store is None:
+        return jsonify({'error': 'Backfill needs the comment store'}), 400
+    until = body.get('until')
+    if until:
+        try:
+            until = datetime.strptime(until, '%Y-%m-%d').strftime('%Y-%m-%d')
+        except (TypeError, ValueError):
+            return jsonify({'error': 'until must be YYYY-MM-DD'}), 400
+    
+    try:
+        state = service.store.get_backfill(service.channel_id)
+        if state is None or body.get('restart') or state['status'] not in BACKFILL_RESUMABLE:
+            service.store.start_backfill(service.channel_id, until)
+        elif until and until != state['until']:
+            service.store.update_backfill(service.channel_id, until=until)
+        backfill_runner.submit(service)
+        return jsonify(backfill_status(service.store.get_backfill(service.channel_id))), 202
+    except Exception as e:
+        logger.error(f"Error starting backfill: {e}")
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+@app.route('/api/backfill')
+def get_backfill():
+    """Poll a channel's backfill progress"""
+    channel_id = request.args.get('channel')
+    service = channels.get(channel_id)
+    if service is None:
+        return unknown_channel(channel_id)
+    state = service.store.get_backfill(service.channel_id) if service.store is not None else None
+    if state is None:
+        return jsonify({'error': 'No backfill for this channel'}), 404
+    return jsonify(backfill_status(state))
+
+def analysis_args_error(video_url, sentiment_type, scope):
+    """Validate the ai-analysis and export query; returns an error message or None"""
+    if scope not in ['video', 'channel']:
+        return 'Invalid scope'
+    if scope == 'video' and not video_url:
+        return 'Video URL is required'
+    if sentiment_type not in ['positive', 'negative']:
+        return 'Invalid sentiment type'
+    return None
+
+def analysis_cache_key(video_url, sentiment_type, scope, include_replies=False, channel_id=None):
+    """Shared cache key for an analysis: by video ID when the URL names or resolves to one, else by URL hash"""
+    service = channels.get(channel_id)
+    if not video_url:
+        target = f"channel:{service.channel_id}"
+    else:
+        try:
+            target = extract_video_id(video_url)
+        except ValueError:
+            cache = service.cache
+            target = cache.get(video_url_cache_key(video_url)) if cache is not None else None
+            target = target or hashlib.blake2b(video_url.encode('utf-8'), digest_size=12).hexdigest()
+    return f"analysis:{target}:{sentiment_type}:{scope}{':replies' if include_replies else ''}"
+
+def cached_analysis(video_url, sentiment_type, scope='video', include_replies=False, channel_id=None):
+    """The cached analysis for a query, marked stale, or None"""
+    cache = channels.get(channel_id).cache
+    key = analysis_cache_key(video_url, sentiment_type, scope, include_replies, channel_id)
+    analysis = cache.get(key) if cache is not None else None
+    return dict(analysis, stale=True) if analysis is not None else None
+
+def build_ai_analysis(video_url, sentiment_type, scope='video', include_replies=False, channel_id=None):
+    """Analyse one video's comments, or the channel's recent videos, with themes from the term index
+    
+    Results are cached for ANALYSIS_TTL_SECONDS, so an export right after
+    /api/ai-analysis (or a report covering the same video) skips the fetch.
+    """
+    service = channels.get(channel_id)
+    cache = service.cache
+    key = analysis_cache_key(video_url, sentiment_type, scope, include_replies, channel_id)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    
+    if video_url:
+        video_data = service.get_video_details_by_url(video_url, max_comments=50, include_replies=include_replies)
+    else:
+        video_data = channel_analysis_input(service.get_all_comments_data(10, 50, include_replies=include_replies))
+    themes = service.get_themes(sentiment_type, video_data.get('videoId') if scope == 'video' else None)
+    analysis = generate_ai_analysis(video_data, sentiment_type, themes)
+    if cache is not None and 'error' not in analysis:
+        cache.set(key, analysis, ttl_seconds=ANALYSIS_TTL_SECONDS)
+    return analysis
+
+def add_analysis_sections(doc, analysis, sentiment_type, level=1):
+    """Write one analysis's overview, top comments, themes and recommendations into a DOCX document"""
+    doc.add_heading('Overview', level=level)
+    doc.add_paragraph(analysis['overview'])
+    
+    doc.add_heading(f'Top {sentiment_type.capitalize()} Comments', level=level)
+    for video in analysis['comments_by_video']:
+        doc.add_heading(video['title'], level=level + 1)
+        for comment in video['comments']:
+            doc.add_paragraph(f"{comment['author']}: {comment['comment']} (Likes: {comment['likeCount']})", style='List Bullet')
+    
+    doc.add_heading('Key Themes', level=level)
+    for theme in analysis['themes']:
+        doc.add_paragraph(theme, style='List Bullet')
+    
+    doc.add_heading('Recommendations for Improvement', level=level)
+    for recommendation in analysis['recommendations']:
+        doc.add_paragraph(recommendation, style='List Bullet')
+
+def build_report_docx(analyses, sentiment_type):
+    """Render analyses as a Word document and return its bytes; several videos get a section each"""
+    with timed('docx_build_duration_seconds', 'docx'):
+        doc = Document()
+        doc.add_heading('YouTube Comments AI Analysis Report', 0)
+        
+        if len(analyses) == 1:
+            add_analysis_sections(doc, analyses[0], sentiment_type)
+        else:
+            for analysis in analyses:
+                videos = analysis['comments_by_video']
+                doc.add_heading(videos[0]['title'] if videos else 'Unknown Video', level=1)
+                add_analysis_sections(doc, analysis, sentiment_type, level=2)
+        
+        doc_buffer = io.BytesIO()
+        doc.save(doc_buffer)
+    return doc_buffer.getvalue()
+
+def build_report(spec, progress=None):
+    """Build the DOCX for an export spec (video_urls, sentiment_type, scope, include_replies, channel), reusing cached analyses"""
+    analyses = []
+    for completed, video_url in enumerate(spec['video_urls'] or [None], 1):
+        try:
+            analyses.append(build_ai_analysis(
+                video_url, spec['sentiment_type'], spec['scope'], spec.get('include_replies', False), spec.get('channel')
+            ))
+        except Exception as e:
+            if len(spec['video_urls']) <= 1:
+                raise
+            logger.error(f"Error analysing {video_url} for report: {e}")
+            analyses.append({
+                'overview': f"Could not analyse {video_url}: {e}",
+                'comments_by_video': [{'title': video_url, 'comments': []}],
+                'themes': [],
+                'recommendations': []
+            })
+        if progress is not None:
+            progress(completed)
+    return build_report_docx(analyses, spec['sentiment_type'])
+
+def report_status(job):
+    """Public view of a report job with its poll, event and download URLs"""
+    status = {
+        'job_id': job['job_id'],
+        'status': job['status'],
+        'completed': job['completed'],
+        'total': job['total'],
+        'created_at': datetime.fromtimestamp(job['created_at'], timezone.utc).isoformat(),
+        'updated_at': datetime.fromtimestamp(job['updated_at'], timezone.utc).isoformat(),
+        'status_url': f"/api/reports/{job['job_id']}",
+        'events_url': f"/api/reports/{job['job_id']}/events"
+    }
+    if job['error']:
+        status['error'] = job['error']
+    if job['status'] == 'done':
+        status['download_url'] = f"/api/reports/{job['job_id']}/download"
+    return status
+
 @app.route('/api/ai-analysis')
 def get_ai_analysis():
     """Get AI analysis for a specific video's comments based on URL and sentiment type"""
     video_url = request.args.get('video_url', '')
     sentiment_type = request.args.get('sentiment_type', 'negative')
+    scope = request.args.get('scope', 'video')
     
-    if not video_url:
-        return jsonify({'error': 'Video URL is required'}), 400
-    if sentiment_type not in ['positive', 'negative']:
-        return jsonify({'error': 'Invalid sentiment type'}), 400
+    error = analysis_args_error(video_url, sentiment_type, scope)
+    if error:
+        return jsonify({'error': error}), 400
     
+    include_replies = parse_flag(request.args.get('include_replies'))
+    channel_id = request.args.get('channel')
+    if channels.get(channel_id) is None:
+        return unknown_channel(channel_id)
     try:
-        video_data = youtube_service.get_video_details_by_url(video_url, max_comments=50)
-        analysis = generate_ai_analysis(video_data, sentiment_type)
-        return jsonify(analysis)
+        analysis, rejection = admit(
+            'ai-analysis',
+            lambda: build_ai_analysis(video_url, sentiment_type, scope, include_replies, channel_id),
+            lambda: cached_analysis(video_url, sentiment_type, scope, include_replies, channel_id)
+        )
+        return with_retry_after(jsonify(analysis), rejection)
+    except AdmissionRejected as e:
+        return too_many_requests(e)
     except Exception as e:
         logger.error(f"Error in get_ai_analysis: {e}")
         return jsonify({
@@ -585,59 +4780,134 @@ def get_ai_analysis():
 
 @app.route('/api/export-data')
 def export_data():
-    """Export AI analysis as Word document"""
+    """Export AI analysis as Word document through the report job queue
+    
+    A matching report that is already built redirects to its download;
+    otherwise the job is queued and its status returned with 202, to be
+    polled like a POST /api/reports job.
+    """
     format_type = request.args.get('format', 'DOCX').upper()
     video_url = request.args.get('video_url', '')
     sentiment_type = request.args.get('sentiment_type', 'negative')
+    scope = request.args.get('scope', 'video')
     
     if format_type != 'DOCX':
         return jsonify({'error': 'Only DOCX format is supported'}), 400
-    if not video_url:
-        return jsonify({'error': 'Video URL is required for export'}), 400
-    if sentiment_type not in ['positive', 'negative']:
-        return jsonify({'error': 'Invalid sentiment type'}), 400
+    error = analysis_args_error(video_url, sentiment_type, scope)
+    if error:
+        return jsonify({'error': error}), 400
+    channel_id = request.args.get('channel')
+    if channels.get(channel_id) is None:
+        return unknown_channel(channel_id)
     
     try:
-        video_data = youtube_service.get_video_details_by_url(video_url, max_comments=50)
-        analysis = generate_ai_analysis(video_data, sentiment_type)
-        
-        doc = Document()
-        doc.add_heading('YouTube Comments AI Analysis Report', 0)
-        
-        doc.add_heading('Overview', level=1)
-        doc.add_paragraph(analysis['overview'])
-        
-        doc.add_heading(f'Top {sentiment_type.capitalize()} Comments', level=1)
-        for video in analysis['comments_by_video']:
-            doc.add_heading(video['title'], level=2)
-            for comment in video['comments']:
-                doc.add_paragraph(f"{comment['author']}: {comment['comment']} (Likes: {comment['likeCount']})", style='List Bullet')
-        
-        doc.add_heading('Key Themes', level=1)
-        for theme in analysis['themes']:
-            doc.add_paragraph(theme, style='List Bullet')
-        
-        doc.add_heading('Recommendations for Improvement', level=1)
-        for recommendation in analysis['recommendations']:
-            doc.add_paragraph(recommendation, style='List Bullet')
-        
-        doc_buffer = io.BytesIO()
-        doc.save(doc_buffer)
-        doc_buffer.seek(0)
-        
-        return send_file(
-            doc_buffer,
-            as_attachment=True,
-            download_name=f"ai_analysis_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.docx",
-            mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-        )
+        spec = {
+            'video_urls': [video_url] if video_url else [],
+            'sentiment_type': sentiment_type,
+            'scope': scope,
+            'include_replies': parse_flag(request.args.get('include_replies')),
+            'channel': channels.get(channel_id).channel_id
+        }
+        (job_id, _), _ = admit('export-data', lambda: report_queue.submit(spec, build_report))
+        status = report_status(report_queue.jobs.get(job_id))
+        if status['status'] == 'done':
+            return redirect(status['download_url'], code=303)
+        return jsonify(status), 202, {'Location': status['status_url']}
     
+    except AdmissionRejected as e:
+        return too_many_requests(e)
     except Exception as e:
         logger.error(f"Error generating export: {e}")
         return jsonify({
             'error': str(e)
         }), 500
 
+@app.route('/api/reports', methods=['POST'])
+def submit_report():
+    """Queue a DOCX report for one or more video URLs (or the channel) and return its job"""
+    body = request.get_json(silent=True) or {}
+    video_urls = body.get('video_urls')
+    if video_urls is None:
+        video_urls = [body['video_url']] if body.get('video_url') else []
+    sentiment_type = body.get('sentiment_type', 'negative')
+    scope = body.get('scope', 'video')
+    
+    if str(body.get('format', 'DOCX')).upper() != 'DOCX':
+        return jsonify({'error': 'Only DOCX format is supported'}), 400
+    if not isinstance(video_urls, list) or not all(isinstance(url, str) and url for url in video_urls):
+        return jsonify({'error': 'video_urls must be a list of URLs'}), 400
+    if len(video_urls) > MAX_REPORT_VIDEOS:
+        return jsonify({'error': f"At most {MAX_REPORT_VIDEOS} videos per report"}), 400
+    error = analysis_args_error(video_urls[0] if video_urls else '', sentiment_type, scope)
+    if error:
+        return jsonify({'error': error}), 400
+    channel_id = body.get('channel')
+    if channels.get(channel_id) is None:
+        return unknown_channel(channel_id)
+    
+    try:
+        spec = {
+            'video_urls': list(dict.fromkeys(video_urls)),
+            'sentiment_type': sentiment_type,
+            'scope': scope,
+            'include_replies': bool(body.get('include_replies', False)),
+            'channel': channels.get(channel_id).channel_id
+        }
+        job_id, _ = report_queue.submit(spec, build_report)
+        status = report_status(report_queue.jobs.get(job_id))
+        return jsonify(status), 202, {'Location': status['status_url']}
+    except Exception as e:
+        logger.error(f"Error submitting report: {e}")
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+@app.route('/api/reports/<job_id>')
+def get_report(job_id):
+    """Poll a report job"""
+    job = report_queue.jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Report not found'}), 404
+    return jsonify(report_status(job))
+
+@app.route('/api/reports/<job_id>/events')
+def stream_report(job_id):
+    """Stream a report job's status as Server-Sent Events until it finishes"""
+    if report_queue.jobs.get(job_id) is None:
+        return jsonify({'error': 'Report not found'}), 404
+    
+    def generate():
+        last = None
+        while True:
+            job = report_queue.jobs.get(job_id)
+            if job is None:
+                yield f"event: error\ndata: {json.dumps({'error': 'Report not found'})}\n\n"
+                return
+            status = report_status(job)
+            if status != last:
+                yield f"event: status\ndata: {json.dumps(status)}\n\n"
+                last = status
+            if job['status'] in ('done', 'failed'):
+                return
+            time.sleep(REPORT_POLL_INTERVAL)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/reports/<job_id>/download')
+def download_report(job_id):
+    """Download a finished report"""
+    job = report_queue.jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Report not found'}), 404
+    if job['status'] != 'done' or not job['path'] or not os.path.exists(job['path']):
+        return jsonify({'error': 'Report is not ready', **report_status(job)}), 409
+    return send_file(
+        job['path'],
+        as_attachment=True,
+        download_name=f"ai_analysis_report_{job_id[:8]}.docx",
+        mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+    )
+
 @app.errorhandler(404)
 def not_found(error):
     try:
@@ -0,0 +1,778 @@
+"""ASGI entry point serving the dashboard API from async handlers
+
+The slow dashboard endpoints run on AsyncYouTubeCommentsService, which talks
+to the YouTube Data API through a non-blocking httpx client, so a request
+waiting on upstream holds a coroutine rather than a worker. SQLite access,
+sentiment scoring and HTML parsing run on a thread pool off the event loop.
+Every other route falls through to the Flask app. Run with:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8000 --workers 2
+"""
+import asyncio
+import contextlib
+import contextvars
+import copy
+import functools
+import hashlib
+import os
+import time
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Mount, Route
+
+from app import (
+    ANALYSIS_TTL_SECONDS, BING_HEADERS, COMPRESS_MIN_BYTES, HTTP_TIMEOUT, MAX_COMMENTS_PER_VIDEO, SNAPSHOT_MAX_AGE,
+    VIDEO_METADATA_TTL, VIDEO_URL_TTL, VIDEOS_PER_REQUEST, YOUTUBE_API_BASE_URL, AdmissionRejected, CommentPager,
+    ReplyBudget, RequestTimings, VideoIdScanner, admission, aggregate_comments, analysis_args_error,
+    analysis_cache_key, app as flask_app, build_chart_delta, build_chart_payload, build_sentiment_delta,
+    build_sentiment_payload, cached_analysis, channel_analysis_input, channels, client_key, compress_body,
+    current_timings, dumps_json, empty_comments_data, extract_video_id, generate_ai_analysis, is_bing_url,
+    last_chart_aggregates, logger, matching_etag, metrics, negotiate_encoding, parse_fields, parse_flag,
+    parse_window, select_fields, shed_fallback, snapshot_etag, summarize_comments, timed, video_url_cache_key,
+    youtube_service
+)
+from werkzeug.http import parse_etags
+
+# Async serving configuration
+ASYNC_MAX_CONNECTIONS = int(os.getenv("ASYNC_MAX_CONNECTIONS", 100))
+ASYNC_BLOCKING_WORKERS = int(os.getenv("ASYNC_BLOCKING_WORKERS", 8))
+WSGI_WORKERS = int(os.getenv("WSGI_WORKERS", 10))
+
+class AsyncSingleFlight:
+    """Collapses concurrent coroutines that share a key into one task whose result they all get
+    
+    As with SingleFlight, each caller of a shared task gets its own deep copy
+    of the result.
+    """
+    
+    class _Call:
+        def __init__(self, task):
+            self.task = task
+            self.waiters = 0
+    
+    def __init__(self):
+        self._calls = {}
+        self.executions = 0
+        self.coalesced = 0
+    
+    async def do(self, key, factory):
+        """Await factory() for key, or join the in-flight task with the same key"""
+        call = self._calls.get(key)
+        if call is None:
+            self.executions += 1
+            call = self._calls[key] = self._Call(asyncio.ensure_future(factory()))
+            call.task.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.coalesced += 1
+        call.waiters += 1
+        # A disconnecting client must not cancel the call other requests are waiting on
+        result = await asyncio.shield(call.task)
+        # The done callback above runs before any waiter resumes, so waiters is final here
+        return copy.deepcopy(result) if call.waiters > 1 else result
+    
+    def stats(self):
+        """Return execution and coalesced-call counters"""
+        return {'executions': self.executions, 'coalesced': self.coalesced, 'in_flight': len(self._calls)}
+
+class AsyncYouTubeCommentsService:
+    """Async counterpart of YouTubeCommentsService sharing its key pool, cache, store and refresher
+    
+    Services for other channels are built with parent set to the first one
+    and share its HTTP client, thread pool and pool-wide API call slots.
+    """
+    
+    def __init__(self, service, max_connections=ASYNC_MAX_CONNECTIONS, blocking_workers=ASYNC_BLOCKING_WORKERS, parent=None):
+        self.service = service
+        self.key_pool = service.key_pool
+        self.channel_id = service.channel_id
+        self.cache = service.cache
+        self.store = service.store
+        self.refresher = service.refresher
+        self.max_concurrency = service.max_workers
+        self.max_connections = max_connections
+        self.single_flight = AsyncSingleFlight()
+        self.parent = parent
+        self._api_slots = asyncio.Semaphore(service.key_pool.concurrency)
+        if parent is None:
+            self._pool_slots = asyncio.Semaphore(service.key_pool.pool.concurrency)
+            self._executor = ThreadPoolExecutor(max_workers=blocking_workers, thread_name_prefix='asgi-blocking')
+        else:
+            self._pool_slots = parent._pool_slots
+            self._executor = parent._executor
+        self._client = None
+    
+    @property
+    def client(self):
+        """Shared keep-alive client, created on first use inside the running event loop"""
+        if self.parent is not None:
+            return self.parent.client
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=HTTP_TIMEOUT,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+            )
+        return self._client
+    
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def run_blocking(self, fn, *args, **kwargs):
+        """Run blocking work on the thread pool, keeping the request's timing context"""
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, functools.partial(context.run, fn, *args, **kwargs))
+    
+    async def _coalesced(self, name, args, factory):
+        return await self.single_flight.do((name, self.channel_id) + tuple(args), factory)
+    
+    async def _api_get(self, endpoint, params, description):
+        """Call a YouTube Data API endpoint with a pooled key, moving to another key on quota errors
+        
+        Key selection and error handling are the sync service's; only the
+        HTTP call differs. Keys are charged on the thread pool because the
+        quota buckets live in SQLite.
+        """
+        url = f"{YOUTUBE_API_BASE_URL}/{endpoint}"
+        attempts = self.service._api_attempts(endpoint, params, description)
+        while True:
+            attempt, request_params = await self.run_blocking(next, attempts)
+            try:
+                async with self._api_slots, self._pool_slots:
+                    with timed('youtube_api_request_duration_seconds', f"youtube-{endpoint}", endpoint=endpoint):
+                        response = await self.client.get(url, params=request_params)
+                        response.raise_for_status()
+                        data = response.json()
+            except httpx.HTTPStatusError as e:
+                retry = await self.run_blocking(
+                    self.service._retry_http_error, endpoint, description, attempt, request_params['key'], e.response, e
+                )
+                if retry:
+                    continue
+                raise
+            except httpx.HTTPError as e:
+                metrics.inc('youtube_api_errors_total', endpoint=endpoint, reason=type(e).__name__)
+                raise
+            
+            data = await self.run_blocking(self.service._api_payload, endpoint, description, request_params['key'], data)
+            if data is not None:
+                return data
+    
+    async def get_latest_videos(self, max_results=50):
+        """Get latest videos from the YouTube channel"""
+        params = self.service._latest_videos_params(max_results)
+        try:
+            data = await self._api_get('search', params, f"videos for channel {self.channel_id}")
+        except Exception as e:
+            logger.error(f"Error fetching videos: {e}")
+            return []
+        return self.service._parse_search_items(data)
+    
+    async def _fetch_comment_page(self, video_id, page_size, page_token=None, include_replies=False):
+        """Fetch one raw commentThreads page, or None on failure"""
+        params = self.service._comment_page_params(video_id, page_size, page_token, include_replies)
+        try:
+            return await self._api_get('commentThreads', params, f"comments for video {video_id}")
+        except Exception as e:
+            logger.error(f"Error fetching comments for video {video_id}: {e}")
+            return None
+    
+    async def iter_comment_batches(self, video_id, max_comments=50, published_after=None, quota_budget=None, reply_budget=None):
+        """Yield scored comment batches page by page; see YouTubeCommentsService.iter_comment_batches"""
+        pager = CommentPager(video_id, max_comments, published_after, quota_budget)
+        for page_size, page_token in pager:
+            data = await self._fetch_comment_page(video_id, page_size, page_token, reply_budget is not None)
+            batch = pager.take(data, self.service._parse_comment_page)
+            if batch and reply_budget is not None:
+                batch += await self._collect_replies(data, video_id, batch, reply_budget)
+            if batch:
+                yield await self.run_blocking(self.service._score_batch, batch)
+    
+    async def _fetch_reply_thread(self, video_id, parent_id, budget):
+        """Page through comments.list for one thread while the request's reply budget lasts"""
+        replies = []
+        params = self.service._reply_page_params(parent_id, 0, budget)
+        while params is not None:
+            try:
+                data = await self._api_get('comments', params, f"replies to comment {parent_id}")
+            except Exception as e:
+                logger.error(f"Error fetching replies to comment {parent_id}: {e}")
+                break
+            page, page_token = self.service._parse_reply_page(data, video_id, parent_id)
+            replies.extend(page)
+            params = self.service._reply_page_params(parent_id, len(replies), budget, page_token) if page_token else None
+        return replies
+    
+    async def expand_reply_threads(self, video_id, threads, budget):
+        """Fetch the full replies of (thread id, totalReplyCount) threads concurrently within budget, busiest first"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def fetch(thread):
+            async with semaphore:
+                return thread[0], await self._fetch_reply_thread(video_id, thread[0], budget)
+        
+        results = await asyncio.gather(*(fetch(thread) for thread in self.service._expansion_order(threads)))
+        return {thread_id: replies for thread_id, replies in results if replies}
+    
+    async def _collect_replies(self, data, video_id, batch, budget):
+        """Replies to a parsed page's comments: inline ones, completed through comments.list where threads are longer"""
+        replies, partial = self.service._parse_inline_replies(data, video_id, {comment['commentId'] for comment in batch})
+        if partial:
+            replies = self.service._merge_replies(replies, await self.expand_reply_threads(video_id, partial, budget))
+        return replies
+    
+    async def get_comments_for_video(self, video_id, max_results=50, published_after=None, quota_budget=None, include_replies=False,
+                                     reply_budget=None):
+        """Get comments for a specific video, paging through nextPageToken beyond 100, with reply threads on request"""
+        async def fetch():
+            budget = ReplyBudget() if include_replies and reply_budget is None else reply_budget
+            comments = []
+            async for batch in self.iter_comment_batches(video_id, max_results, published_after, quota_budget, budget):
+                comments.extend(batch)
+            return comments
+        key = (video_id, max_results, published_after, quota_budget, include_replies, reply_budget)
+        return await self._coalesced('get_comments_for_video', key, fetch)
+    
+    async def get_comments_for_videos(self, videos, max_results=50, include_replies=False):
+        """Fetch comments for several videos concurrently, preserving input order; all videos share one ReplyBudget"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        reply_budget = ReplyBudget() if include_replies else None
+        
+        async def fetch(video):
+            async with semaphore:
+                try:
+                    return await self.get_comments_for_video(video['videoId'], max_results, include_replies=include_replies,
+                                                             reply_budget=reply_budget)
+                except Exception as e:
+                    logger.error(f"Error fetching comments for video {video['videoId']}: {e}")
+                    return []
+        
+        return await asyncio.gather(*(fetch(video) for video in videos))
+    
+    async def get_video_metadata(self, video_ids):
+        """Get metadata and statistics for many videos, 50 IDs per videos.list call, cached with TTL"""
+        video_ids = list(dict.fromkeys(video_id for video_id in video_ids if video_id))
+        metadata = {}
+        if self.cache is not None:
+            cached = await self.run_blocking(lambda: {video_id: self.cache.get(f"video_meta:{video_id}") for video_id in video_ids})
+            metadata.update((video_id, video) for video_id, video in cached.items() if video is not None)
+        missing = [video_id for video_id in video_ids if video_id not in metadata]
+        
+        async def fetch(chunk):
+            params = {
+                'part': 'snippet,statistics,contentDetails',
+                'id': ','.join(chunk),
+                'maxResults': VIDEOS_PER_REQUEST
+            }
+            data = await self._api_get('videos', params, f"{len(chunk)} videos")
+            return [self.service._parse_video_item(item) for item in data.get('items', [])]
+        
+        chunks = [missing[start:start + VIDEOS_PER_REQUEST] for start in range(0, len(missing), VIDEOS_PER_REQUEST)]
+        fetched = [video for videos in await asyncio.gather(*(fetch(chunk) for chunk in chunks)) for video in videos]
+        for video in fetched:
+            metadata[video['videoId']] = video
+        if fetched and self.cache is not None:
+            await self.run_blocking(lambda: [
+                self.cache.set(f"video_meta:{video['videoId']}", video, ttl_seconds=VIDEO_METADATA_TTL) for video in fetched
+            ])
+        return metadata
+    
+    async def resolve_video_id(self, video_url):
+        """Video ID for a YouTube or Bing search URL; Bing pages are streamed, scanned once and cached"""
+        try:
+            return extract_video_id(video_url)
+        except ValueError:
+            if not is_bing_url(video_url):
+                raise
+        
+        async def fetch():
+            key = video_url_cache_key(video_url)
+            if self.cache is not None:
+                video_id = await self.run_blocking(self.cache.get, key)
+                if video_id:
+                    return video_id
+            
+            logger.info(f"Processing Bing search URL: {video_url}")
+            scanner = VideoIdScanner()
+            video_id = None
+            with timed('youtube_api_request_duration_seconds', 'bing', endpoint='bing'):
+                async with self.client.stream('GET', video_url, headers=BING_HEADERS) as response:
+                    response.raise_for_status()
+                    async for chunk in response.aiter_text():
+                        video_id = scanner.feed(chunk)
+                        if video_id or scanner.exhausted:
+                            break
+            video_id = video_id or scanner.finish()
+            if not video_id:
+                raise ValueError("No YouTube video found in Bing search results")
+            
+            if self.cache is not None:
+                await self.run_blocking(self.cache.set, key, video_id, VIDEO_URL_TTL)
+            return video_id
+        
+        return await self._coalesced('resolve_video_id', (video_url,), fetch)
+    
+    async def get_video_details_by_url(self, video_url, max_comments=50, include_replies=False):
+        """Get video details and comments (and optionally their replies) based on a YouTube or Bing search URL"""
+        async def fetch():
+            video_id = await self.resolve_video_id(video_url)
+            video_data = (await self.get_video_metadata([video_id])).get(video_id)
+            if not video_data:
+                raise ValueError("Video not found")
+            
+            comments = await self.get_comments_for_video(video_id, max_comments, include_replies=include_replies)
+            if self.store is not None and comments:
+                await self.run_blocking(self.store.save_comments, comments)
+            return {
+                **video_data,
+                'comments': comments,
+                'commentCount': len(comments),
+                'replyCount': sum(1 for comment in comments if comment.get('parentId')),
+                'totalCommentCount': video_data['commentCount']
+            }
+        
+        try:
+            return await self._coalesced('get_video_details_by_url', (video_url, max_comments, include_replies), fetch)
+        except Exception as e:
+            logger.error(f"Error in get_video_details_by_url: {e}")
+            raise
+    
+    async def sync_video_comments(self, video_id, max_comments=50, force=False, reply_budget=None):
+        """Pull only comments newer than the stored watermark for a video into the store"""
+        due, published_after = await self.run_blocking(self.service._video_sync_plan, video_id, max_comments, force)
+        if not due:
+            return 0
+        
+        fetched = 0
+        async for batch in self.iter_comment_batches(video_id, max_comments, published_after, reply_budget=reply_budget):
+            await self.run_blocking(self.store.save_comments, batch)
+            fetched += len(batch)
+        
+        await self.run_blocking(self.store.mark_video_synced, video_id, max_comments)
+        logger.info(f"Synced {fetched} new comments for video {video_id}")
+        return fetched
+    
+    async def sync_store(self, max_videos=10, max_comments_per_video=50, force=False):
+        """Refresh the store's video list and incrementally sync each video's comments concurrently"""
+        if await self.run_blocking(self.service._video_list_due, max_videos, force):
+            await self.run_blocking(self.service._save_video_list, await self.get_latest_videos(max_videos), max_videos)
+        
+        videos = await self.run_blocking(self.store.get_videos, self.channel_id, max_videos, self.service._window_start())
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        reply_budget = self.service._store_reply_budget()
+        
+        async def sync(video):
+            async with semaphore:
+                try:
+                    return await self.sync_video_comments(video['videoId'], max_comments_per_video, force, reply_budget)
+                except Exception as e:
+                    logger.error(f"Error syncing comments for video {video['videoId']}: {e}")
+                    return 0
+        
+        return sum(await asyncio.gather(*(sync(video) for video in videos)))
+    
+    async def _build_chart_aggregates(self, max_videos=10, max_comments_per_video=50, include_replies=False):
+        """Sync the store and sum its daily rollups for the selected videos"""
+        try:
+            await self.sync_store(max_videos, max_comments_per_video)
+            return await self.run_blocking(self.service.stored_chart_aggregates, max_videos, include_replies)
+        except Exception as e:
+            logger.error(f"Error in get_chart_aggregates: {e}")
+            return aggregate_comments({'video_comment_counts': {}, 'error': str(e)})
+    
+    async def _build_window_aggregates(self, start_day, end_day, max_videos=10, max_comments_per_video=50, include_replies=False):
+        """Sync the store and sum the channel's time buckets for a window"""
+        try:
+            await self.sync_store(max_videos, max_comments_per_video)
+            return await self.run_blocking(self.service.stored_window_aggregates, start_day, end_day, max_videos, include_replies)
+        except Exception as e:
+            logger.error(f"Error in get_window_aggregates: {e}")
+            return aggregate_comments({'video_comment_counts': {}, 'error': str(e)})
+    
+    async def _fetch_all_comments_data(self, max_videos=10, max_comments_per_video=50, include_replies=False):
+        """Fetch all comments data for analysis, from the local store when one is configured"""
+        try:
+            if self.store is not None:
+                await self.sync_store(max_videos, max_comments_per_video)
+                return await self.run_blocking(
+                    self.service.stored_comments_data, max_videos, max_comments_per_video, include_replies
+                )
+            
+            videos = (await self.get_latest_videos(max_videos))[:max_videos]
+            comments_per_video = await self.get_comments_for_videos(videos, max_comments_per_video, include_replies)
+            return await self.run_blocking(summarize_comments, videos, comments_per_video)
+        except Exception as e:
+            logger.error(f"Error in get_all_comments_data: {e}")
+            return empty_comments_data(str(e))
+    
+    async def _get_snapshot(self, key, producer, build):
+        """Serve the latest shared snapshot; only a never-built one awaits build()
+        
+        Stale snapshots are handed to the SnapshotRefresher with the sync
+        producer, so revalidation never runs on the event loop.
+        """
+        entry = await self.run_blocking(self.cache.get_entry, key)
+        if entry is not None:
+            return await self.run_blocking(self.service._serve_snapshot, key, producer, entry)
+        
+        value = await build()
+        created_at = None
+        if 'error' not in value:
+            created_at = await self.run_blocking(self.cache.set, key, value, SNAPSHOT_MAX_AGE)
+        return dict(value, snapshot_at=datetime.fromtimestamp(created_at or time.time(), timezone.utc).isoformat(), snapshot_age=0, stale=False)
+    
+    async def get_chart_aggregates(self, max_videos=10, max_comments_per_video=50, include_replies=False):
+        """Get per-video, per-day and per-sentiment totals for the charts"""
+        async def fetch():
+            if self.store is None:
+                return aggregate_comments(await self.get_all_comments_data(max_videos, max_comments_per_video, include_replies))
+            if self.cache is None:
+                return await self._build_chart_aggregates(max_videos, max_comments_per_video, include_replies)
+            key, producer = self.service._snapshot_spec('chart', max_videos, max_comments_per_video, include_replies)
+            return await self._get_snapshot(
+                key, producer, lambda: self._build_chart_aggregates(max_videos, max_comments_per_video, include_replies)
+            )
+        return await self._coalesced('get_chart_aggregates', (max_videos, max_comments_per_video, include_replies), fetch)
+    
+    async def get_all_comments_data(self, max_videos=10, max_comments_per_video=50, include_replies=False):
+        """Get all comments data for analysis, served from the latest shared snapshot"""
+        async def fetch():
+            if self.cache is None:
+                return await self._fetch_all_comments_data(max_videos, max_comments_per_video, include_replies)
+            key, producer = self.service._snapshot_spec('all', max_videos, max_comments_per_video, include_replies)
+            return await self._get_snapshot(
+                key, producer, lambda: self._fetch_all_comments_data(max_videos, max_comments_per_video, include_replies)
+            )
+        return await self._coalesced('get_all_comments_data', (max_videos, max_comments_per_video, include_replies), fetch)
+    
+    async def get_window_aggregates(self, start_day, end_day, max_videos=10, max_comments_per_video=50, include_replies=False):
+        """Chart aggregates for a time window, served from the shared snapshot like get_chart_aggregates"""
+        async def fetch():
+            build = lambda: self._build_window_aggregates(start_day, end_day, max_videos, max_comments_per_video, include_replies)
+            if self.cache is None:
+                return await build()
+            key, producer = self.service._window_spec(start_day, end_day, max_videos, max_comments_per_video, include_replies)
+            return await self._get_snapshot(key, producer, build)
+        return await self._coalesced(
+            'get_window_aggregates', (start_day, end_day, max_videos, max_comments_per_video, include_replies), fetch
+        )
+
+async_service = AsyncYouTubeCommentsService(youtube_service)
+async_channels = {
+    service.channel_id: async_service if service is youtube_service else AsyncYouTubeCommentsService(service, parent=async_service)
+    for service in channels
+}
+
+def channel_service(request):
+    """The async service for the request's channel parameter, or None when that channel is not monitored"""
+    service = channels.get(request.query_params.get('channel'))
+    return async_channels[service.channel_id] if service is not None else None
+
+def query_int(request, name, default):
+    """Integer query parameter, falling back to default like Flask's type=int"""
+    try:
+        return int(request.query_params.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+def error_response(message, status=500):
+    return JSONResponse({'error': message}, status_code=status)
+
+def unknown_channel(request):
+    return error_response(f"Unknown channel: {request.query_params.get('channel')}", 404)
+
+def format_etag(etag, weak=False):
+    return f'W/"{etag}"' if weak else f'"{etag}"'
+
+def not_modified(etag, weak=False):
+    """304 response for a matching conditional request"""
+    return Response(status_code=304, headers={'ETag': format_etag(etag, weak), 'Cache-Control': 'no-cache'})
+
+def if_none_match(request):
+    return parse_etags(request.headers.get('if-none-match'))
+
+async def json_response(request, payload, route, etag=None):
+    """Serialize and compress a payload on the thread pool and tag it for conditional requests (weak for snapshot ETags)"""
+    encoding = negotiate_encoding(request.headers.get('accept-encoding'))
+    
+    def encode():
+        with timed('serialization_duration_seconds', 'serialization', route=route):
+            body = dumps_json(payload)
+        tag = etag or hashlib.blake2b(body, digest_size=16).hexdigest()
+        matched = matching_etag(if_none_match(request), tag)
+        if matched:
+            return None, matched, None
+        if encoding is None or len(body) < COMPRESS_MIN_BYTES:
+            return body, tag, None
+        with timed('compression_duration_seconds', 'compression', encoding=encoding):
+            return compress_body(body, encoding), tag, encoding
+    
+    body, tag, used_encoding = await async_service.run_blocking(encode)
+    weak = etag is not None
+    if body is None:
+        return not_modified(tag, weak)
+    headers = {'ETag': format_etag(tag, weak), 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+    if used_encoding:
+        headers['ETag'] = format_etag(f"{tag}-{used_encoding}", weak)
+        headers['Content-Encoding'] = used_encoding
+    return Response(body, media_type='application/json', headers=headers)
+
+admission_executor = ThreadPoolExecutor(
+    max_workers=sum(admission.limits.values()) + admission.queue_size * len(admission.limits),
+    thread_name_prefix='asgi-admission'
+) if admission is not None else None
+
+def too_many_requests(rejection):
+    """429 for a refused request that has no cached fallback"""
+    return JSONResponse(
+        {'error': 'Too many requests, please retry later', 'reason': rejection.reason, 'retry_after': rejection.retry_after},
+        status_code=429, headers={'Retry-After': str(rejection.retry_after)}
+    )
+
+def with_retry_after(response, rejection):
+    if rejection is not None:
+        response.headers['Retry-After'] = str(rejection.retry_after)
+    return response
+
+async def admit(request, route, produce, fallback=None):
+    """Await produce() in an admission slot; returns (value, rejection) like app.admit
+    
+    Waiting for a slot blocks a thread, so it runs on its own executor sized
+    for the slots and the queue rather than on the blocking pool whose work
+    frees those slots.
+    """
+    if admission is None:
+        return await produce(), None
+    client = client_key(request.client.host if request.client else None, request.headers.get('x-forwarded-for'))
+    loop = asyncio.get_running_loop()
+    try:
+        admitted = await loop.run_in_executor(admission_executor, admission.enter, route, client)
+    except AdmissionRejected as e:
+        value = await async_service.run_blocking(shed_fallback, route, fallback, e)
+        if value is None:
+            raise
+        return value, e
+    try:
+        return await produce(), None
+    finally:
+        admission.leave(route, admitted)
+
+def instrumented(rule):
+    """Record route latency and the Server-Timing header for an async route, as the Flask hooks do"""
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(request):
+            started = time.perf_counter()
+            timings = RequestTimings()
+            token = current_timings.set(timings)
+            try:
+                response = await handler(request)
+            finally:
+                current_timings.reset(token)
+            
+            elapsed = time.perf_counter() - started
+            metrics.observe('http_request_duration_seconds', elapsed, route=rule, method=request.method, status=response.status_code)
+            if response.status_code >= 500:
+                metrics.inc('http_request_errors_total', route=rule)
+            breakdown = timings.server_timing()
+            response.headers['Server-Timing'] = ', '.join(part for part in (breakdown, f'total;dur={elapsed * 1000:.1f}') if part)
+            return response
+        return wrapper
+    return decorator
+
+@instrumented('/api/chart-data')
+async def get_chart_data(request):
+    """Get data formatted for charts"""
+    max_videos = min(max(query_int(request, 'max_videos', 10), 1), 20)
+    max_comments = min(max(query_int(request, 'max_comments', 50), 10), 100)
+    fields = parse_fields(request.query_params.get('fields'))
+    include_replies = parse_flag(request.query_params.get('include_replies'))
+    since = request.query_params.get('since')
+    service = channel_service(request)
+    if service is None:
+        return unknown_channel(request)
+    try:
+        window = parse_window(request.query_params.get('window'), request.query_params.get('from'), request.query_params.get('to'))
+    except ValueError as e:
+        return error_response(str(e), 400)
+    if window is not None and service.store is None:
+        return error_response('Time windows need the comment store', 400)
+    
+    try:
+        if since and window is None:
+            # Answer from the store before touching the snapshot; only a cursor that no longer applies gets a full payload
+            delta, _ = await admit(
+                request, 'chart-data',
+                lambda: service.run_blocking(service.service.get_chart_delta, since, max_videos, max_comments, include_replies)
+            )
+            if delta is not None:
+                return await json_response(request, select_fields(build_chart_delta(delta), fields), 'chart-data')
+        if window is not None:
+            data, rejection = await admit(
+                request, 'chart-data',
+                lambda: service.get_window_aggregates(*window, max_videos, max_comments, include_replies)
+            )
+        else:
+            data, rejection = await admit(
+                request, 'chart-data',
+                lambda: service.get_chart_aggregates(max_videos, max_comments, include_replies),
+                lambda: last_chart_aggregates(max_videos, max_comments, include_replies, service.channel_id)
+            )
+        etag = snapshot_etag('chart-data', data, request.query_params.multi_items())
+        matched = matching_etag(if_none_match(request), etag) if etag is not None else None
+        if matched:
+            return with_retry_after(not_modified(matched, weak=True), rejection)
+        
+        with timed('aggregation_duration_seconds', 'aggregation', stage='chart_format'):
+            payload = select_fields(build_chart_payload(data), fields)
+        
+        return with_retry_after(await json_response(request, payload, 'chart-data', etag), rejection)
+    except AdmissionRejected as e:
+        return too_many_requests(e)
+    except Exception as e:
+        logger.error(f"Error in get_chart_data: {e}")
+        return error_response(str(e))
+
+@instrumented('/api/sentiment-data')
+async def get_sentiment_data(request):
+    """Get detailed sentiment data with comments"""
+    max_videos = min(max(query_int(request, 'max_videos', 5), 1), 10)
+    max_comments = min(max(query_int(request, 'max_comments', 20), 10), 50)
+    view = request.query_params.get('view', 'full')
+    fields = parse_fields(request.query_params.get('fields'))
+    include_replies = parse_flag(request.query_params.get('include_replies'))
+    since = request.query_params.get('since')
+    if view not in ['full', 'summary']:
+        return error_response('Invalid view', 400)
+    service = channel_service(request)
+    if service is None:
+        return unknown_channel(request)
+    
+    try:
+        if since and view == 'full':
+            # Answer from the store before loading the snapshot; only a cursor that no longer applies gets a full payload
+            delta, _ = await admit(
+                request, 'sentiment-data',
+                lambda: service.run_blocking(service.service.get_comments_delta, since, max_videos, max_comments, include_replies)
+            )
+            if delta is not None:
+                return await json_response(request, select_fields(build_sentiment_delta(delta), fields), 'sentiment-data')
+        data, rejection = await admit(
+            request, 'sentiment-data',
+            lambda: service.get_all_comments_data(max_videos, max_comments, include_replies),
+            lambda: service.service.last_snapshot('all', max_videos, max_comments, include_replies)
+        )
+        etag = snapshot_etag('sentiment-data', data, request.query_params.multi_items())
+        matched = matching_etag(if_none_match(request), etag) if etag is not None else None
+        if matched:
+            return with_retry_after(not_modified(matched, weak=True), rejection)
+        
+        payload = await async_service.run_blocking(build_sentiment_payload, data, view)
+        return with_retry_after(await json_response(request, select_fields(payload, fields), 'sentiment-data', etag), rejection)
+    except AdmissionRejected as e:
+        return too_many_requests(e)
+    except Exception as e:
+        logger.error(f"Error in get_sentiment_data: {e}")
+        return error_response(str(e))
+
+@instrumented('/api/video-details/<video_id>')
+async def get_video_details(request):
+    """Get detailed information about a specific video, paging through high-volume threads"""
+    video_id = request.path_params['video_id']
+    max_comments = min(max(query_int(request, 'max_comments', 100), 1), MAX_COMMENTS_PER_VIDEO)
+    published_after = request.query_params.get('published_after')
+    quota_budget = query_int(request, 'quota_budget', None)
+    service = channel_service(request)
+    if service is None:
+        return unknown_channel(request)
+    
+    try:
+        comments = []
+        sentiment_counts = {'positive': 0, 'negative': 0, 'neutral': 0}
+        total_likes = 0
+        async for batch in service.iter_comment_batches(video_id, max_comments, published_after, quota_budget):
+            for comment in batch:
+                sentiment_counts[comment['sentiment']] += 1
+                total_likes += comment['likeCount']
+            comments.extend(batch)
+        
+        return await json_response(request, {
+            'video_id': video_id,
+            'comments': comments,
+            'comment_count': len(comments),
+            'sentiment_counts': sentiment_counts,
+            'total_likes': total_likes
+        }, 'video-details')
+    except Exception as e:
+        logger.error(f"Error getting video details for {video_id}: {e}")
+        return error_response(str(e))
+
+@instrumented('/api/ai-analysis')
+async def get_ai_analysis(request):
+    """Get AI analysis for a specific video's comments based on URL and sentiment type"""
+    video_url = request.query_params.get('video_url', '')
+    sentiment_type = request.query_params.get('sentiment_type', 'negative')
+    scope = request.query_params.get('scope', 'video')
+    include_replies = parse_flag(request.query_params.get('include_replies'))
+    
+    error = analysis_args_error(video_url, sentiment_type, scope)
+    if error:
+        return error_response(error, 400)
+    service = channel_service(request)
+    if service is None:
+        return unknown_channel(request)
+    
+    async def analyse():
+        # Resolving a Bing URL's key reads the shared cache, which is SQLite
+        key = await service.run_blocking(analysis_cache_key, video_url, sentiment_type, scope, include_replies, service.channel_id)
+        cache = service.cache
+        analysis = await service.run_blocking(cache.get, key) if cache is not None else None
+        if analysis is not None:
+            return analysis
+        
+        if video_url:
+            video_data = await service.get_video_details_by_url(video_url, max_comments=50, include_replies=include_replies)
+        else:
+            data = await service.get_all_comments_data(10, 50, include_replies)
+            video_data = await service.run_blocking(channel_analysis_input, data)
+        themes = await service.run_blocking(
+            service.service.get_themes, sentiment_type, video_data.get('videoId') if scope == 'video' else None
+        )
+        analysis = await service.run_blocking(generate_ai_analysis, video_data, sentiment_type, themes)
+        if cache is not None and 'error' not in analysis:
+            await service.run_blocking(cache.set, key, analysis, ANALYSIS_TTL_SECONDS)
+        return analysis
+    
+    try:
+        analysis, rejection = await admit(
+            request, 'ai-analysis', analyse,
+            lambda: cached_analysis(video_url, sentiment_type, scope, include_replies, service.channel_id)
+        )
+        return with_retry_after(JSONResponse(analysis), rejection)
+    except AdmissionRejected as e:
+        return too_many_requests(e)
+    except Exception as e:
+        logger.error(f"Error in get_ai_analysis: {e}")
+        return error_response(str(e))
+
+@contextlib.asynccontextmanager
+async def lifespan(_):
+    yield
+    await async_service.aclose()
+
+app = Starlette(
+    routes=[
+        Route('/api/chart-data', get_chart_data),
+        Route('/api/sentiment-data', get_sentiment_data),
+        Route('/api/video-details/{video_id}', get_video_details),
+        Route('/api/ai-analysis', get_ai_analysis),
+        Mount('/', app=WSGIMiddleware(flask_app, workers=WSGI_WORKERS))
+    ],
+    lifespan=lifespan
+)
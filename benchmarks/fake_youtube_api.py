@@ -0,0 +1,299 @@
+"""Local stand-in for the YouTube Data API v3 endpoints used by app.py.
+
+Serves deterministic `search`, `videos`, `channels`, `playlistItems`,
+`commentThreads` and `comments` responses with configurable latency, page sizes and comment volumes, and
+can inject 403 quota errors. Point the app at it with
+YOUTUBE_API_BASE_URL=http://127.0.0.1:<port>/youtube/v3.
+
+Run standalone with:  python benchmarks/fake_youtube_api.py --port 8765
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+POSITIVE_PHRASES = ['great review', 'love this car', 'excellent handling', 'beautiful interior', 'really good value']
+NEGATIVE_PHRASES = ['terrible fuel economy', 'awful build quality', 'worst gearbox ever', 'bad dealer service', 'horrible road noise']
+NEUTRAL_PHRASES = ['what about the diesel', 'is it available in white', 'the price in rands', 'compared to the polo', 'which trim is this']
+
+API_PREFIX = '/youtube/v3'
+
+class FakeYouTubeConfig:
+    """Knobs for the fake API"""
+    
+    def __init__(self, videos=20, comments_per_video=200, latency=0.05, jitter=0.0, max_page_size=100,
+                 replies_per_thread=0, quota_error_rate=0.0, exhausted_keys=(), seed=42):
+        self.videos = videos
+        self.comments_per_video = comments_per_video
+        self.latency = latency
+        self.jitter = jitter
+        self.max_page_size = max_page_size
+        self.replies_per_thread = replies_per_thread
+        self.quota_error_rate = quota_error_rate
+        self.exhausted_keys = set(exhausted_keys)
+        self.seed = seed
+
+class FakeYouTubeAPI:
+    """Deterministic fake of the YouTube Data API served over HTTP on a background thread"""
+    
+    def __init__(self, config=None):
+        self.config = config or FakeYouTubeConfig()
+        self.now = datetime.now(timezone.utc).replace(microsecond=0)
+        self.calls = {}
+        self.quota_errors = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(self.config.seed)
+        self._server = None
+        self._thread = None
+    
+    # Data generation
+    
+    def video_id(self, index):
+        return f"vid{index:05d}"
+    
+    def _timestamp(self, moment):
+        return moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+    
+    def _video(self, index):
+        return {
+            'videoId': self.video_id(index),
+            'title': f"Car review #{index}: {['Polo', 'Corolla', 'Ranger', 'Swift', 'Hilux'][index % 5]} long-term test",
+            'publishedAt': self._timestamp(self.now - timedelta(hours=12 * index + 1)),
+            'description': f"Our verdict on test car {index}.",
+            'thumbnail': f"https://i.ytimg.com/vi/{self.video_id(index)}/default.jpg"
+        }
+    
+    def _comment_text(self, video_index, comment_index):
+        rng = random.Random(self.config.seed * 1000003 + video_index * 10007 + comment_index)
+        pool = rng.choice([POSITIVE_PHRASES, NEGATIVE_PHRASES, NEUTRAL_PHRASES])
+        return f"{rng.choice(pool)} {rng.choice(pool)} #{comment_index}"
+    
+    def _comment(self, video_index, comment_index, parent_id=None):
+        video_id = self.video_id(video_index)
+        comment_id = f"{video_id}.c{comment_index}" if parent_id is None else f"{parent_id}.r{comment_index}"
+        published = self.now - timedelta(minutes=37 * comment_index + video_index)
+        return {
+            'id': comment_id,
+            'snippet': {
+                'videoId': video_id,
+                'authorDisplayName': f"viewer{(video_index * 31 + comment_index) % 997}",
+                'authorProfileImageUrl': '',
+                'textDisplay': self._comment_text(video_index, comment_index + (0 if parent_id is None else 500000)),
+                'publishedAt': self._timestamp(published),
+                'likeCount': (video_index * 7 + comment_index * 13) % 50,
+                **({'parentId': parent_id} if parent_id else {})
+            }
+        }
+    
+    # Endpoints
+    
+    def search(self, params):
+        size = min(int(params.get('maxResults', 5)), 50)
+        items = []
+        for index in range(min(size, self.config.videos)):
+            video = self._video(index)
+            items.append({
+                'id': {'kind': 'youtube#video', 'videoId': video['videoId']},
+                'snippet': {
+                    'title': video['title'],
+                    'publishedAt': video['publishedAt'],
+                    'description': video['description'],
+                    'thumbnails': {'default': {'url': video['thumbnail']}}
+                }
+            })
+        return {'items': items}
+    
+    def videos(self, params):
+        items = []
+        for video_id in params.get('id', '').split(','):
+            if not video_id.startswith('vid'):
+                continue
+            index = int(video_id[3:])
+            if index >= self.config.videos:
+                continue
+            video = self._video(index)
+            items.append({
+                'id': video_id,
+                'snippet': {
+                    'title': video['title'],
+                    'publishedAt': video['publishedAt'],
+                    'description': video['description'],
+                    'channelTitle': 'Fake Cars Channel',
+                    'thumbnails': {'default': {'url': video['thumbnail']}}
+                },
+                'statistics': {
+                    'viewCount': str(10000 + index * 1234),
+                    'likeCount': str(500 + index * 17),
+                    'commentCount': str(self.config.comments_per_video)
+                },
+                'contentDetails': {'duration': f"PT{10 + index % 20}M{index % 60}S"}
+            })
+        return {'items': items}
+    
+    def channels(self, params):
+        channel_id = params.get('id', '')
+        uploads = 'UU' + channel_id[2:] if channel_id.startswith('UC') else 'UU' + channel_id
+        return {'items': [{'id': channel_id, 'contentDetails': {'relatedPlaylists': {'uploads': uploads}}}]}
+    
+    def playlist_items(self, params):
+        start, end, next_token = self._page(params, self.config.videos)
+        items = []
+        for index in range(start, end):
+            video = self._video(index)
+            items.append({
+                'snippet': {
+                    'title': video['title'],
+                    'publishedAt': video['publishedAt'],
+                    'description': video['description'],
+                    'thumbnails': {'default': {'url': video['thumbnail']}}
+                },
+                'contentDetails': {'videoId': video['videoId'], 'videoPublishedAt': video['publishedAt']}
+            })
+        data = {'items': items}
+        if next_token:
+            data['nextPageToken'] = next_token
+        return data
+    
+    def _page(self, params, total):
+        size = min(int(params.get('maxResults', 20)), self.config.max_page_size)
+        start = int(params.get('pageToken') or 0)
+        end = min(start + size, total)
+        next_token = str(end) if end < total else None
+        return start, end, next_token
+    
+    def comment_threads(self, params):
+        video_id = params.get('videoId', '')
+        if not video_id.startswith('vid') or int(video_id[3:]) >= self.config.videos:
+            return {'items': []}
+        video_index = int(video_id[3:])
+        start, end, next_token = self._page(params, self.config.comments_per_video)
+        items = []
+        for comment_index in range(start, end):
+            top_level = self._comment(video_index, comment_index)
+            thread = {
+                'id': top_level['id'],
+                'snippet': {
+                    'videoId': video_id,
+                    'topLevelComment': top_level,
+                    'totalReplyCount': self.config.replies_per_thread
+                }
+            }
+            if 'replies' in params.get('part', '') and self.config.replies_per_thread:
+                thread['replies'] = {
+                    'comments': [self._comment(video_index, r, top_level['id']) for r in range(min(5, self.config.replies_per_thread))]
+                }
+            items.append(thread)
+        data = {'items': items}
+        if next_token:
+            data['nextPageToken'] = next_token
+        return data
+    
+    def comments(self, params):
+        parent_id = params.get('parentId', '')
+        video_index = int(parent_id[3:8]) if parent_id.startswith('vid') else 0
+        start, end, next_token = self._page(params, self.config.replies_per_thread)
+        data = {'items': [self._comment(video_index, r, parent_id) for r in range(start, end)]}
+        if next_token:
+            data['nextPageToken'] = next_token
+        return data
+    
+    def handle(self, path, params):
+        """Return (status, payload) for a request path and flattened query params"""
+        endpoint = path[len(API_PREFIX):].strip('/') if path.startswith(API_PREFIX) else path.strip('/')
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+            inject_quota_error = (
+                params.get('key') in self.config.exhausted_keys
+                or (self.config.quota_error_rate and self._random.random() < self.config.quota_error_rate)
+            )
+            if inject_quota_error:
+                self.quota_errors += 1
+
+        delay = self.config.latency + (self._random.uniform(0, self.config.jitter) if self.config.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+        if inject_quota_error:
+            return 403, {'error': {'code': 403, 'message': 'The request cannot be completed because you have exceeded your quota.',
+                                   'errors': [{'reason': 'quotaExceeded', 'domain': 'youtube.quota'}]}}
+
+        handlers = {
+            'search': self.search,
+            'videos': self.videos,
+            'channels': self.channels,
+            'playlistItems': self.playlist_items,
+            'commentThreads': self.comment_threads,
+            'comments': self.comments
+        }
+        if endpoint not in handlers:
+            return 404, {'error': {'code': 404, 'message': f"Unknown endpoint {endpoint}", 'errors': [{'reason': 'notFound'}]}}
+        return 200, handlers[endpoint](params)
+    
+    # Server lifecycle
+    
+    def start(self, host='127.0.0.1', port=0):
+        """Start serving on a daemon thread and return the base URL for YOUTUBE_API_BASE_URL"""
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                params = {name: values[-1] for name, values in parse_qs(parsed.query).items()}
+                status, payload = api.handle(parsed.path, params)
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-youtube-api', daemon=True)
+        self._thread.start()
+        return f"http://{host}:{self._server.server_address[1]}{API_PREFIX}"
+    
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a fake YouTube Data API for local benchmarking')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--videos', type=int, default=20)
+    parser.add_argument('--comments', type=int, default=200, help='comments per video')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--replies', type=int, default=0, help='replies per comment thread')
+    parser.add_argument('--quota-error-rate', type=float, default=0.0)
+    parser.add_argument('--exhausted-key', action='append', default=[])
+    args = parser.parse_args()
+    
+    api = FakeYouTubeAPI(FakeYouTubeConfig(
+        videos=args.videos, comments_per_video=args.comments, latency=args.latency, jitter=args.jitter,
+        max_page_size=args.page_size, replies_per_thread=args.replies,
+        quota_error_rate=args.quota_error_rate, exhausted_keys=args.exhausted_key
+    ))
+    base_url = api.start(args.host, args.port)
+    print(f"Fake YouTube API listening; set YOUTUBE_API_BASE_URL={base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        api.stop()
+
+if __name__ == '__main__':
+    main()
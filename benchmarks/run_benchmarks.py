@@ -0,0 +1,269 @@
+"""Benchmark app.py against the local fake YouTube Data API.
+
+Starts the fake API, points YouTubeCommentsService at it, serves the Flask
+app on a local threaded server and measures throughput and latency
+percentiles for the dashboard endpoints under concurrent load, plus
+micro-benchmarks for analyze_sentiment and generate_ai_analysis. An
+export-data request is timed until its report is downloaded: a queued job
+is polled through its status_url first.
+Results are written as JSON so runs can be compared:
+
+    python benchmarks/run_benchmarks.py --output bench_results.json
+    python benchmarks/run_benchmarks.py --compare bench_results.json --output new.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_youtube_api import FakeYouTubeAPI, FakeYouTubeConfig
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def summarize(latencies, errors, wall_seconds):
+    """Turn raw latencies (seconds) into the stats recorded in the results file"""
+    ordered = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / wall_seconds, 2) if wall_seconds else 0,
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0,
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 2),
+        'p90_ms': round(percentile(ordered, 0.90) * 1000, 2),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 2),
+        'max_ms': round(ordered[-1] * 1000, 2) if ordered else 0
+    }
+
+def configure_environment(args, api_base_url, workdir):
+    """Point app.py at the fake API and at throwaway cache/store files before it is imported"""
+    os.environ.update({
+        'YOUTUBE_API_BASE_URL': api_base_url,
+        'API_KEY_1': 'bench-key-1',
+        'API_KEY_2': 'bench-key-2',
+        'YOUTUBE_DAILY_QUOTA': str(args.daily_quota),
+        'CACHE_DB_PATH': os.path.join(workdir, 'cache.sqlite3'),
+        'COMMENT_STORE_PATH': os.path.join(workdir, 'store.sqlite3'),
+        'REPORT_DIR': os.path.join(workdir, 'reports'),
+        'BACKGROUND_REFRESH': 'off',
+        'ADMISSION_CONTROL': 'off'
+    })
+
+def serve_app(flask_app):
+    """Serve the Flask app on a threaded local server and return (server, base_url)"""
+    from werkzeug.serving import make_server
+    server = make_server('127.0.0.1', 0, flask_app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='bench-app', daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+def finish_report_job(session, base_url, response, poll_interval=0.05, timeout=120):
+    """Poll a 202 report job until it ends and download the report; returns the final response, or None if the job failed
+    
+    A 303 to an already built report has been followed by requests, so
+    any other response is returned as it is.
+    """
+    if response.status_code != 202:
+        return response
+    deadline = time.perf_counter() + timeout
+    status = response.json()
+    while status['status'] not in ('done', 'failed'):
+        if time.perf_counter() > deadline:
+            return None
+        time.sleep(poll_interval)
+        status = session.get(base_url + status['status_url'], timeout=timeout).json()
+    if status['status'] == 'failed':
+        return None
+    return session.get(base_url + status['download_url'], timeout=timeout)
+
+def load_test(base_url, path, total_requests, concurrency, follow=None):
+    """Issue total_requests GETs to path with concurrency clients and summarize latencies
+    
+    follow(session, base_url, response) may carry a request on (polling a
+    job, say) and is included in its latency.
+    """
+    local = threading.local()
+    
+    def one_request(_):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        started = time.perf_counter()
+        try:
+            response = session.get(base_url + path, timeout=120)
+            if follow is not None:
+                response = follow(session, base_url, response)
+            ok = response is not None and response.status_code < 400
+            if response is not None:
+                response.content
+        except (requests.exceptions.RequestException, ValueError, KeyError):
+            ok = False
+        return time.perf_counter() - started, ok
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one_request, range(total_requests)))
+    wall = time.perf_counter() - started
+    return summarize([latency for latency, _ in results], sum(1 for _, ok in results if not ok), wall)
+
+def micro_benchmark(fn, repeat):
+    """Time fn() repeat times and summarize"""
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call_started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, 0, time.perf_counter() - started)
+
+def run_micro_benchmarks(app_module, fake_api, args):
+    """Benchmark analyze_sentiment (cold and memoized) and generate_ai_analysis"""
+    texts = [fake_api._comment_text(i % fake_api.config.videos, i) for i in range(args.micro_comments)]
+    results = {}
+    
+    def sentiment_cold():
+        app_module.sentiment_engine._memo.clear()
+        for text in texts:
+            app_module.youtube_service.analyze_sentiment(text)
+    
+    def sentiment_warm():
+        for text in texts:
+            app_module.youtube_service.analyze_sentiment(text)
+    
+    results['analyze_sentiment_cold'] = micro_benchmark(sentiment_cold, args.micro_repeat)
+    results['analyze_sentiment_cold']['texts_per_call'] = len(texts)
+    results['analyze_sentiment_memoized'] = micro_benchmark(sentiment_warm, args.micro_repeat)
+    results['analyze_sentiment_memoized']['texts_per_call'] = len(texts)
+    
+    labels = app_module.youtube_service.analyze_sentiments(texts)
+    video_data = {
+        'title': 'Benchmark video',
+        'comments': [
+            {'author': f"viewer{i}", 'comment': text, 'likeCount': i % 50, 'sentiment': label, 'date': '2026-01-01T00:00:00Z'}
+            for i, (text, label) in enumerate(zip(texts, labels))
+        ]
+    }
+    for sentiment_type in ('negative', 'positive'):
+        results[f"generate_ai_analysis_{sentiment_type}"] = micro_benchmark(
+            lambda: app_module.generate_ai_analysis(video_data, sentiment_type), args.micro_repeat
+        )
+    return results
+
+# Endpoints answered with a report job; they are timed until the report is downloaded
+ASYNC_JOB_ENDPOINTS = {'export-data': finish_report_job}
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(previous, current):
+    """Print p50/p99/throughput deltas against a previous results file"""
+    print(f"\nComparison with {previous.get('revision')} ({previous.get('started_at')}):")
+    for section in ('endpoints', 'micro'):
+        for name, stats in current.get(section, {}).items():
+            before = previous.get(section, {}).get(name)
+            if not before:
+                continue
+            if name in ASYNC_JOB_ENDPOINTS and previous.get('config', {}).get('export_timing') != current['config']['export_timing']:
+                print(f"  {name}: not comparable, {previous.get('revision')} timed it as a synchronous GET")
+                continue
+            deltas = []
+            for metric in ('p50_ms', 'p99_ms', 'throughput_rps'):
+                if before.get(metric):
+                    change = (stats[metric] - before[metric]) / before[metric] * 100
+                    deltas.append(f"{metric} {before[metric]} -> {stats[metric]} ({change:+.1f}%)")
+            print(f"  {name}: " + ', '.join(deltas))
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the dashboard API against a local fake YouTube API')
+    parser.add_argument('--requests', type=int, default=40, help='requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--videos', type=int, default=20)
+    parser.add_argument('--comments', type=int, default=200, help='comments per video on the fake API')
+    parser.add_argument('--latency', type=float, default=0.05, help='fake API latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.02)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--quota-error-rate', type=float, default=0.0)
+    parser.add_argument('--daily-quota', type=int, default=1000000)
+    parser.add_argument('--mode', choices=['warm', 'cold'], default='warm',
+                        help='warm uses the shared cache and store; cold fetches upstream on every request')
+    parser.add_argument('--micro-comments', type=int, default=500)
+    parser.add_argument('--micro-repeat', type=int, default=5)
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', help='previous results file to diff against')
+    args = parser.parse_args()
+    
+    fake_api = FakeYouTubeAPI(FakeYouTubeConfig(
+        videos=args.videos, comments_per_video=args.comments, latency=args.latency, jitter=args.jitter,
+        max_page_size=args.page_size, quota_error_rate=args.quota_error_rate
+    ))
+    api_base_url = fake_api.start()
+    workdir = tempfile.mkdtemp(prefix='car_sense_bench_')
+    configure_environment(args, api_base_url, workdir)
+    
+    import logging
+    import app as app_module
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    if args.mode == 'cold':
+        app_module.youtube_service.cache = None
+        app_module.youtube_service.store = None
+    
+    server, base_url = serve_app(app_module.app)
+    video_url = f"https://www.youtube.com/watch?v={fake_api.video_id(0)}"
+    endpoints = {
+        'chart-data': '/api/chart-data?max_videos=10&max_comments=50',
+        'sentiment-data': '/api/sentiment-data?max_videos=5&max_comments=20',
+        'ai-analysis': f"/api/ai-analysis?video_url={requests.utils.quote(video_url, safe='')}&sentiment_type=negative",
+        'export-data': f"/api/export-data?format=DOCX&video_url={requests.utils.quote(video_url, safe='')}&sentiment_type=negative"
+    }
+    
+    results = {
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'revision': git_revision(),
+        'config': dict(vars(args), export_timing='job-until-download'),
+        'endpoints': {},
+        'micro': {}
+    }
+    try:
+        for name, path in endpoints.items():
+            print(f"Benchmarking {name} ({args.requests} requests, concurrency {args.concurrency})...")
+            results['endpoints'][name] = load_test(base_url, path, args.requests, args.concurrency, ASYNC_JOB_ENDPOINTS.get(name))
+            print(f"  {results['endpoints'][name]}")
+        print("Running micro-benchmarks...")
+        results['micro'] = run_micro_benchmarks(app_module, fake_api, args)
+        for name, stats in results['micro'].items():
+            print(f"  {name}: {stats}")
+        results['upstream_calls'] = dict(fake_api.calls)
+        results['upstream_quota_errors'] = fake_api.quota_errors
+    finally:
+        server.shutdown()
+        fake_api.stop()
+    
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,15 @@
+"""Background worker that keeps the dashboard snapshots warm.
+
+Run next to the web process (see Procfile) so user requests are always
+answered from a recent snapshot instead of waiting on the YouTube API.
+Several workers can run at once: each channel is leased to one of them
+per refresh interval, so the monitored channels are split between them.
+"""
+from app import channels, logger, snapshot_refresher
+
+if __name__ == '__main__':
+    logger.info(
+        f"Starting snapshot refresh worker for {len(channels)} channels, "
+        f"{snapshot_refresher.combinations} every {snapshot_refresher.interval}s"
+    )
+    snapshot_refresher.run_forever(channels)
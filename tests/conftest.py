@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+
+# app reads its configuration at import time, so point it at scratch files and
+# an unreachable API before any test module imports it
+_scratch = tempfile.mkdtemp(prefix='car_sense_tests_')
+os.environ.update({
+    'CACHE_DB_PATH': os.path.join(_scratch, 'cache.sqlite3'),
+    'COMMENT_STORE_PATH': os.path.join(_scratch, 'store.sqlite3'),
+    'REPORT_DIR': os.path.join(_scratch, 'reports'),
+    'YOUTUBE_API_BASE_URL': 'http://127.0.0.1:9',
+    'API_KEY_1': 'test-key',
+    'ADMISSION_CONTROL': 'off',
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,101 @@
+import threading
+import time
+
+import pytest
+
+import app
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'condition not reached'
+        time.sleep(0.01)
+
+
+def test_rate_limit_allows_a_burst_per_client():
+    controller = app.AdmissionController({}, rate=1, burst=3)
+    for _ in range(3):
+        controller.leave('chart-data', controller.enter('chart-data', 'client-a'))
+    
+    with pytest.raises(app.AdmissionRejected) as rejected:
+        controller.enter('chart-data', 'client-a')
+    assert rejected.value.reason == 'rate_limited'
+    assert rejected.value.retry_after >= 1
+    
+    controller.leave('chart-data', controller.enter('chart-data', 'client-b'))
+    assert controller.stats()['rejections'] == {'rate_limited': 1}
+
+
+def test_rate_limit_refills_over_time():
+    controller = app.AdmissionController({}, rate=20, burst=1)
+    controller.enter('chart-data', 'client')
+    with pytest.raises(app.AdmissionRejected):
+        controller.enter('chart-data', 'client')
+    
+    time.sleep(0.1)
+    controller.enter('chart-data', 'client')
+
+
+def test_concurrency_limit_queues_then_admits():
+    controller = app.AdmissionController({'ai-analysis': 1}, queue_size=1, queue_timeout=2, rate=0)
+    admitted = controller.enter('ai-analysis', 'first')
+    entered = threading.Event()
+    
+    def second():
+        with controller.slot('ai-analysis', 'second'):
+            entered.set()
+    
+    waiter = threading.Thread(target=second)
+    waiter.start()
+    wait_for(lambda: controller.stats()['routes']['ai-analysis']['waiting'] == 1)
+    assert not entered.is_set()
+    assert controller.stats()['routes']['ai-analysis']['in_flight'] == 1
+    
+    controller.leave('ai-analysis', admitted)
+    waiter.join(2)
+    assert entered.is_set()
+    assert controller.stats()['routes']['ai-analysis'] == {
+        'limit': 1, 'in_flight': 0, 'waiting': 0, 'avg_seconds': pytest.approx(0, abs=1)
+    }
+
+
+def test_full_queue_rejects_at_once():
+    controller = app.AdmissionController({'export-data': 1}, queue_size=1, queue_timeout=2, rate=0)
+    admitted = controller.enter('export-data', 'first')
+    waiter = threading.Thread(target=lambda: controller.leave('export-data', controller.enter('export-data', 'second')))
+    waiter.start()
+    wait_for(lambda: controller.stats()['routes']['export-data']['waiting'] == 1)
+    
+    started = time.monotonic()
+    with pytest.raises(app.AdmissionRejected) as rejected:
+        controller.enter('export-data', 'third')
+    assert rejected.value.reason == 'queue_full'
+    assert time.monotonic() - started < 0.5
+    
+    controller.leave('export-data', admitted)
+    waiter.join(2)
+    assert controller.stats()['rejections'] == {'queue_full': 1}
+
+
+def test_queued_request_times_out():
+    controller = app.AdmissionController({'chart-data': 1}, queue_size=4, queue_timeout=0.2, rate=0)
+    admitted = controller.enter('chart-data', 'first')
+    
+    started = time.monotonic()
+    with pytest.raises(app.AdmissionRejected) as rejected:
+        controller.enter('chart-data', 'second')
+    assert rejected.value.reason == 'queue_timeout'
+    assert 0.15 <= time.monotonic() - started < 1
+    assert controller.stats()['routes']['chart-data']['waiting'] == 0
+    
+    controller.leave('chart-data', admitted)
+    controller.leave('chart-data', controller.enter('chart-data', 'third'))
+
+
+def test_unlimited_routes_are_only_rate_limited():
+    controller = app.AdmissionController({'chart-data': 1}, rate=0)
+    held = [controller.enter('videos', 'client') for _ in range(5)]
+    
+    assert len(held) == 5
+    assert 'videos' not in controller.stats()['routes']
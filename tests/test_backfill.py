@@ -0,0 +1,106 @@
+import pytest
+
+import app
+
+
+PAGES = {
+    None: (['v6', 'v5'], '2026-10-0', 'p2'),
+    'p2': (['v4', 'v3'], '2026-09-2', 'p3'),
+    'p3': (['v2', 'v1'], '2026-08-1', None),
+}
+
+
+def playlist_page(token):
+    video_ids, month, next_token = PAGES[token]
+    data = {'items': [
+        {'snippet': {'title': video_id}, 'contentDetails': {'videoId': video_id, 'videoPublishedAt': f"{month}{i}T00:00:00Z"}}
+        for i, video_id in zip((5, 1), video_ids)
+    ]}
+    if next_token:
+        data['nextPageToken'] = next_token
+    return data
+
+
+class FakeChannel:
+    """Answers the channels and playlistItems calls a backfill makes, optionally failing one page"""
+    
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.calls = []
+    
+    def __call__(self, endpoint, params, description):
+        self.calls.append((endpoint, params.get('pageToken')))
+        if endpoint == 'channels':
+            return {'items': [{'contentDetails': {'relatedPlaylists': {'uploads': 'UUfill'}}}]}
+        if self.fail_on is not None and params.get('pageToken') == self.fail_on:
+            raise app.QuotaExhaustedError('No API key has quota left')
+        return playlist_page(params.get('pageToken'))
+
+
+@pytest.fixture
+def make_service(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, 'BACKFILL_PAGE_INTERVAL', 0)
+    cache = app.SharedCache(db_path=str(tmp_path / 'cache.sqlite3'))
+    store = app.CommentStore(db_path=str(tmp_path / 'store.sqlite3'))
+    pool = app.ApiKeyPool(['key-a'], cache=cache)
+    
+    def make(api):
+        service = app.YouTubeCommentsService(cache=cache, store=store, key_pool=pool, channel_id='UCfill')
+        service._api_get = api
+        service.sync_video_comments = lambda video_id, max_comments: 2
+        return service
+    
+    return make
+
+
+def test_backfill_checkpoints_each_page_and_resumes_after_a_restart(make_service):
+    first = make_service(FakeChannel())
+    first.store.start_backfill('UCfill')
+    
+    state = first.run_backfill(max_pages=1)
+    assert state['status'] == 'running'
+    assert (state['playlist_id'], state['page_token'], state['pages'], state['videos'], state['comments']) == ('UUfill', 'p2', 1, 2, 4)
+    
+    restarted = make_service(FakeChannel())
+    state = restarted.run_backfill()
+    assert restarted._api_get.calls == [('playlistItems', 'p2'), ('playlistItems', 'p3')]
+    assert state['status'] == 'done'
+    assert (state['pages'], state['videos'], state['comments']) == (3, 6, 12)
+    assert state['oldest_published'] == '2026-08-11T00:00:00Z'
+    assert [video['videoId'] for video in restarted.store.get_videos('UCfill', 10)] == ['v6', 'v5', 'v4', 'v3', 'v2', 'v1']
+    assert restarted.run_backfill() is None
+
+
+def test_failed_page_pauses_at_the_last_checkpoint(make_service):
+    failing = make_service(FakeChannel(fail_on='p2'))
+    failing.store.start_backfill('UCfill')
+    
+    state = failing.run_backfill()
+    assert state['status'] == 'paused'
+    assert 'quota' in state['error']
+    assert (state['page_token'], state['pages'], state['videos']) == ('p2', 1, 2)
+    
+    resumed = make_service(FakeChannel())
+    state = resumed.run_backfill()
+    assert resumed._api_get.calls[0] == ('playlistItems', 'p2')
+    assert (state['status'], state['pages'], state['videos'], state['error']) == ('done', 3, 6, None)
+
+
+def test_low_quota_pauses_before_fetching(make_service, monkeypatch):
+    monkeypatch.setattr(app, 'BACKFILL_QUOTA_FLOOR', 1.5)
+    service = make_service(FakeChannel())
+    service.store.start_backfill('UCfill')
+    
+    state = service.run_backfill()
+    assert state['status'] == 'paused'
+    assert state['pages'] == 0
+    assert service._api_get.calls == [('channels', None)]
+
+
+def test_backfill_stops_at_its_until_date(make_service):
+    service = make_service(FakeChannel())
+    service.store.start_backfill('UCfill', until='2026-09-22')
+    
+    state = service.run_backfill()
+    assert state['status'] == 'done'
+    assert (state['pages'], state['videos'], state['oldest_published']) == (2, 3, '2026-09-25T00:00:00Z')
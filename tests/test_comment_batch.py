@@ -0,0 +1,58 @@
+import json
+
+import app
+
+
+COMMENTS = [
+    {'author': 'Ann', 'comment': 'Great video', 'date': '2024-05-01T10:00:00Z', 'likeCount': 12,
+     'sentiment': 'positive', 'authorProfileImageUrl': 'https://yt3.example/ann.jpg', 'videoId': 'vid-a',
+     'commentId': 'c1'},
+    {'author': 'Bob', 'comment': 'Too long', 'date': '2024-05-01T11:00:00Z', 'likeCount': 0,
+     'sentiment': 'negative', 'authorProfileImageUrl': '', 'videoId': 'vid-b', 'commentId': 'c2'},
+    {'author': 'Ann', 'comment': 'Agreed', 'date': '2024-05-01T12:00:00Z', 'likeCount': 3,
+     'sentiment': 'neutral', 'authorProfileImageUrl': 'https://yt3.example/ann.jpg', 'videoId': 'vid-a',
+     'commentId': 'c1.r1', 'parentId': 'c1'},
+]
+
+
+def round_trip(value):
+    return json.loads(json.dumps(value, default=app.encode_cached), object_hook=app.decode_cached)
+
+
+def test_batch_round_trips_through_the_cache_encoding():
+    batch = app.CommentBatch.from_dicts(COMMENTS)
+    assert batch.video_ids == ['vid-a', 'vid-b']
+    assert batch.avatars == ['https://yt3.example/ann.jpg', '']
+    
+    restored = round_trip({'comments': batch, 'total': 3})
+    assert isinstance(restored['comments'], app.CommentBatch)
+    assert restored['comments'].to_dicts() == COMMENTS
+    assert restored['comments'].sentiment_counts() == {'positive': 1, 'negative': 1, 'neutral': 1}
+    assert restored['comments'].reply_count() == 1
+    assert restored['comments'].total_likes() == 15
+    assert restored['total'] == 3
+
+
+def test_restored_batch_keeps_interning_new_comments():
+    restored = round_trip(app.CommentBatch.from_dicts(COMMENTS))
+    restored.extend([{**COMMENTS[0], 'commentId': 'c3'}, {**COMMENTS[1], 'videoId': 'vid-c', 'commentId': 'c4'}])
+    
+    assert restored.video_ids == ['vid-a', 'vid-b', 'vid-c']
+    assert len(restored.avatars) == 2
+    assert [restored.video_id(i) for i in range(len(restored))] == ['vid-a', 'vid-b', 'vid-a', 'vid-a', 'vid-c']
+
+
+def test_batch_round_trips_through_the_shared_cache(tmp_path):
+    cache = app.SharedCache(db_path=str(tmp_path / 'cache.sqlite3'))
+    cache.set('comments', {'comments': app.CommentBatch.from_dicts(COMMENTS)})
+    
+    assert cache.get('comments')['comments'].to_dicts() == COMMENTS
+
+
+def test_columns_cached_before_replies_are_read_as_top_level():
+    columns = app.CommentBatch.from_dicts(COMMENTS[:2]).to_columns()
+    del columns['parentId']
+    
+    restored = app.CommentBatch.from_columns(columns)
+    assert restored.to_dicts() == COMMENTS[:2]
+    assert restored.reply_count() == 0
@@ -0,0 +1,239 @@
+import app
+
+
+def make_comment(comment_id, video_id='vid1', text='Great car', sentiment='positive', likes=1,
+                 date='2026-10-01T10:00:00Z', parent_id=None):
+    comment = {
+        'commentId': comment_id,
+        'videoId': video_id,
+        'author': 'viewer',
+        'comment': text,
+        'date': date,
+        'likeCount': likes,
+        'sentiment': sentiment,
+        'authorProfileImageUrl': '',
+    }
+    if parent_id:
+        comment['parentId'] = parent_id
+    return comment
+
+
+def rollup_rows(store, table):
+    with store._connect() as conn:
+        rows = conn.execute(f"SELECT video_id, day, sentiment, comment_count, like_total FROM {table}").fetchall()
+    return sorted(row for row in rows if row[3] or row[4])
+
+
+def recount(store, condition):
+    with store._connect() as conn:
+        return sorted(conn.execute(
+            'SELECT video_id, substr(date, 1, 10), sentiment, COUNT(*), SUM(like_count) '
+            f"FROM comments WHERE {condition} GROUP BY video_id, substr(date, 1, 10), sentiment"
+        ).fetchall())
+
+
+def channel_rows(store):
+    with store._connect() as conn:
+        rows = conn.execute(
+            'SELECT channel_id, day, sentiment, is_reply, comment_count, like_total FROM channel_rollups'
+        ).fetchall()
+    return sorted(row for row in rows if row[4] or row[5])
+
+
+def channel_recount(store):
+    with store._connect() as conn:
+        return sorted(conn.execute(
+            'SELECT v.channel_id, substr(c.date, 1, 10), c.sentiment, c.parent_id IS NOT NULL, COUNT(*), SUM(c.like_count) '
+            'FROM comments c JOIN videos v ON v.video_id = c.video_id '
+            'GROUP BY v.channel_id, substr(c.date, 1, 10), c.sentiment, c.parent_id IS NOT NULL'
+        ).fetchall())
+
+
+def assert_rollups_match(store):
+    assert rollup_rows(store, 'daily_rollups') == recount(store, 'parent_id IS NULL')
+    assert rollup_rows(store, 'reply_rollups') == recount(store, 'parent_id IS NOT NULL')
+    assert channel_rows(store) == channel_recount(store)
+
+
+def make_store(tmp_path):
+    store = app.CommentStore(db_path=str(tmp_path / 'store.sqlite3'))
+    store.save_videos('UC1', [
+        {'videoId': 'vid1', 'title': 'First', 'publishedAt': '2026-09-30T00:00:00Z'},
+        {'videoId': 'vid2', 'title': 'Second', 'publishedAt': '2026-09-30T00:00:00Z'},
+    ])
+    return store
+
+
+def test_insert_matches_recount(tmp_path):
+    store = make_store(tmp_path)
+    store.save_comments([
+        make_comment('c1'),
+        make_comment('c2', sentiment='negative', text='Awful brakes', likes=4),
+        make_comment('c3', video_id='vid2', date='2026-10-02T08:00:00Z', likes=7),
+        make_comment('r1', text='Agreed', sentiment='neutral', likes=2, parent_id='c1'),
+    ])
+    
+    assert_rollups_match(store)
+    assert rollup_rows(store, 'daily_rollups') == [
+        ('vid1', '2026-10-01', 'negative', 1, 4),
+        ('vid1', '2026-10-01', 'positive', 1, 1),
+        ('vid2', '2026-10-02', 'positive', 1, 7),
+    ]
+    assert rollup_rows(store, 'reply_rollups') == [('vid1', '2026-10-01', 'neutral', 1, 2)]
+
+
+def test_update_moves_counts_to_the_new_values(tmp_path):
+    store = make_store(tmp_path)
+    store.save_comments([make_comment('c1'), make_comment('c2', likes=3)])
+    
+    store.save_comments([
+        make_comment('c1', text='Actually terrible', sentiment='negative', likes=10),
+        make_comment('c2', likes=3, date='2026-10-03T09:00:00Z'),
+    ])
+    
+    assert_rollups_match(store)
+    assert rollup_rows(store, 'daily_rollups') == [
+        ('vid1', '2026-10-01', 'negative', 1, 10),
+        ('vid1', '2026-10-03', 'positive', 1, 3),
+    ]
+
+
+def test_duplicate_insert_counts_once(tmp_path):
+    store = make_store(tmp_path)
+    store.save_comments([make_comment('c1'), make_comment('c2')])
+    
+    store.save_comments([make_comment('c1'), make_comment('c2')])
+    store.save_comments([make_comment('c3', likes=2), make_comment('c3', likes=5), make_comment('c1')])
+    
+    assert_rollups_match(store)
+    assert rollup_rows(store, 'daily_rollups') == [('vid1', '2026-10-01', 'positive', 3, 7)]
+
+
+def test_comments_saved_before_their_video_reach_the_channel_rollups(tmp_path):
+    store = app.CommentStore(db_path=str(tmp_path / 'store.sqlite3'))
+    store.save_comments([make_comment('c1', video_id='late'), make_comment('c2', video_id='late', likes=5)])
+    assert channel_rows(store) == []
+    
+    store.save_videos('UC1', [{'videoId': 'late', 'title': 'Late', 'publishedAt': '2026-09-30T00:00:00Z'}])
+    
+    assert_rollups_match(store)
+    assert channel_rows(store) == [('UC1', '2026-10-01', 'positive', 0, 2, 6)]
+
+
+def term_index(store):
+    with store._connect() as conn:
+        counts = conn.execute('SELECT scope, sentiment, term, count FROM term_counts').fetchall()
+        totals = conn.execute('SELECT scope, sentiment, comments FROM term_totals').fetchall()
+    return sorted(row for row in counts if row[3]), sorted(row for row in totals if row[2])
+
+
+def rebuilt_term_index(store):
+    with store._connect() as conn:
+        conn.execute('DELETE FROM term_counts')
+        conn.execute('DELETE FROM term_totals')
+    return term_index(app.CommentStore(db_path=store.db_path))
+
+
+def test_term_deltas_match_a_rebuild(tmp_path):
+    store = make_store(tmp_path)
+    store.save_comments([
+        make_comment('c1', text='Brakes squeal on cold mornings'),
+        make_comment('c2', text='Brakes squeal constantly', sentiment='negative'),
+        make_comment('c3', video_id='vid2', text='Lovely interior design'),
+        make_comment('r1', text='Cold mornings are brutal', sentiment='neutral', parent_id='c1'),
+        make_comment('o1', video_id='other', text='Unrelated video comment'),
+    ])
+    store.save_comments([
+        make_comment('c1', text='Brakes fixed after recall', sentiment='positive'),
+        make_comment('c2', text='Brakes squeal constantly', sentiment='neutral'),
+        make_comment('c3', video_id='vid2', text='Lovely interior design'),
+        make_comment('c4', video_id='vid2', text='Interior design feels cheap', sentiment='negative'),
+    ])
+    
+    incremental = term_index(store)
+    themes = store.get_themes('negative', channel_id='UC1')
+    assert ('channel:UC1', 'negative', 'interior design', 1) in incremental[0]
+    assert not any(term == 'squeal' and sentiment == 'negative' for _, sentiment, term, _ in incremental[0])
+    assert ('video:vid1', 'positive', 1) in incremental[1]
+    assert ('video:vid1', 'neutral', 2) in incremental[1]
+    
+    assert rebuilt_term_index(store) == incremental
+    assert store.get_themes('negative', channel_id='UC1') == themes
+
+
+def search_ids(store, text, **filters):
+    batch, _ = store.search_comments(app.search_match_query(text), limit=100, **filters)
+    return sorted(batch.comment_ids)
+
+
+def test_search_index_follows_edits(tmp_path):
+    store = make_store(tmp_path)
+    store.save_comments([
+        make_comment('c1', text='Brakes squeal on cold mornings'),
+        make_comment('c2', text='Brakes feel spongy', sentiment='negative'),
+        make_comment('c3', video_id='vid2', text='Gearbox is smooth'),
+    ])
+    assert search_ids(store, 'brake') == ['c1', 'c2']
+    
+    store.save_comments([
+        make_comment('c1', text='Dealer fixed the squeal'),
+        make_comment('c2', text='Brakes feel spongy', sentiment='negative', likes=9),
+        {**make_comment('c3', video_id='vid2', text='Gearbox is smooth'), 'author': 'mechanic'},
+    ])
+    
+    assert search_ids(store, 'brake') == ['c2']
+    assert search_ids(store, 'squeal') == ['c1']
+    assert search_ids(store, 'cold mornings') == []
+    assert search_ids(store, 'mechanic') == ['c3']
+    assert search_ids(store, 'squeal', video_id='vid2') == []
+    _, counts = store.search_comments(app.search_match_query('brakes'))
+    assert counts == {'positive': 0, 'negative': 1, 'neutral': 0}
+    
+    with store._connect() as conn:
+        conn.execute("INSERT INTO comment_search (comment_search, rank) VALUES ('integrity-check', 1)")
+        assert conn.execute('SELECT COUNT(*) FROM comment_search').fetchone()[0] == 3
+
+
+def channel_terms(store, channel_id):
+    counts, totals = term_index(store)
+    scope = f"channel:{channel_id}"
+    return [row[1:] for row in counts if row[0] == scope], [row[1:] for row in totals if row[0] == scope]
+
+
+def test_save_videos_moves_comments_between_channels(tmp_path):
+    store = make_store(tmp_path)
+    store.save_comments([
+        make_comment('c1', text='Brakes squeal'),
+        make_comment('c2', video_id='vid2', text='Smooth gearbox', likes=4),
+        make_comment('r1', video_id='vid2', text='Gearbox agreed', sentiment='neutral', parent_id='c2'),
+    ])
+    
+    store.save_videos('UC2', [{'videoId': 'vid2', 'title': 'Second', 'publishedAt': '2026-09-30T00:00:00Z'}])
+    
+    assert_rollups_match(store)
+    assert channel_rows(store) == [
+        ('UC1', '2026-10-01', 'positive', 0, 1, 1),
+        ('UC2', '2026-10-01', 'neutral', 1, 1, 1),
+        ('UC2', '2026-10-01', 'positive', 0, 1, 4),
+    ]
+    assert channel_terms(store, 'UC1') == (
+        [('positive', 'brakes', 1), ('positive', 'brakes squeal', 1), ('positive', 'squeal', 1)],
+        [('positive', 1)]
+    )
+    assert ('positive', 'gearbox', 1) in channel_terms(store, 'UC2')[0]
+    assert channel_terms(store, 'UC2')[1] == [('neutral', 1), ('positive', 1)]
+    assert rebuilt_term_index(store) == term_index(store)
+
+
+def test_save_videos_indexes_comments_saved_before_their_video(tmp_path):
+    store = app.CommentStore(db_path=str(tmp_path / 'store.sqlite3'))
+    store.save_comments([make_comment('c1', video_id='late', text='Early comment arrives', sentiment='negative')])
+    assert channel_terms(store, 'UC1') == ([], [])
+    
+    store.save_videos('UC1', [{'videoId': 'late', 'title': 'Late', 'publishedAt': '2026-09-30T00:00:00Z'}])
+    store.save_videos('UC1', [{'videoId': 'late', 'title': 'Late, renamed', 'publishedAt': '2026-09-30T00:00:00Z'}])
+    
+    assert channel_terms(store, 'UC1')[1] == [('negative', 1)]
+    assert [term for _, term, _ in channel_terms(store, 'UC1')[0]] == ['arrives', 'comment', 'comment arrives', 'early', 'early comment']
+    assert store.get_themes('negative', channel_id='UC1')
+    assert rebuilt_term_index(store) == term_index(store)
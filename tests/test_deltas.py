@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import app
+
+NOW = datetime.now(timezone.utc)
+PUBLISHED = (NOW - timedelta(days=2)).strftime('%Y-%m-%dT%H:%M:%SZ')
+DAY_1 = (NOW - timedelta(days=1)).strftime('%Y-%m-%d')
+DAY_2 = NOW.strftime('%Y-%m-%d')
+
+
+def make_comment(comment_id, video_id, day, sentiment='positive', text='Great car', likes=1):
+    return {
+        'commentId': comment_id,
+        'videoId': video_id,
+        'author': 'viewer',
+        'comment': text,
+        'date': f'{day}T10:00:00Z',
+        'likeCount': likes,
+        'sentiment': sentiment,
+        'authorProfileImageUrl': '',
+    }
+
+
+@pytest.fixture
+def service(tmp_path):
+    store = app.CommentStore(db_path=str(tmp_path / 'store.sqlite3'))
+    store.save_videos('UC1', [
+        {'videoId': 'vid1', 'title': 'First review', 'publishedAt': PUBLISHED},
+        {'videoId': 'vid2', 'title': 'Second review', 'publishedAt': PUBLISHED},
+    ])
+    store.save_comments([
+        make_comment('c1', 'vid1', DAY_1),
+        make_comment('c2', 'vid1', DAY_1, sentiment='negative', text='Awful brakes'),
+        make_comment('c3', 'vid2', DAY_1),
+    ])
+    return app.YouTubeCommentsService(store=store, key_pool=app.ApiKeyPool(['test-key']), channel_id='UC1')
+
+
+def current_cursor(service):
+    return app.make_cursor(service.store.change_seq(), ['vid1', 'vid2'])
+
+
+def test_unchanged_store_returns_changed_false(service):
+    cursor = current_cursor(service)
+    
+    assert service.get_chart_delta(cursor) == {'delta': True, 'changed': False, 'cursor': cursor}
+    assert service.get_comments_delta(cursor) == {'delta': True, 'changed': False, 'cursor': cursor}
+
+
+def test_comments_delta_holds_only_the_saved_comments(service):
+    cursor = current_cursor(service)
+    service.store.save_comments([
+        make_comment('c4', 'vid2', DAY_2, sentiment='negative', text='Too loud'),
+        make_comment('c1', 'vid1', DAY_1, likes=9),
+    ])
+    
+    delta = service.get_comments_delta(cursor)
+    
+    assert delta['changed'] is True
+    assert delta['cursor'] == current_cursor(service) != cursor
+    assert [video['videoId'] for video in delta['videos']] == ['vid1', 'vid2']
+    assert [c['commentId'] for c in delta['comments']['vid1'].to_dicts()] == ['c1']
+    assert delta['comments']['vid1'].to_dicts()[0]['likeCount'] == 9
+    assert [c['commentId'] for c in delta['comments']['vid2'].to_dicts()] == ['c4']
+    assert service.get_comments_delta(delta['cursor'])['changed'] is False
+
+
+def test_chart_delta_holds_changed_days_and_current_totals(service):
+    cursor = current_cursor(service)
+    service.store.save_comments([make_comment('c4', 'vid2', DAY_2, sentiment='negative', text='Too loud')])
+    
+    delta = service.get_chart_delta(cursor)
+    
+    assert delta['changed'] is True
+    assert delta['sentiment_by_date'] == {DAY_2: {'positive': 0, 'negative': 1, 'neutral': 0}}
+    assert delta['total_comments'] == 4
+    assert delta['sentiment_counts'] == {'positive': 2, 'negative': 2, 'neutral': 0}
+    assert service.get_chart_delta(delta['cursor']) == {'delta': True, 'changed': False, 'cursor': delta['cursor']}
+
+
+def test_resaving_identical_comments_reports_no_change(service):
+    cursor = current_cursor(service)
+    service.store.save_comments([make_comment('c3', 'vid2', DAY_1)])
+    
+    comments = service.get_comments_delta(cursor)
+    chart = service.get_chart_delta(cursor)
+    
+    assert comments['changed'] is False and comments['comments'] == {}
+    assert chart['changed'] is False
+    assert chart['cursor'] == comments['cursor'] == current_cursor(service)
+
+
+def test_stale_or_foreign_cursors_need_a_full_payload(service):
+    seq = service.store.change_seq()
+    
+    assert service.get_chart_delta('not-a-cursor') is None
+    assert service.get_comments_delta(app.make_cursor(seq, ['vid1'])) is None
+    assert service.get_chart_delta(app.make_cursor(seq + 5, ['vid1', 'vid2'])) is None
+    
+    service.store.save_videos('UC1', [{'videoId': 'vid3', 'title': 'New upload', 'publishedAt': PUBLISHED}])
+    assert service.get_chart_delta(app.make_cursor(seq, ['vid1', 'vid2'])) is None
@@ -0,0 +1,163 @@
+import json
+import threading
+
+import pytest
+import requests
+
+import app
+
+
+def make_pool(tmp_path, keys=('key-a', 'key-b'), daily_quota=100, **kwargs):
+    return app.ApiKeyPool(list(keys), daily_quota=daily_quota, cache=app.SharedCache(db_path=str(tmp_path / 'cache.sqlite3')),
+                          **kwargs)
+
+
+def remaining(pool):
+    return [key['remaining'] for key in pool.stats()['keys']]
+
+
+def api_response(status, payload):
+    response = requests.Response()
+    response.status_code = status
+    response.url = 'http://youtube.test/videos'
+    response._content = json.dumps(payload).encode('utf-8')
+    return response
+
+
+def api_error(status, reason):
+    return api_response(status, {'error': {'code': status, 'message': reason, 'errors': [{'reason': reason}]}})
+
+
+class KeyedSession:
+    """Stands in for the service's requests session, answering per API key"""
+    
+    def __init__(self, responses):
+        self.responses = responses
+        self.keys = []
+    
+    def get(self, url, params=None, timeout=None):
+        self.keys.append(params['key'])
+        return self.responses[params['key']]
+
+
+def make_service(pool, responses):
+    service = app.YouTubeCommentsService(key_pool=pool, channel_id='UCquota')
+    service.session = KeyedSession(responses)
+    return service
+
+
+def test_pools_sharing_a_file_never_spend_the_same_tokens(tmp_path):
+    pools = [make_pool(tmp_path, keys=('key-a',), daily_quota=20) for _ in range(4)]
+    granted = []
+    lock = threading.Lock()
+    
+    def spend(pool):
+        for _ in range(10):
+            try:
+                pool.acquire('videos')
+            except app.QuotaExhaustedError:
+                continue
+            with lock:
+                granted.append(1)
+    
+    threads = [threading.Thread(target=spend, args=(pool,)) for pool in pools]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(granted) == 20
+    assert all(pool.stats()['keys'][0]['spent'] == 20 for pool in pools)
+    assert all(pool.is_low('videos') for pool in pools)
+
+
+def test_spend_in_one_pool_is_seen_by_another(tmp_path):
+    first = make_pool(tmp_path)
+    second = make_pool(tmp_path)
+    
+    spent_key = first.acquire('search')
+    
+    assert sorted(remaining(second)) == [pytest.approx(0, abs=0.1), pytest.approx(100, abs=0.1)]
+    assert second.acquire('search') != spent_key
+    with pytest.raises(app.QuotaExhaustedError):
+        first.acquire('search')
+
+
+def test_quota_exceeded_drains_only_that_key(tmp_path):
+    pool = make_pool(tmp_path)
+    service = make_service(pool, {
+        'key-a': api_error(403, 'quotaExceeded'),
+        'key-b': api_response(200, {'items': []}),
+    })
+    
+    for _ in range(3):
+        assert service._api_get('videos', {'id': 'vid1'}, 'video vid1') == {'items': []}
+    
+    assert service.session.keys == ['key-a', 'key-b', 'key-b', 'key-b']
+    assert pool.stats()['switches'] == 1
+    assert remaining(pool) == [pytest.approx(0, abs=0.1), pytest.approx(97, abs=0.1)]
+
+
+def test_other_403_reasons_do_not_switch_keys(tmp_path):
+    pool = make_pool(tmp_path)
+    service = make_service(pool, {
+        'key-a': api_error(403, 'commentsDisabled'),
+        'key-b': api_error(403, 'commentsDisabled'),
+    })
+    
+    with pytest.raises(requests.exceptions.HTTPError):
+        service._api_get('commentThreads', {'videoId': 'vid1'}, 'comments for video vid1')
+    
+    assert len(service.session.keys) == 1
+    assert pool.stats()['switches'] == 0
+    assert sorted(remaining(pool)) == [pytest.approx(99, abs=0.1), pytest.approx(100, abs=0.1)]
+
+
+def test_in_body_quota_error_moves_to_the_next_key(tmp_path):
+    pool = make_pool(tmp_path)
+    quota_body = {'error': {'code': 403, 'message': 'quota', 'errors': [{'reason': 'dailyLimitExceeded'}]}}
+    service = make_service(pool, {
+        'key-a': api_response(200, quota_body),
+        'key-b': api_response(200, quota_body),
+    })
+    
+    with pytest.raises(app.QuotaExhaustedError):
+        service._api_get('videos', {'id': 'vid1'}, 'video vid1')
+    
+    assert sorted(service.session.keys) == ['key-a', 'key-b']
+    assert remaining(pool) == [pytest.approx(0, abs=0.1), pytest.approx(0, abs=0.1)]
+
+
+@pytest.mark.parametrize('shared', [True, False])
+def test_reserve_fraction_marks_the_pool_low(tmp_path, shared):
+    cache = app.SharedCache(db_path=str(tmp_path / 'cache.sqlite3')) if shared else None
+    pool = app.ApiKeyPool(['key-a', 'key-b'], daily_quota=10, reserve_fraction=0.25, cache=cache)
+    
+    for _ in range(15):
+        pool.acquire('videos')
+    assert not pool.is_low()
+    assert not pool.is_low('videos')
+    assert pool.is_low('search')
+    
+    pool.acquire('videos')
+    assert pool.is_low()
+    assert pool.stats()['shared'] is shared
+
+
+def test_channel_share_is_low_before_the_pool(tmp_path):
+    pool = make_pool(tmp_path, daily_quota=10, reserve_fraction=0.2)
+    busy = app.ChannelQuota(pool, 'UCbusy', share=0.5)
+    quiet = app.ChannelQuota(pool, 'UCquiet', share=0.5)
+    
+    for _ in range(8):
+        busy.acquire('videos')
+    assert not busy.is_low()
+    busy.acquire('videos')
+    
+    assert busy.is_low()
+    assert not quiet.is_low()
+    assert not pool.is_low()
+    busy.acquire('videos')
+    with pytest.raises(app.QuotaExhaustedError):
+        busy.acquire('videos')
+    assert quiet.acquire('videos') in pool.keys
@@ -0,0 +1,61 @@
+import time
+
+import app
+
+
+def reply_item(comment_id, parent_id):
+    return {'id': comment_id, 'snippet': {
+        'textDisplay': f"reply {comment_id}", 'authorDisplayName': 'viewer', 'publishedAt': '2026-10-01T10:00:00Z',
+        'likeCount': 0, 'parentId': parent_id
+    }}
+
+
+def make_service(tmp_path):
+    pool = app.ApiKeyPool(['key-a'], cache=app.SharedCache(db_path=str(tmp_path / 'cache.sqlite3')))
+    service = app.YouTubeCommentsService(key_pool=pool, channel_id='UCreplies')
+    service.max_workers = 1
+    calls = []
+    
+    def api_get(endpoint, params, description):
+        calls.append(params['parentId'])
+        page = len([parent for parent in calls if parent == params['parentId']])
+        return {'items': [reply_item(f"{params['parentId']}.{page}", params['parentId'])], 'nextPageToken': f"page-{page}"}
+    
+    service._api_get = api_get
+    return service, calls
+
+
+def test_budget_refuses_spend_past_its_quota():
+    budget = app.ReplyBudget(quota_units=3, seconds=60)
+    assert [budget.spend(1) for _ in range(4)] == [True, True, True, False]
+    assert not budget.spend(1)
+    assert budget.spent == 3
+
+
+def test_budget_refuses_spend_after_its_deadline():
+    budget = app.ReplyBudget(quota_units=100, seconds=0.05)
+    assert budget.spend(1)
+    time.sleep(0.1)
+    assert not budget.spend(1)
+    assert budget.spent == 1
+
+
+def test_exhausted_budget_stops_expansion_with_the_busiest_thread_first(tmp_path):
+    service, calls = make_service(tmp_path)
+    budget = app.ReplyBudget(quota_units=3, seconds=60)
+    
+    expanded = service.expand_reply_threads('vid1', [('quiet', 2), ('busy', 40)], budget)
+    
+    assert calls == ['busy', 'busy', 'busy']
+    assert [reply['commentId'] for reply in expanded['busy']] == ['busy.1', 'busy.2', 'busy.3']
+    assert 'quiet' not in expanded
+    assert budget.spent == 3
+
+
+def test_spent_budget_makes_no_calls(tmp_path):
+    service, calls = make_service(tmp_path)
+    budget = app.ReplyBudget(quota_units=1, seconds=60)
+    budget.spend(1)
+    
+    assert service.expand_reply_threads('vid1', [('busy', 40)], budget) == {}
+    assert calls == []
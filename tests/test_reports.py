@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pytest
+
+import app
+
+
+SPEC = {'video_urls': ['https://youtu.be/dQw4w9WgXcQ'], 'sentiment_type': 'negative', 'scope': 'video',
+        'include_replies': False, 'channel': 'UCreports'}
+
+
+def make_store(tmp_path, lease_seconds=0.3):
+    return app.ReportJobStore(str(tmp_path / 'reports.db'), str(tmp_path / 'reports'), lease_seconds=lease_seconds)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'condition not reached'
+        time.sleep(0.02)
+
+
+@pytest.mark.parametrize('status', ['queued', 'running'])
+def test_expired_lease_fails_the_job_when_polled(tmp_path, status):
+    store = make_store(tmp_path)
+    job_id, created = store.create(SPEC)
+    assert created
+    store.update(job_id, status=status)
+    assert store.get(job_id)['status'] == status
+    
+    time.sleep(0.35)
+    job = store.get(job_id)
+    assert job['status'] == 'failed'
+    assert 'submit the report again' in job['error']
+
+
+def test_create_reuses_a_live_job_until_its_lease_lapses(tmp_path):
+    store = make_store(tmp_path)
+    job_id, _ = store.create(SPEC)
+    assert store.create(SPEC) == (job_id, False)
+    
+    store.update(job_id, status='running')
+    assert store.create(SPEC) == (job_id, False)
+    assert store.create({**SPEC, 'sentiment_type': 'positive'})[0] != job_id
+    
+    time.sleep(0.35)
+    fresh_id, created = store.create(SPEC)
+    assert created
+    assert fresh_id != job_id
+    assert store.get(job_id)['status'] == 'failed'
+    assert store.get(fresh_id)['status'] == 'queued'
+
+
+def test_touch_keeps_the_lease_alive(tmp_path):
+    store = make_store(tmp_path)
+    job_id, _ = store.create(SPEC)
+    store.update(job_id, status='running')
+    for _ in range(3):
+        time.sleep(0.15)
+        store.touch([job_id])
+    assert store.get(job_id)['status'] == 'running'
+    assert store.create(SPEC) == (job_id, False)
+
+
+def test_create_reuses_a_finished_job(tmp_path):
+    store = make_store(tmp_path)
+    job_id, _ = store.create(SPEC)
+    store.update(job_id, status='done', path=str(tmp_path / 'report.docx'))
+    
+    time.sleep(0.35)
+    assert store.create(SPEC) == (job_id, False)
+    assert store.get(job_id)['status'] == 'done'
+
+
+def test_export_data_accepts_then_redirects_to_the_download(tmp_path, monkeypatch):
+    release = threading.Event()
+    built = []
+    
+    def build_report(spec, progress=None):
+        release.wait(5)
+        built.append(spec)
+        progress(1)
+        return b'report bytes'
+    
+    monkeypatch.setattr(app, 'build_report', build_report)
+    monkeypatch.setattr(app, 'report_queue', app.ReportQueue(make_store(tmp_path, lease_seconds=30)))
+    client = app.app.test_client()
+    url = f"/api/export-data?video_url={SPEC['video_urls'][0]}&sentiment_type=negative"
+    
+    accepted = client.get(url)
+    assert accepted.status_code == 202
+    status = accepted.get_json()
+    assert accepted.headers['Location'] == status['status_url']
+    assert status['status'] in ('queued', 'running')
+    assert 'download_url' not in status
+    assert client.get(url).get_json()['job_id'] == status['job_id']
+    
+    release.set()
+    wait_for(lambda: client.get(status['status_url']).get_json()['status'] == 'done')
+    
+    redirected = client.get(url)
+    assert redirected.status_code == 303
+    assert redirected.headers['Location'] == f"/api/reports/{status['job_id']}/download"
+    download = client.get(redirected.headers['Location'])
+    assert download.status_code == 200
+    assert download.data == b'report bytes'
+    assert len(built) == 1
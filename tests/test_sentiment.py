@@ -0,0 +1,73 @@
+import re
+
+from textblob import TextBlob
+
+import app
+
+TEXTS = [
+    'This car is absolutely amazing, best review ever!',
+    'Terrible build quality, I hate the new dashboard.',
+    'It has four wheels.',
+    '<b>Love</b> the <i>colour</i>, see https://example.com/specs?id=1 for more',
+    'Worst. Purchase. Ever!!! http://bad.example.com',
+    '!!! ??? ...',
+    '',
+    'not bad at all, pretty good actually',
+    'This car is absolutely amazing, best review ever!',
+    'Émotion garantie, très beau modèle 😍',
+]
+
+
+def textblob_label(text):
+    """The label the service produced before SentimentEngine, scoring each comment on its own"""
+    cleaned_text = re.sub(r'<[^>]+>', '', text)
+    cleaned_text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', cleaned_text)
+    cleaned_text = re.sub(r'[^\w\s]', '', cleaned_text)
+    if not cleaned_text.strip():
+        return 'neutral'
+    polarity = TextBlob(cleaned_text).sentiment.polarity
+    if polarity > 0.1:
+        return 'positive'
+    elif polarity < -0.1:
+        return 'negative'
+    return 'neutral'
+
+
+EXPECTED = [textblob_label(text) for text in TEXTS]
+
+
+def test_expected_labels_cover_every_sentiment():
+    assert set(EXPECTED) == {'positive', 'negative', 'neutral'}
+
+
+def test_memoised_engine_matches_textblob():
+    engine = app.SentimentEngine(cache_size=100, processes=0)
+    
+    first = engine.analyze_batch(TEXTS)
+    second = engine.analyze_batch(TEXTS)
+    
+    assert [label for label, _ in first] == EXPECTED
+    assert second == first
+    assert engine.stats()['misses'] == len(set(TEXTS))
+    assert [engine.analyze(text)[0] for text in TEXTS] == EXPECTED
+
+
+def test_small_memo_still_matches_textblob():
+    engine = app.SentimentEngine(cache_size=2, processes=0)
+    
+    assert [label for label, _ in engine.analyze_batch(TEXTS)] == EXPECTED
+    assert [engine.analyze(text)[0] for text in reversed(TEXTS)] == EXPECTED[::-1]
+    assert engine.stats()['entries'] == 2
+
+
+def test_process_pool_engine_matches_textblob():
+    engine = app.SentimentEngine(cache_size=100, processes=2, pool_min_batch=1)
+    try:
+        results = engine.analyze_batch(TEXTS)
+        assert engine._pool is not None
+    finally:
+        if engine._pool is not None:
+            engine._pool.shutdown()
+    
+    assert [label for label, _ in results] == EXPECTED
+    assert [polarity for _, polarity in results] == [app.score_text(text) for text in TEXTS]
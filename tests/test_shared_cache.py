@@ -0,0 +1,54 @@
+import time
+
+import app
+
+
+def make_cache(tmp_path, **kwargs):
+    return app.SharedCache(db_path=str(tmp_path / 'cache.sqlite3'), **kwargs)
+
+
+def test_entries_expire_after_their_ttl(tmp_path):
+    cache = make_cache(tmp_path, ttl_seconds=60)
+    cache.set('short', {'value': 1}, ttl_seconds=0.2)
+    cache.set('long', {'value': 2})
+    
+    assert cache.get('short') == {'value': 1}
+    time.sleep(0.3)
+    assert cache.get('short') is None
+    assert cache.get('long') == {'value': 2}
+
+
+def test_default_ttl_applies_when_none_is_given(tmp_path):
+    cache = make_cache(tmp_path, ttl_seconds=0.2)
+    cache.set('key', [1, 2, 3])
+    
+    assert cache.get('key') == [1, 2, 3]
+    time.sleep(0.3)
+    assert cache.get('key') is None
+    assert cache.get_created_at('key') is None
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = make_cache(tmp_path, ttl_seconds=60, max_entries=3)
+    for key in ('a', 'b', 'c'):
+        cache.set(key, key)
+        time.sleep(0.01)
+    assert cache.get('a') == 'a'
+    time.sleep(0.01)
+    
+    cache.set('d', 'd')
+    
+    assert cache.get('b') is None
+    assert [cache.get(key) for key in ('a', 'c', 'd')] == ['a', 'c', 'd']
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['entries'] == 3
+
+
+def test_shared_between_instances_on_the_same_file(tmp_path):
+    writer = make_cache(tmp_path)
+    reader = make_cache(tmp_path)
+    writer.set('snapshot', {'total': 5})
+    
+    assert reader.get('snapshot') == {'total': 5}
+    stats = reader.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 0
@@ -0,0 +1,110 @@
+import asyncio
+import threading
+import time
+
+import app
+import asgi
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'condition not reached'
+        time.sleep(0.01)
+
+
+def run_together(flight, key, fn, callers):
+    results = [None] * callers
+    
+    def call(i):
+        results[i] = flight.do(key, fn)
+    
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_concurrent_callers_share_one_execution_but_not_one_object():
+    flight = app.SingleFlight()
+    release = threading.Event()
+    
+    def build():
+        release.wait(5)
+        return {'comments': [{'text': 'first'}], 'total': 1}
+    
+    def release_when_joined():
+        wait_for(lambda: flight.coalesced == 2)
+        release.set()
+    
+    threading.Thread(target=release_when_joined).start()
+    results = run_together(flight, 'chart', build, 3)
+    
+    assert flight.executions == 1
+    assert flight.coalesced == 2
+    assert all(result == {'comments': [{'text': 'first'}], 'total': 1} for result in results)
+    assert len({id(result) for result in results}) == 3
+    
+    results[0]['comments'][0]['text'] = 'edited'
+    results[1]['comments'].clear()
+    assert results[2] == {'comments': [{'text': 'first'}], 'total': 1}
+
+
+def test_a_lone_caller_gets_the_result_uncopied():
+    flight = app.SingleFlight()
+    value = {'total': 1}
+    assert flight.do('chart', lambda: value) is value
+    assert flight.do('chart', lambda: value) is value
+    assert flight.executions == 2
+    assert flight.coalesced == 0
+
+
+def test_followers_get_the_leaders_error():
+    flight = app.SingleFlight()
+    release = threading.Event()
+    errors = []
+    
+    def fail():
+        release.wait(5)
+        raise ValueError('quota')
+    
+    def call():
+        try:
+            flight.do('chart', fail)
+        except ValueError as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=call) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: flight.coalesced == 1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    
+    assert len(errors) == 2
+    assert flight.do('chart', lambda: 'retried') == 'retried'
+
+
+def test_async_callers_get_their_own_copies():
+    async def scenario():
+        flight = asgi.AsyncSingleFlight()
+        
+        async def build():
+            await asyncio.sleep(0.05)
+            return {'comments': [{'text': 'first'}]}
+        
+        results = await asyncio.gather(*(flight.do('chart', build) for _ in range(3)))
+        results[0]['comments'].append({'text': 'added'})
+        alone = await flight.do('chart', build)
+        return flight, results, alone
+    
+    flight, results, alone = asyncio.run(scenario())
+    assert flight.executions == 2
+    assert flight.coalesced == 2
+    assert len({id(result) for result in results}) == 3
+    assert results[1] == results[2] == {'comments': [{'text': 'first'}]}
+    assert alone == {'comments': [{'text': 'first'}]}
+
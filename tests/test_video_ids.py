@@ -0,0 +1,74 @@
+import pytest
+
+import app
+
+VIDEO_ID = 'dQw4w9WgXcQ'
+
+
+@pytest.mark.parametrize('url', [
+    f'https://www.youtube.com/watch?v={VIDEO_ID}',
+    f'https://www.youtube.com/watch?feature=share&v={VIDEO_ID}&t=42',
+    f'https://youtube.com/watch?app=desktop&amp;v={VIDEO_ID}',
+    f'https://m.youtube.com/watch?v={VIDEO_ID}',
+    f'https://youtu.be/{VIDEO_ID}',
+    f'https://youtu.be/{VIDEO_ID}?si=abc123',
+    f'https://www.youtube.com/shorts/{VIDEO_ID}',
+    f'https://www.youtube.com/embed/{VIDEO_ID}?autoplay=1',
+    f'https://www.youtube-nocookie.com/embed/{VIDEO_ID}',
+    f'https://www.bing.com/ck/a?u=https%3A%2F%2Fwww.youtube.com%2Fwatch%3Fv%3D{VIDEO_ID}&ntb=1',
+    f'https://www.bing.com/ck/a?u=https%253A%252F%252Fyoutu.be%252F{VIDEO_ID}',
+])
+def test_extract_video_id(url):
+    assert app.extract_video_id(url) == VIDEO_ID
+
+
+@pytest.mark.parametrize('url', ['https://www.youtube.com/', 'https://example.com/watch?v=abc', 'not a url'])
+def test_extract_video_id_rejects_other_urls(url):
+    with pytest.raises(ValueError):
+        app.extract_video_id(url)
+
+
+def scan(chunks):
+    scanner = app.VideoIdScanner()
+    for chunk in chunks:
+        video_id = scanner.feed(chunk)
+        if video_id:
+            return video_id
+    return scanner.finish()
+
+
+PAGE = (
+    '<html><head><title>Bing videos</title></head><body>' + 'x' * 2000
+    + f'<a href="https://www.youtube.com/watch?v={VIDEO_ID}&amp;pp=1">Review</a>'
+    + '<a href="https://youtu.be/otherVideo1">Other</a></body></html>'
+)
+
+
+def test_scanner_finds_the_first_link_in_one_chunk():
+    assert scan([PAGE]) == VIDEO_ID
+    assert app.find_video_id(PAGE) == VIDEO_ID
+
+
+@pytest.mark.parametrize('size', [1, 7, 64, 511, 512, 1000])
+def test_scanner_matches_links_split_across_chunks(size):
+    assert scan([PAGE[i:i + size] for i in range(0, len(PAGE), size)]) == VIDEO_ID
+
+
+def test_scanner_waits_for_an_id_split_at_a_chunk_boundary():
+    start = PAGE.index(VIDEO_ID) + 5
+    for split in range(PAGE.index('https://www.youtube'), start + 1):
+        assert scan([PAGE[:split], PAGE[split:]]) == VIDEO_ID
+
+
+def test_scanner_returns_an_id_at_the_end_of_the_stream():
+    assert scan(['see https://youtu.be/', VIDEO_ID]) == VIDEO_ID
+
+
+def test_scanner_finds_percent_encoded_redirects():
+    page = 'x' * 300 + f'href="/ck/a?u=https%3A%2F%2Fwww.youtube.com%2Fwatch%3Fv%3D{VIDEO_ID}&amp;ntb=1"'
+    assert scan([page[i:i + 50] for i in range(0, len(page), 50)]) == VIDEO_ID
+
+
+def test_find_video_id_without_a_link_raises():
+    with pytest.raises(ValueError):
+        app.find_video_id('<html>' + 'no videos here ' * 100 + '</html>')